@@ -0,0 +1,174 @@
+"""
+Benchmark every flag download strategy against the local mock flags server.
+
+The server (`perceive_py.mock_flag_server`) runs in its own process so its CPU
+time is not charged to the downloaders. Each strategy's `get_flag` is wrapped to
+time every flag, including retries of 503 answers, and to log the timings to a
+shared file so the process-pool workers report too (they inherit the wrapper
+through fork).
+
+Usage:
+    poetry run python benchmarks/bench_flag_downloaders.py
+    poetry run python benchmarks/bench_flag_downloaders.py --flags 200 --latency_ms 80 --jitter_ms 40 \
+        --bandwidth_kbps 256 --size 32768 --error_rate 0.05 --repeat 3
+"""
+
+import argparse
+import contextlib
+import functools
+import inspect
+import io
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+from tabulate import tabulate
+
+from perceive_py import (
+    flags_asyncio,
+    flags_threadpool,
+    flags_threadpool_futures,
+    flags_threadpool_process,
+    sequential_downloads,
+)
+from perceive_py.mock_flag_server import MockFlagServer
+
+STRATEGIES = {
+    "sequential": sequential_downloads,
+    "threadpool": flags_threadpool,
+    "threadpool_futures": flags_threadpool_futures,
+    "threadpool_process": flags_threadpool_process,
+    "asyncio": flags_asyncio,
+}
+
+
+def get_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--flags", type=int, default=100, help=" Enter number of flags to download")
+    parser.add_argument("--latency_ms", type=float, default=50.0, help=" Enter server latency per request")
+    parser.add_argument("--jitter_ms", type=float, default=20.0, help=" Enter maximum extra random latency")
+    parser.add_argument("--bandwidth_kbps", type=float, default=None, help=" Enter per-response bandwidth cap in KB/s")
+    parser.add_argument("--size", type=int, default=1024, help=" Enter GIF size in bytes")
+    parser.add_argument("--error_rate", type=float, default=0.0, help=" Enter fraction of requests answered with 503")
+    parser.add_argument("--retries", type=int, default=5, help=" Enter retries per flag after a 503")
+    parser.add_argument("--strategies", nargs="+", default=list(STRATEGIES), help=" Enter strategies to run")
+    parser.add_argument("--repeat", type=int, default=1, help=" Enter number of runs per strategy")
+    return parser.parse_args()
+
+
+def log_timing(log_file, elapsed, errors):
+    with open(log_file, "a") as log_ctx:
+        log_ctx.write(f"{elapsed} {errors}\n")
+
+
+def timed_get_flag(get_flag, log_file, retries):
+    if inspect.iscoroutinefunction(get_flag):
+
+        @functools.wraps(get_flag)
+        async def wrapped_async(*args):
+            tic = time.perf_counter()
+            for attempt in range(retries + 1):
+                try:
+                    image = await get_flag(*args)
+                    break
+                except httpx.HTTPStatusError:
+                    if attempt == retries:
+                        raise
+            log_timing(log_file, time.perf_counter() - tic, attempt)
+            return image
+
+        return wrapped_async
+
+    @functools.wraps(get_flag)
+    def wrapped(*args):
+        tic = time.perf_counter()
+        for attempt in range(retries + 1):
+            try:
+                image = get_flag(*args)
+                break
+            except httpx.HTTPStatusError:
+                if attempt == retries:
+                    raise
+        log_timing(log_file, time.perf_counter() - tic, attempt)
+        return image
+
+    return wrapped
+
+
+def cpu_seconds():
+    usage = [resource.getrusage(who) for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)]
+    return sum(u.ru_utime + u.ru_stime for u in usage)
+
+
+def run_strategy(module, cc_list, log_file, retries):
+    Path(log_file).write_text("")
+    original = module.get_flag
+    module.get_flag = timed_get_flag(original, log_file, retries)
+    try:
+        cpu = cpu_seconds()
+        tic = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            count = module.download_many(cc_list)
+        elapsed = time.perf_counter() - tic
+        cpu = cpu_seconds() - cpu
+    finally:
+        module.get_flag = original
+    timings = np.loadtxt(log_file, ndmin=2)
+    assert count == len(cc_list) == len(timings)
+    return elapsed, cpu, timings[:, 0], int(timings[:, 1].sum())
+
+
+def main(num_flags, latency_ms, jitter_ms, bandwidth_kbps, size, error_rate, retries, strategies, repeat):
+    server = MockFlagServer(
+        latency=latency_ms / 1000,
+        jitter=jitter_ms / 1000,
+        bandwidth=bandwidth_kbps * 1024 if bandwidth_kbps else None,
+        error_rate=error_rate,
+        size=size,
+    ).start_process()
+    cc_list = [f"{i // 26 % 26 + 65:c}{i % 26 + 65:c}{i // 676 or ''}" for i in range(num_flags)]
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            sequential_downloads.BASE_URL = server.base_url
+            sequential_downloads.DEST_DIR = Path(tmp_dir)
+            log_file = str(Path(tmp_dir) / "timings.log")
+            for name in strategies:
+                runs = [run_strategy(STRATEGIES[name], cc_list, log_file, retries) for _ in range(repeat)]
+                elapsed, cpu, timings, errors = min(runs, key=lambda run: run[0])
+                p50, p95, p99 = np.percentile(timings, [50, 95, 99]) * 1000
+                results.append(
+                    (
+                        name,
+                        f"{elapsed:0.3f}",
+                        f"{num_flags / elapsed:0.1f}",
+                        f"{num_flags * size / elapsed / 1e6:0.2f}",
+                        f"{p50:0.1f}",
+                        f"{p95:0.1f}",
+                        f"{p99:0.1f}",
+                        f"{cpu:0.2f}",
+                        errors,
+                    )
+                )
+    finally:
+        server.stop()
+    headers = ["strategy", "seconds", "flags/s", "MB/s", "p50 ms", "p95 ms", "p99 ms", "CPU s", "retried 503s"]
+    print(tabulate(results, headers=headers))
+
+
+if __name__ == "__main__":
+    args = get_args()
+    main(
+        args.flags,
+        args.latency_ms,
+        args.jitter_ms,
+        args.bandwidth_kbps,
+        args.size,
+        args.error_rate,
+        args.retries,
+        args.strategies,
+        args.repeat,
+    )
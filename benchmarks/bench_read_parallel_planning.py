@@ -0,0 +1,93 @@
+"""
+Benchmark chunk boundary planning in `read_parallel` on files with very long lines.
+
+The legacy planner walks back from every candidate offset one byte at a time
+with `seek`/`read(1)`; `plan_chunks` reads one block at a time and uses `rfind`.
+
+Usage:
+    poetry run python benchmarks/bench_read_parallel_planning.py
+    poetry run python benchmarks/bench_read_parallel_planning.py --line_mb 1 --lines 64 --chunks 7 16 31
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from tabulate import tabulate
+
+from perceive_py.read_parallel import LINE_DELIMITER, plan_chunks
+
+
+def get_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--line_mb", type=float, default=1.0, help=" Enter line length in megabytes")
+    parser.add_argument("--lines", type=int, default=64, help=" Enter number of lines")
+    parser.add_argument("--chunks", type=int, nargs="+", default=(7, 16, 31), help=" Enter chunk counts to plan")
+    return parser.parse_args()
+
+
+def legacy_is_line_start(file_ctx, position, line_delimiter):
+    if position == 0:
+        return True
+    file_ctx.seek(position - 1)
+    return file_ctx.read(1) == line_delimiter
+
+
+def legacy_seek_next_line(file_ctx, position):
+    file_ctx.seek(position)
+    file_ctx.readline()
+    return file_ctx.tell()
+
+
+def legacy_plan_chunks(filename, num_chunks):
+    file_size = os.path.getsize(filename)
+    chunk_size = file_size // num_chunks
+    chunk_args = []
+    with open(filename, "r") as file_ctx:
+        chunk_start = 0
+        while chunk_start < file_size:
+            chunk_end = min(file_size, chunk_start + chunk_size)
+            while not legacy_is_line_start(file_ctx, chunk_end, line_delimiter=LINE_DELIMITER):
+                chunk_end -= 1
+            if chunk_start == chunk_end:
+                chunk_end = legacy_seek_next_line(file_ctx, chunk_end)
+            chunk_args.append((filename, chunk_start, chunk_end))
+            chunk_start = chunk_end
+    return chunk_args
+
+
+def time_planner(planner, filename, num_chunks):
+    tic = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        chunk_args = planner(filename, num_chunks)
+    return time.perf_counter() - tic, chunk_args
+
+
+def main(line_mb, num_lines, chunk_counts):
+    rng = random.Random(0)
+    line_bytes = int(line_mb * 1024 * 1024)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = str(Path(tmp_dir) / "long_lines.txt")
+        with open(filename, "wb") as out_ctx:
+            for _ in range(num_lines):
+                # vary the line length so boundaries do not land on line starts
+                out_ctx.write(b"x" * rng.randint(line_bytes // 2, line_bytes * 3 // 2) + LINE_DELIMITER.encode())
+        for num_chunks in chunk_counts:
+            legacy_time, legacy_args = time_planner(legacy_plan_chunks, filename, num_chunks)
+            block_time, block_args = time_planner(plan_chunks, filename, num_chunks)
+            assert block_args == legacy_args
+            results.append(
+                (num_chunks, len(block_args), f"{legacy_time * 1e3:0.1f}", f"{block_time * 1e3:0.2f}", f"{legacy_time / block_time:0.0f}x")
+            )
+    print(tabulate(results, headers=["chunks", "boundaries", "legacy ms", "block ms", "speedup"]))
+
+
+if __name__ == "__main__":
+    args = get_args()
+    main(args.line_mb, args.lines, args.chunks)
@@ -0,0 +1,51 @@
+"""
+Benchmark the 'python' and 'numpy' engines of `generate_synthetic_data`.
+
+Each field type is timed on its own, then the sample source schema end to end.
+With pyarrow installed the 'numpy' engine builds string columns as
+`string[pyarrow]` straight from the drawn bytes; without it every string is
+boxed into a Python `str`, which bounds their speedup.
+
+Usage:
+    poetry run python benchmarks/bench_synthetic_data.py
+    poetry run python benchmarks/bench_synthetic_data.py --rows 100000 1000000 10000000
+"""
+
+import argparse
+import time
+
+from tabulate import tabulate
+
+from perceive_py.create_synthetic_data import create_sample_source_schema, generate_synthetic_data
+
+DEFAULT_ROWS = (100_000, 1_000_000)
+FIELD_TYPES = ("integer", "float", "boolean", "string")
+
+
+def get_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS, help=" Enter row counts to benchmark")
+    return parser.parse_args()
+
+
+def time_engine(schema, num_rows, engine):
+    tic = time.perf_counter()
+    generate_synthetic_data(schema, num_rows, seed=7, engine=engine)
+    return time.perf_counter() - tic
+
+
+def main(rows):
+    schemas = [(field_type, {"fields": [{"name": "value", "type": field_type}]}) for field_type in FIELD_TYPES]
+    schemas.append(("source schema", create_sample_source_schema()))
+    results = []
+    for num_rows in rows:
+        for label, schema in schemas:
+            python_time = time_engine(schema, num_rows, "python")
+            numpy_time = time_engine(schema, num_rows, "numpy")
+            results.append((num_rows, label, f"{python_time:0.3f}", f"{numpy_time:0.4f}", f"{python_time / numpy_time:0.0f}x"))
+    print(tabulate(results, headers=["rows", "columns", "python s", "numpy s", "speedup"]))
+
+
+if __name__ == "__main__":
+    args = get_args()
+    main(args.rows)
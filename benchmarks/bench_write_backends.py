@@ -0,0 +1,60 @@
+"""
+Benchmark the thread and process CSV encoding backends of `write_to_file`.
+
+Usage:
+    poetry run python benchmarks/bench_write_backends.py
+    poetry run python benchmarks/bench_write_backends.py --rows 30000 3000000 --workers 8
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from tabulate import tabulate
+
+from perceive_py.process_large_data import BACKENDS, chunk_generator, create_large_dataframe, write_to_file
+
+DEFAULT_ROWS = (30_000, 3_000_000, 30_000_000)
+
+
+def get_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS, help=" Enter row counts to benchmark")
+    parser.add_argument("--cols", type=int, default=10, help=" Enter number of data columns")
+    parser.add_argument("--chunks", type=int, default=50, help=" Enter number of chunks")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help=" Enter number of workers")
+    return parser.parse_args()
+
+
+def run_backend(df, output_file, backend, num_chunks, num_workers):
+    chunk_size = -(-len(df) // num_chunks)
+    if os.path.exists(output_file):
+        os.remove(output_file)
+    tic = time.perf_counter()
+    write_to_file(output_file, chunk_generator(df, chunk_size, num_chunks), num_workers, backend=backend)
+    elapsed = time.perf_counter() - tic
+    return elapsed, os.path.getsize(output_file)
+
+
+def main(rows, cols, num_chunks, num_workers):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_rows in rows:
+            df = create_large_dataframe(num_rows, cols)
+            baseline = None
+            for backend in BACKENDS:
+                output_file = str(Path(tmp_dir) / f"{backend}.csv")
+                elapsed, size = run_backend(df, output_file, backend, num_chunks, num_workers)
+                baseline = baseline or elapsed
+                results.append(
+                    (num_rows, backend, num_workers, f"{elapsed:0.3f}", f"{size / elapsed / 1e6:0.1f}", f"{baseline / elapsed:0.2f}x")
+                )
+            del df
+    print(tabulate(results, headers=["rows", "backend", "workers", "seconds", "MB/s", "speedup"]))
+
+
+if __name__ == "__main__":
+    args = get_args()
+    main(args.rows, args.cols, args.chunks, args.workers)
@@ -0,0 +1,387 @@
+"""
+Output formats for the chunked large-data writer.
+
+Every format is split in two halves so it fits the ordered pipeline used by
+`process_large_data.write_to_file`:
+
+- an encoder that runs in the worker pool and turns a DataFrame chunk into a
+  payload (`encode_columnar`), and
+- a sink that runs on the single writer thread and appends payloads to the
+  output file in chunk order (`open_chunk_sink`).
+
+Parquet and Feather need pyarrow, which is imported locally so CSV and NumPy
+exports keep working without it.
+"""
+
+import os
+import struct
+import zipfile
+
+from perceive_py.utils import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+FORMATS = ("csv", "parquet", "feather", "npy", "npz")
+ARROW_FORMATS = ("parquet", "feather")
+NPY_MAGIC = b"\x93NUMPY"
+NPY_ALIGN = 64
+NPY_MAX_ROWS = 10**19  # widest shape the reserved .npy header has to fit
+NPY_WIDEN_BLOCK_BYTES = 16 * 1024**2  # records rewritten at a time when the npy layout widens
+
+
+def import_pyarrow():
+    """
+    Imports pyarrow on first use.
+
+    Returns:
+        module: The `pyarrow` module.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+    """
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(
+            "The parquet and feather formats need pyarrow. Install it with `poetry install -E arrow`."
+        ) from e
+    return pyarrow
+
+
+def check_format(fmt):
+    """
+    Validates an output format before any work starts.
+
+    Args:
+        fmt (str): One of `FORMATS`.
+
+    Raises:
+        ValueError: If `fmt` is not a supported format.
+        ImportError: If `fmt` needs pyarrow and it is not installed.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+    if fmt in ARROW_FORMATS:
+        import_pyarrow()
+
+
+def column_array(values):
+    """
+    Converts one column into a typed NumPy array and a null mask.
+
+    Numeric and boolean columns keep their dtype. Nullable integer and boolean
+    extension columns such as `Int64` have no NumPy dtype that holds missing
+    values, so they are filled with 0 and come with a mask of their missing
+    values; nullable float columns use NaN. Every other column becomes a
+    fixed-width unicode array so it can be stored without pickling; categorical
+    columns are as wide as their longest category, so every chunk of the column
+    has the same width.
+
+    Args:
+        values (pandas.Series): The column to convert.
+
+    Returns:
+        tuple: The `numpy.ndarray` of values and the boolean `numpy.ndarray` mask of
+        missing values, which is None for columns that need none.
+    """
+    dtype = values.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in "biuf":
+        return values.to_numpy(), None
+    numpy_dtype = getattr(dtype, "numpy_dtype", None)
+    if numpy_dtype is not None and numpy_dtype.kind == "f":
+        return values.to_numpy(dtype=numpy_dtype, na_value=np.nan), None
+    if numpy_dtype is not None and numpy_dtype.kind in "biu":
+        return values.to_numpy(dtype=numpy_dtype, na_value=0), values.isna().to_numpy(dtype=bool)
+    array = values.astype(str).to_numpy(dtype=str)
+    if isinstance(dtype, pd.CategoricalDtype):
+        width = max((len(str(category)) for category in dtype.categories), default=0)
+        if array.dtype.itemsize // 4 < width:
+            array = array.astype(f"U{width}")
+    return array, None
+
+
+def column_with_mask(values):
+    """
+    Converts one column into a NumPy array and a null mask, so it can be restored
+    exactly by `restore_column`, e.g. after a trip through shared memory.
+
+    NumPy float and datetime columns mark missing values with NaN/NaT themselves
+    and need no mask. Other numeric and boolean columns, including nullable
+    extension columns such as `Int64`, keep their NumPy dtype with missing values
+    filled with 0; every other column becomes a fixed-width unicode array with
+    missing values as "".
+
+    Args:
+        values (pandas.Series): The column to convert.
+
+    Returns:
+        tuple: The `numpy.ndarray` of values, the boolean `numpy.ndarray` mask of
+        missing values (None when nothing is missing) and the column's pandas dtype.
+    """
+    dtype = values.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in "fmM":
+        return values.to_numpy(), None, dtype
+    mask = values.isna().to_numpy(dtype=bool)
+    mask = mask if mask.any() else None
+    numpy_dtype = getattr(dtype, "numpy_dtype", dtype)
+    if numpy_dtype.kind in "biuf":
+        return values.to_numpy(dtype=numpy_dtype, na_value=0), mask, dtype
+    if mask is not None:
+        values = values.astype(object).where(~mask, "")
+    return values.astype(str).to_numpy(dtype=str), mask, dtype
+
+
+def restore_column(values, mask, dtype):
+    """
+    Rebuilds a column converted by `column_with_mask`.
+
+    Args:
+        values (numpy.ndarray): The column values.
+        mask (numpy.ndarray): The boolean mask of missing values, or None.
+        dtype: The pandas dtype of the original column.
+
+    Returns:
+        pandas.Series: The column with its dtype and missing values.
+    """
+    column = pd.Series(values, copy=False)
+    if column.dtype != dtype:
+        column = column.astype(dtype)
+    if mask is not None:
+        column = column.mask(mask)
+    return column
+
+
+def column_arrays(chunk_df):
+    """
+    Converts a DataFrame chunk into typed NumPy column arrays with `column_array`.
+
+    Args:
+        chunk_df (pandas.DataFrame): The DataFrame chunk to convert.
+
+    Returns:
+        dict: Column name to the (`numpy.ndarray`, mask or None) pair of `column_array`.
+    """
+    return {column: column_array(chunk_df[column]) for column in chunk_df.columns}
+
+
+def encode_columnar(fmt, chunk_df):
+    """
+    Encodes a DataFrame chunk into the payload expected by the sink for `fmt`.
+
+    The mask of a nullable integer or boolean column is stored next to it as
+    `<column>.mask`: as a record field of every npy chunk, and as an npz array
+    of the chunks that have missing values.
+
+    Args:
+        fmt (str): One of `FORMATS` other than "csv".
+        chunk_df (pandas.DataFrame): The DataFrame chunk to encode.
+
+    Returns:
+        object: A `pyarrow.Table` for parquet and feather, a structured
+        `numpy.ndarray` for npy and a dict of column arrays for npz.
+    """
+    if fmt in ARROW_FORMATS:
+        pa = import_pyarrow()
+        return pa.Table.from_pandas(chunk_df, preserve_index=False)
+    arrays = {}
+    for name, (values, mask) in column_arrays(chunk_df).items():
+        arrays[str(name)] = values
+        if mask is not None and (fmt == "npy" or mask.any()):
+            arrays[f"{name}.mask"] = mask
+    if fmt == "npz":
+        return arrays
+    if fmt == "npy":
+        records = np.empty(len(chunk_df), dtype=[(name, array.dtype) for name, array in arrays.items()])
+        for name, array in arrays.items():
+            records[name] = array
+        return records
+    raise ValueError(f"Unsupported format: {fmt}")
+
+
+def build_npy_header(dtype, num_rows, min_length=0):
+    """
+    Builds a version 2.0 `.npy` header for a 1-D array of `num_rows` records.
+
+    Args:
+        dtype (numpy.dtype): The record dtype.
+        num_rows (int): The number of records in the file.
+        min_length (int, optional): Pads the header to at least this many bytes. Defaults to 0.
+
+    Returns:
+        bytes: The complete header, padded to a multiple of 64 bytes.
+    """
+    header = repr(
+        {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (num_rows,)}
+    ).encode("latin1")
+    prefix_length = len(NPY_MAGIC) + 2 + 4
+    total = max(prefix_length + len(header) + 1, min_length)
+    total = -(-total // NPY_ALIGN) * NPY_ALIGN
+    header += b" " * (total - prefix_length - len(header) - 1) + b"\n"
+    return NPY_MAGIC + bytes([2, 0]) + struct.pack("<I", len(header)) + header
+
+
+class RawChunkSink:
+    """
+    Appends encoded CSV bytes to the output file.
+    """
+
+    def __init__(self, output_file):
+        self._file = open(output_file, "ab")
+        self._start = self._file.tell()
+
+    def write(self, chunk_id, payload):
+        self._file.write(payload)
+
+    def flush(self):
+        """
+        Flushes the appended bytes to the OS and returns the file size, which is
+        where the next chunk will start.
+        """
+        self._file.flush()
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+        return os.path.getsize(self._file.name) - self._start
+
+
+class ArrowChunkSink:
+    """
+    Writes each chunk as one Parquet row group or one Feather record batch group.
+    """
+
+    def __init__(self, output_file, fmt):
+        self._output_file = output_file
+        self._fmt = fmt
+        self._writer = None
+        self._sink = None
+
+    def write(self, chunk_id, payload):
+        pa = import_pyarrow()
+        if self._writer is None:
+            if self._fmt == "parquet":
+                import pyarrow.parquet as pq
+
+                self._writer = pq.ParquetWriter(self._output_file, payload.schema)
+            else:
+                self._sink = pa.OSFile(self._output_file, "wb")
+                self._writer = pa.ipc.new_file(self._sink, payload.schema)
+        if self._fmt == "parquet":
+            self._writer.write_table(payload, row_group_size=max(payload.num_rows, 1))
+        else:
+            self._writer.write_table(payload)
+
+    def close(self):
+        if self._writer is None:
+            return 0
+        self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+        return os.path.getsize(self._output_file)
+
+
+class NpyChunkSink:
+    """
+    Appends structured record chunks to a single `.npy` file.
+
+    The header is reserved up front and rewritten with the final row count when
+    the sink is closed. The record layout is set by the first chunk; when a later
+    chunk needs wider fields, e.g. longer strings, the records written so far are
+    rewritten in the wider layout.
+    """
+
+    def __init__(self, output_file):
+        self._file = open(output_file, "w+b")
+        self._dtype = None
+        self._num_rows = 0
+        self._header_length = 0
+
+    def write(self, chunk_id, payload):
+        if self._dtype is None:
+            self._dtype = payload.dtype
+            header = build_npy_header(self._dtype, NPY_MAX_ROWS)
+            self._header_length = len(header)
+            self._file.write(header)
+        elif payload.dtype != self._dtype:
+            if payload.dtype.names != self._dtype.names:
+                raise ValueError(f"Chunk {chunk_id} columns do not match the npy record layout")
+            dtype = np.dtype(
+                [(name, np.promote_types(self._dtype[name], payload.dtype[name])) for name in self._dtype.names]
+            )
+            if dtype != self._dtype:
+                self._widen(dtype)
+            payload = payload.astype(self._dtype)
+        self._file.write(payload.tobytes())
+        self._num_rows += len(payload)
+
+    def _widen(self, dtype):
+        """
+        Rewrites the records written so far in the wider record `dtype`.
+
+        Records only move towards the end of the file, so they are rewritten
+        block by block from the last one and none is overwritten before it is read.
+        """
+        old_dtype, old_start = self._dtype, self._header_length
+        start = max(old_start, len(build_npy_header(dtype, NPY_MAX_ROWS)))
+        block_rows = max(NPY_WIDEN_BLOCK_BYTES // dtype.itemsize, 1)
+        for first in range((self._num_rows - 1) // block_rows * block_rows, -1, -block_rows):
+            num_rows = min(block_rows, self._num_rows - first)
+            self._file.seek(old_start + first * old_dtype.itemsize)
+            records = np.frombuffer(self._file.read(num_rows * old_dtype.itemsize), dtype=old_dtype)
+            self._file.seek(start + first * dtype.itemsize)
+            self._file.write(records.astype(dtype).tobytes())
+        self._dtype = dtype
+        self._header_length = start
+        self._file.seek(start + self._num_rows * dtype.itemsize)
+
+    def close(self):
+        if self._dtype is not None:
+            self._file.seek(0)
+            self._file.write(build_npy_header(self._dtype, self._num_rows, self._header_length))
+            self._file.seek(0, 2)
+        size = self._file.tell()
+        self._file.close()
+        return size
+
+
+class NpzChunkSink:
+    """
+    Stores every column of every chunk as its own `chunk_<id>/<column>` array in an `.npz` archive.
+    """
+
+    def __init__(self, output_file):
+        self._output_file = output_file
+        self._zip = zipfile.ZipFile(output_file, "w", allowZip64=True)
+
+    def write(self, chunk_id, payload):
+        for name, array in payload.items():
+            with self._zip.open(f"chunk_{chunk_id:05d}/{name}.npy", "w", force_zip64=True) as entry:
+                np.lib.format.write_array(entry, np.ascontiguousarray(array), allow_pickle=False)
+
+    def close(self):
+        self._zip.close()
+        return os.path.getsize(self._output_file)
+
+
+def open_chunk_sink(fmt, output_file):
+    """
+    Opens the sink that appends payloads for `fmt` to `output_file`.
+
+    Args:
+        fmt (str): One of `FORMATS`.
+        output_file (str): The path to the output file.
+
+    Returns:
+        object: A sink with `write(chunk_id, payload)` and `close()`, where
+        `close()` returns the number of bytes written.
+    """
+    if fmt == "csv":
+        return RawChunkSink(output_file)
+    if fmt in ARROW_FORMATS:
+        return ArrowChunkSink(output_file, fmt)
+    if fmt == "npy":
+        return NpyChunkSink(output_file)
+    if fmt == "npz":
+        return NpzChunkSink(output_file)
+    raise ValueError(f"Unsupported format: {fmt}")
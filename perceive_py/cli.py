@@ -0,0 +1,47 @@
+"""
+The `perceive` command: one entry point for the package's scripts.
+
+Each subcommand lives in its own module, which is only imported once the
+subcommand is chosen, so `perceive --help` does not pay for numpy, pandas or
+httpx. The subcommand modules load those with `utils.lazy_import`, so
+`perceive <command> --help` does not either. The module's `cli(argv, prog)`
+parses the remaining arguments.
+
+Usage:
+    perceive --help
+    perceive large-data --num_rows 100000 --format parquet --stream
+    perceive read-parallel --help
+    perceive synth --num_rows 1000 --output data.csv
+    perceive rota --fair
+    perceive download --strategy threadpool --base_url http://127.0.0.1:8001
+"""
+
+import argparse
+import importlib
+
+COMMANDS = {
+    "large-data": ("perceive_py.process_large_data", "Create a large DataFrame and export it chunk by chunk."),
+    "read-parallel": ("perceive_py.read_parallel", "Read a text file in parallel line ranges."),
+    "synth": ("perceive_py.create_synthetic_data", "Generate synthetic data from a JSON schema."),
+    "rota": ("perceive_py.create_rota", "Print a weekly rota of fixed pairs."),
+    "download": ("perceive_py.sequential_downloads", "Download the top 20 flags."),
+}
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(prog="perceive", description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", metavar="command", required=True)
+    for name, (_, help_text) in COMMANDS.items():
+        # The subcommand's own parser handles its options, including --help
+        subparsers.add_parser(name, help=help_text, add_help=False)
+    return parser
+
+
+def main(argv=None):
+    args, rest = get_parser().parse_known_args(argv)
+    module = importlib.import_module(COMMANDS[args.command][0])
+    module.cli(rest, prog=f"perceive {args.command}")
+
+
+if __name__ == "__main__":
+    main()
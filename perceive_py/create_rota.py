@@ -3,6 +3,7 @@ The Python script generates a fixed rota schedule with pairs of values for each
 input for start date and number of rota days.
 """
 
+import argparse
 from datetime import date, timedelta
 import logging
 
@@ -102,9 +103,11 @@ def create_fixed_rota_with_dates(pairs, start_date, end_date):
     return rota
 
 
-def main():
-    inp_date = input("Enter rota start date(YYYY-MM-DD): ")
-    inp_rota_days = int(input("Enter rota days(will be rounded to nearest workdays): "))
+def main(inp_date=None, inp_rota_days=None):
+    if inp_date is None:
+        inp_date = input("Enter rota start date(YYYY-MM-DD): ")
+    if inp_rota_days is None:
+        inp_rota_days = int(input("Enter rota days(will be rounded to nearest workdays): "))
     iso_date = str_to_date(inp_date)
     start_date = get_next_monday(iso_date)
     rota_days = round_rota_days(inp_rota_days)
@@ -126,5 +129,25 @@ def main():
             )
 
 
+def get_args(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Print a weekly rota of fixed pairs.")
+    parser.add_argument("--start_date", help=" Enter rota start date(YYYY-MM-DD), prompted when omitted")
+    parser.add_argument("--rota_days", type=int, help=" Enter rota days, prompted when omitted")
+    parser.add_argument(
+        "--fair", action="store_true", help=" Print the sample rota with the monthly pair restriction instead"
+    )
+    return parser.parse_args(argv)
+
+
+def cli(argv=None, prog=None):
+    args = get_args(argv, prog)
+    if args.fair:
+        from perceive_py import create_fair_rota
+
+        create_fair_rota.main()
+    else:
+        main(args.start_date, args.rota_days)
+
+
 if __name__ == "__main__":
-    main()
+    cli()
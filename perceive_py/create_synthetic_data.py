@@ -1,8 +1,30 @@
 # Give an json file with schema with sample data  and generate synthetic data in table format having same schema based on number of rows as input
+import argparse
+import concurrent.futures
+import itertools
 import json
-import pandas as pd
+import os
+from collections import deque
+
 import random
-import string
+
+from perceive_py.chunk_formats import check_format, encode_columnar, open_chunk_sink
+from perceive_py.field_generators import (
+    STRING_ALPHABET,
+    STRING_LENGTH,
+    apply_nulls,
+    compile_field,
+    compile_schema,
+    zipf_ranks,
+)
+from perceive_py.synthetic_sinks import DataFrameSink, open_sink
+from perceive_py.utils import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+ENGINES = ('numpy', 'python')
+BLOCK_ROWS = 1 << 20
 
 def load_schema_from_json(json_file):
     """
@@ -15,85 +37,286 @@ def load_schema_from_json(json_file):
         schema = json.load(file)
     return schema
 
-def generate_synthetic_data(schema, num_rows, seed=None):
+def generate_python_column(field_type, num_rows):
+    """
+    Generate one column cell by cell with the `random` module.
+
+    :param field_type: Type of the field (e.g., 'string', 'integer', etc.).
+    :param num_rows: Number of rows to generate.
+    :return: List of generated values.
+    """
+    if field_type == 'string':
+        return [''.join(random.choices(STRING_ALPHABET, k=STRING_LENGTH)) for _ in range(num_rows)]
+    elif field_type == 'integer':
+        return [random.randint(0, 100) for _ in range(num_rows)]
+    elif field_type == 'float':
+        return [random.uniform(0.0, 100.0) for _ in range(num_rows)]
+    elif field_type == 'boolean':
+        return [random.choice([True, False]) for _ in range(num_rows)]
+    raise ValueError(f"Unsupported field type: {field_type}")
+
+
+def generate_synthetic_data(schema, num_rows, seed=None, engine='numpy'):
     """
     Generate synthetic data based on the provided schema.
 
     :param schema: JSON schema defining the structure of the data.
     :param num_rows: Number of rows to generate.
     :param seed: Seed for random number generator to ensure reproducibility. Default is 42.
+    :param engine: 'numpy' draws every column with vectorized calls through
+        `generate_to` into a `DataFrameSink` and supports every type in
+        `field_generators.FIELD_GENERATORS` with their options; 'python' keeps
+        the original per-cell `random` module stream for the string, integer,
+        float and boolean types. Default is 'numpy'.
     :return: DataFrame containing synthetic data.
     """
     if seed is None:
         seed = 42  # Default seed value for reproducibility
-    
-    random.seed(seed)
-    
+    if engine not in ENGINES:
+        raise ValueError(f"Unsupported engine: {engine}")
+
+    if engine == 'numpy':
+        return generate_to(DataFrameSink(), schema, num_rows, seed=seed)
     data = {}
-    
+    random.seed(seed)
     for field in schema['fields']:
-        field_name = field['name']
-        field_type = field['type']
-        
-        if field_type == 'string':
-            data[field_name] = [
-                ''.join(random.choices(string.ascii_letters + string.digits, k=10)) for _ in range(num_rows)
-            ]
-        elif field_type == 'integer':
-            data[field_name] = [random.randint(0, 100) for _ in range(num_rows)]
-        elif field_type == 'float':
-            data[field_name] = [random.uniform(0.0, 100.0) for _ in range(num_rows)]
-        elif field_type == 'boolean':
-            data[field_name] = [random.choice([True, False]) for _ in range(num_rows)]
-        else:
-            raise ValueError(f"Unsupported field type: {field_type}")
+        data[field['name']] = generate_python_column(field['type'], num_rows)
     return pd.DataFrame(data)
 
+def parse_mapping(mapping):
+    """
+    Split one value of a source -> target mapping into its targets and options.
+
+    The value is a target column name, a list of them, or a dictionary with
+    'targets' (a name or a list) and optional 'duplicate_ratio' and 'skew'
+    (see `build_mapped_column`).
+
+    :param mapping: Value of the mapping for one source column.
+    :return: Tuple of the list of target column names and the dictionary of options.
+    """
+    if isinstance(mapping, str):
+        return [mapping], {}
+    if isinstance(mapping, dict):
+        options = {key: mapping[key] for key in ('duplicate_ratio', 'skew') if key in mapping}
+        targets = mapping.get('targets', [])
+        return [targets] if isinstance(targets, str) else list(targets), options
+    return list(mapping), {}
+
+
+def build_reverse_mapped_columns(mapped_source_and_target_columns):
+    """
+    Build the target -> sources lookup for a source -> target mapping.
+
+    A source may map to one target or to a list of targets (multi-target), and
+    several sources may map to the same target (many-to-one).
+
+    :param mapped_source_and_target_columns: Dictionary mapping source columns to targets, see `parse_mapping`.
+    :return: Dictionary of target column name to the list of its source column names.
+    """
+    reverse_mapped_columns = {}
+    for src, mapping in (mapped_source_and_target_columns or {}).items():
+        for tgt in parse_mapping(mapping)[0]:
+            reverse_mapped_columns.setdefault(tgt, []).append(src)
+    return reverse_mapped_columns
+
+
+def build_mapping_options(mapped_source_and_target_columns):
+    """
+    Collect the duplicate ratio and skew options of every mapped target column.
+
+    :param mapped_source_and_target_columns: Dictionary mapping source columns to targets, see `parse_mapping`.
+    :return: Dictionary of target column name to keyword arguments for `build_mapped_column`.
+    """
+    mapping_options = {}
+    for mapping in (mapped_source_and_target_columns or {}).values():
+        targets, options = parse_mapping(mapping)
+        for tgt in targets:
+            mapping_options.setdefault(tgt, {}).update(options)
+    return mapping_options
+
+
+def build_mapped_column(generator, num_rows, match_count, sources, rng, shuffle=False, duplicate_ratio=0.0, skew=None,
+                        offset=0):
+    """
+    Build a mapped column from its source arrays with vectorized draws.
+
+    The matched rows take their keys from the leading rows of the sources,
+    split evenly between them for many-to-one mappings. By default every
+    matched row gets its own key, in order. With `duplicate_ratio` only that
+    share of the matched rows get a new key and the rest repeat one of them;
+    with `skew` the matched rows pick keys from a Zipf distribution with that
+    exponent, so a few hot keys dominate. Integers and booleans for the other
+    rows are sampled from the sources; other types are drawn fresh from `generator`.
+
+    :param generator: FieldGenerator of the mapped field.
+    :param num_rows: Number of rows to generate.
+    :param match_count: Number of rows that take their value from a source.
+    :param sources: List of source column arrays.
+    :param rng: numpy.random.Generator to draw from.
+    :param shuffle: Scatter the matched rows over the column instead of putting them first.
+    :param duplicate_ratio: Fraction of matched rows that repeat a key of another matched row.
+    :param skew: Zipf exponent for picking the keys of matched rows, or None for no skew.
+    :param offset: Position of the first row in the whole table, for position-dependent distributions.
+    :return: NumPy array of generated values.
+    """
+    if not 0.0 <= duplicate_ratio < 1.0:
+        raise ValueError(f"duplicate_ratio must be in [0, 1), got {duplicate_ratio}")
+    num_keys = match_count - int(match_count * duplicate_ratio)
+    bounds = np.linspace(0, num_keys, len(sources) + 1).astype(int)
+    matched = [source[lo:hi] for source, lo, hi in zip(sources, bounds[:-1], bounds[1:])]
+    if num_keys and (num_keys < match_count or skew):
+        keys = matched[0] if len(matched) == 1 else np.concatenate(matched)
+        if skew:
+            picks = zipf_ranks(match_count, num_keys, skew, rng)
+        else:
+            picks = np.concatenate([np.arange(num_keys), rng.integers(0, num_keys, size=match_count - num_keys)])
+        matched = [keys[picks]]
+    if generator.field_type in ['integer', 'boolean']:
+        pool = sources[0] if len(sources) == 1 else np.concatenate(sources)
+        remaining = rng.choice(pool, size=num_rows - match_count)
+    else:
+        remaining = generator.draw(num_rows - match_count, rng, offset + match_count)
+    column = np.concatenate(matched + [remaining])
+    if shuffle:
+        rng.shuffle(column)
+    return column
+
+
+def build_python_mapped_column(field_type, num_rows, match_count, sources, shuffle=False, duplicate_ratio=0.0,
+                               skew=None):
+    """
+    Build a mapped column cell by cell with the `random` module, the python engine's
+    counterpart of `build_mapped_column` with the same options. With one source and
+    no options it draws the original stream: the leading rows copy the source,
+    integers and booleans are sampled from it and other types are drawn as by
+    `generate_python_column`.
+
+    :param field_type: Type of the field (e.g., 'string', 'integer', etc.).
+    :param num_rows: Number of rows to generate.
+    :param match_count: Number of rows that take their value from a source.
+    :param sources: List of source column lists.
+    :param shuffle: Scatter the matched rows over the column instead of putting them first.
+    :param duplicate_ratio: Fraction of matched rows that repeat a key of another matched row.
+    :param skew: Zipf exponent for picking the keys of matched rows, or None for no skew.
+    :return: List of generated values.
+    """
+    if not 0.0 <= duplicate_ratio < 1.0:
+        raise ValueError(f"duplicate_ratio must be in [0, 1), got {duplicate_ratio}")
+    num_keys = match_count - int(match_count * duplicate_ratio)
+    bounds = [num_keys * i // len(sources) for i in range(len(sources) + 1)]
+    matched = [value for source, lo, hi in zip(sources, bounds[:-1], bounds[1:]) for value in source[lo:hi]]
+    if num_keys and skew:
+        weights = itertools.accumulate(rank ** -skew for rank in range(1, len(matched) + 1))
+        matched = random.choices(matched, cum_weights=list(weights), k=match_count)
+    elif num_keys and num_keys < match_count:
+        matched += random.choices(matched, k=match_count - num_keys)
+    if field_type in ['integer', 'boolean']:
+        remaining = random.choices([value for source in sources for value in source], k=num_rows - match_count)
+    elif field_type == 'float':
+        remaining = [random.uniform(0.0, 100.0) for _ in range(num_rows - match_count)]
+    else:
+        remaining = [''.join(random.choices(STRING_ALPHABET, k=STRING_LENGTH)) for _ in range(num_rows - match_count)]
+    column = matched + remaining
+    if shuffle:
+        random.shuffle(column)
+    return column
+
+
 # Handle mapped columns with shared data
-def handle_mapped_columns(field_name, field_type, num_rows, match_fraction, reverse_mapped_columns, shared_data):
+def handle_mapped_columns(field_name, field_type, num_rows, match_fraction, reverse_mapped_columns, shared_data,
+                          shuffle=False, rng=None, generator=None, duplicate_ratio=0.0, skew=None):
     """
     Handle mapped columns with shared data.
 
+    Without `rng` and `generator` this is the python engine: the column is a list
+    drawn with the `random` module by `build_python_mapped_column`, as it always
+    was. With either of them it is drawn by the vectorized `build_mapped_column`.
+
     :param field_name: Name of the field being processed.
     :param field_type: Type of the field (e.g., 'string', 'integer', etc.).
     :param num_rows: Number of rows to generate.
     :param match_fraction: Fraction of rows where mapped columns should have matching data.
-    :param reverse_mapped_columns: Reverse lookup dictionary for mapped columns.
+    :param reverse_mapped_columns: Reverse lookup dictionary for mapped columns, from a target
+        column to its source column or list of source columns.
     :param shared_data: Dictionary containing shared data for mapped columns.
-    :return: List of generated data for the field.
-    """
-    source_column = reverse_mapped_columns.get(field_name)
-    if source_column in shared_data:
-        match_count = int(num_rows * match_fraction)
-        matched_data = shared_data[source_column][:match_count]
-        precomputed_choices = random.choices(shared_data[source_column], k=num_rows - match_count) if field_type in ['integer', 'boolean'] else None
-        remaining_data = []
-        for i in range(num_rows - match_count):
-            if field_type in ['integer', 'boolean']:
-                value = precomputed_choices[i]
-            elif field_type == 'float':
-                value = random.uniform(0.0, 100.0)
-            else:
-                value = ''.join(random.choices(string.ascii_letters + string.digits, k=10))
-            remaining_data.append(value)
-        return matched_data + remaining_data
-    return None
+    :param shuffle: Scatter the matched rows over the column instead of putting them first. Default is False.
+    :param rng: numpy.random.Generator to draw from. Default is None, the python engine.
+    :param generator: Compiled FieldGenerator of the field. Default is the one for `field_type` with
+        default options when `rng` is given.
+    :param duplicate_ratio: Fraction of matched rows that repeat a key of another matched row. Default is 0.
+    :param skew: Zipf exponent for picking the keys of matched rows. Default is None, no skew.
+    :return: List (python engine) or NumPy array of generated data for the field, or None if no
+        source column has been generated yet.
+    """
+    source_columns = reverse_mapped_columns.get(field_name) or []
+    if isinstance(source_columns, str):
+        source_columns = [source_columns]
+    sources = [shared_data[column] for column in source_columns if column in shared_data]
+    if not sources:
+        return None
+    match_count = int(num_rows * match_fraction)
+    if rng is None and generator is None:
+        return build_python_mapped_column(field_type, num_rows, match_count, [list(source) for source in sources],
+                                          shuffle, duplicate_ratio, skew)
+    if rng is None:
+        rng = np.random.default_rng(random.getrandbits(64))
+    if generator is None:
+        generator = compile_field({'name': field_name, 'type': field_type})
+    sources = [np.asarray(source) for source in sources]
+    return build_mapped_column(generator, num_rows, match_count, sources, rng, shuffle, duplicate_ratio, skew)
 
-def generate_combined_data(schemas, num_rows, mapped_source_and_target_columns=None, match_fraction=0.5):
+def generate_combined_data(schemas, num_rows, mapped_source_and_target_columns=None, match_fraction=0.5,
+                           shuffle_matched=False, engine='numpy', sinks=None, chunk_rows=BLOCK_ROWS):
     """
     Generate synthetic data for multiple schemas in a single function call.
 
+    The 'numpy' engine streams every schema through `generate_to` into its sink,
+    one chunk of `chunk_rows` at a time, so a table only has to fit in memory
+    when it goes to a `DataFrameSink` (the default). The tables match those of
+    `generate_combined_data_chunked` with `block_rows=chunk_rows`. The 'python'
+    engine builds whole columns with the `random` module and a DataFrame.
+
     :param schemas: Dictionary with schema names as keys and dictionaries containing schema and seed as values.
     :param num_rows: Number of rows to generate.
     :param mapped_source_and_target_columns: Dictionary mapping columns between source and target data.
+        A source may map to a list of targets, and several sources may map to one target;
+        see `parse_mapping` for per-mapping duplicate ratio and key skew.
     :param match_fraction: Fraction of rows where mapped columns should have matching data. Default is 0.5.
-    :return: Dictionary with schema names as keys and dictionaries containing schema and DataFrame as values.
+    :param shuffle_matched: Scatter matched rows over mapped columns instead of putting them first. Default is False.
+    :param engine: 'numpy' or 'python', as for `generate_synthetic_data`. Default is 'numpy'.
+    :param sinks: Dictionary of schema name to the sink (see `generate_to`) that receives its table,
+        e.g. from `synthetic_sinks.open_sink`. Schemas without one get a `DataFrameSink`. Needs the
+        'numpy' engine. Default is None.
+    :param chunk_rows: Number of rows per chunk of the 'numpy' engine. Default is BLOCK_ROWS.
+    :return: Dictionary with schema names as keys and dictionaries containing the schema and either
+        the DataFrame ('table') or, for other sinks, what their `close()` returned ('bytes') as values.
     """
+    if engine not in ENGINES:
+        raise ValueError(f"Unsupported engine: {engine}")
+    if sinks and engine != 'numpy':
+        raise ValueError("Sinks need the numpy engine")
+    if engine == 'numpy':
+        sources = resolve_block_sources(schemas, mapped_source_and_target_columns)
+        mapping_options = build_mapping_options(mapped_source_and_target_columns)
+        result = {}
+        for schema_name, schema_info in schemas.items():
+            print(f"Generating data for schema: {schema_name}")
+            schema = schema_info["schema"]
+            sink = (sinks or {}).get(schema_name) or DataFrameSink()
+            output = generate_to(sink, schema, num_rows, chunk_rows, schema_info["seed"], sources=sources,
+                                 match_count=int(num_rows * match_fraction), shuffle=shuffle_matched,
+                                 mapping_options=mapping_options)
+            print(f"Generated {num_rows} rows for schema: {schema_name}")
+            key = "table" if isinstance(sink, DataFrameSink) else "bytes"
+            result[schema_name] = {"schema": schema, key: output}
+        return result
+
     result = {}
     shared_data = {}
 
     # Precompute reverse lookup dictionary for mapped columns
-    reverse_mapped_columns = {tgt: src for src, tgt in mapped_source_and_target_columns.items()} if mapped_source_and_target_columns else {}
+    reverse_mapped_columns = build_reverse_mapped_columns(mapped_source_and_target_columns)
+    mapping_options = build_mapping_options(mapped_source_and_target_columns)
 
     for schema_name, schema_info in schemas.items():
         print(f"Generating data for schema: {schema_name}")
@@ -106,25 +329,14 @@ def generate_combined_data(schemas, num_rows, mapped_source_and_target_columns=N
             field_name = field['name']
             field_type = field['type']
 
-            if mapped_source_and_target_columns and field_name in mapped_source_and_target_columns.values():
-                generated_data = handle_mapped_columns(field_name, field_type, num_rows, match_fraction, reverse_mapped_columns, shared_data)
-                if generated_data:
+            if field_name in reverse_mapped_columns:
+                generated_data = handle_mapped_columns(field_name, field_type, num_rows, match_fraction, reverse_mapped_columns, shared_data,
+                                                       shuffle=shuffle_matched, **mapping_options.get(field_name, {}))
+                if generated_data is not None:
                     data[field_name] = generated_data
                     continue
 
-            if field_type == 'string':
-                generated_data = [
-                    ''.join(random.choices(string.ascii_letters + string.digits, k=10)) for _ in range(num_rows)
-                ]
-            elif field_type == 'integer':
-                generated_data = [random.randint(0, 100) for _ in range(num_rows)]
-            elif field_type == 'float':
-                generated_data = [random.uniform(0.0, 100.0) for _ in range(num_rows)]
-            elif field_type == 'boolean':
-                generated_data = [random.choice([True, False]) for _ in range(num_rows)]
-            else:
-                raise ValueError(f"Unsupported field type: {field_type}")
-
+            generated_data = generate_python_column(field_type, num_rows)
             data[field_name] = generated_data
 
             # Store shared data for mapped columns
@@ -139,6 +351,220 @@ def generate_combined_data(schemas, num_rows, mapped_source_and_target_columns=N
 
     return result
 
+def block_rng(seed, block_id, column_index):
+    """
+    Build the Generator for one column of one block.
+
+    Every (block, column) pair gets its own child of the schema seed, keyed by
+    position rather than by spawn order, so any block or column can be
+    regenerated on its own and the output does not depend on which worker ran it.
+
+    :param seed: Seed of the schema.
+    :param block_id: Index of the block.
+    :param column_index: Index of the field in the schema.
+    :return: numpy.random.Generator for that column of that block.
+    """
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(block_id, column_index)))
+
+
+def resolve_block_sources(schemas, mapped_source_and_target_columns):
+    """
+    Find, for every mapped target column, the schema seed and field position of each of its source columns.
+
+    :param schemas: Dictionary with schema names as keys and dictionaries containing schema and seed as values.
+    :param mapped_source_and_target_columns: Dictionary mapping columns between source and target data.
+    :return: Dictionary of target column name to a list of (source seed, source column index, source FieldGenerator).
+    """
+    locations = {}
+    for schema_info in schemas.values():
+        for column_index, generator in enumerate(compile_schema(schema_info['schema'])):
+            locations[generator.name] = (schema_info['seed'], column_index, generator)
+    reverse_mapped_columns = build_reverse_mapped_columns(mapped_source_and_target_columns)
+    sources = {tgt: [locations[src] for src in srcs if src in locations] for tgt, srcs in reverse_mapped_columns.items()}
+    return {tgt: locations for tgt, locations in sources.items() if locations}
+
+
+def draw_block_columns(generators, seed, block_id, block_start, block_rows, sources=None, match_count=0,
+                       shuffle=False, mapping_options=None):
+    """
+    Draw the column buffers of one block of rows of a schema.
+
+    Mapped target columns regenerate the matching blocks of their source
+    columns and pass them to `build_mapped_column`, with the rows whose global
+    position is below `match_count` as the matched rows of the block.
+
+    :param generators: Result of `compile_schema` for the schema.
+    :param seed: Seed of the schema.
+    :param block_id: Index of the block.
+    :param block_start: Global index of the first row of the block.
+    :param block_rows: Number of rows in the block.
+    :param sources: Result of `resolve_block_sources`, or None if nothing is mapped.
+    :param match_count: Number of leading rows, over the whole table, where mapped columns match their source.
+    :param shuffle: Scatter matched rows within the block instead of putting them first.
+    :param mapping_options: Result of `build_mapping_options`, applied within the block.
+    :return: Dictionary of column name to a (values, null mask or None) tuple of NumPy arrays.
+    """
+    sources = sources or {}
+    mapping_options = mapping_options or {}
+    matched = min(max(match_count - block_start, 0), block_rows)
+    columns = {}
+    for column_index, generator in enumerate(generators):
+        rng = block_rng(seed, block_id, column_index)
+        if generator.name not in sources:
+            values = generator.draw(block_rows, rng, block_start)
+        else:
+            source_values = [
+                source_generator.draw(block_rows, block_rng(source_seed, block_id, source_index), block_start)
+                for source_seed, source_index, source_generator in sources[generator.name]
+            ]
+            values = build_mapped_column(generator, block_rows, matched, source_values, rng, shuffle,
+                                         offset=block_start, **mapping_options.get(generator.name, {}))
+        columns[generator.name] = (values, generator.null_mask(block_rows, rng))
+    return columns
+
+
+def generate_block(generators, seed, block_id, block_start, block_rows, sources=None, match_count=0, fmt=None,
+                   shuffle=False, mapping_options=None):
+    """
+    Generate one block of rows of a schema with `draw_block_columns`, optionally encoded for an output format.
+
+    :param fmt: Output format to encode the block for, or None to return the DataFrame.
+    :return: DataFrame of the block, or its encoded payload when `fmt` is given.
+    """
+    columns = draw_block_columns(generators, seed, block_id, block_start, block_rows, sources, match_count, shuffle,
+                                 mapping_options)
+    block_df = pd.DataFrame({name: apply_nulls(values, mask) for name, (values, mask) in columns.items()})
+    if fmt is None:
+        return block_df
+    if fmt == 'csv':
+        return block_df.to_csv(index=False, header=block_id == 0).encode()
+    return encode_columnar(fmt, block_df)
+
+
+def generate_to(sink, schema, num_rows, chunk_rows=BLOCK_ROWS, seed=None, sources=None, match_count=0,
+                shuffle=False, mapping_options=None):
+    """
+    Generate synthetic data for a schema straight into a sink, one chunk of column buffers at a time.
+
+    The schema is compiled once, and chunk `i` draws column `j` from
+    `block_rng(seed, i, j)`, so the data matches `generate_synthetic_data` and
+    `generate_combined_data_chunked` for the same seed and `chunk_rows`. Only
+    one chunk is held in memory unless the sink keeps it.
+
+    :param sink: Object with `write(chunk_id, columns)` and `close()`, see `synthetic_sinks`.
+        `columns` maps each field name to a (values, null mask or None) tuple of NumPy arrays.
+    :param schema: JSON schema defining the structure of the data.
+    :param num_rows: Number of rows to generate.
+    :param chunk_rows: Number of rows per chunk. Default is BLOCK_ROWS.
+    :param seed: Seed for random number generator to ensure reproducibility. Default is 42.
+    :param sources: Result of `resolve_block_sources` for mapped columns, see `draw_block_columns`. Default is None.
+    :param match_count: Number of leading rows where mapped columns match their source. Default is 0.
+    :param shuffle: Scatter matched rows within each chunk instead of putting them first. Default is False.
+    :param mapping_options: Result of `build_mapping_options`. Default is None.
+    :return: Whatever `sink.close()` returns, e.g. the DataFrame or the number of bytes written.
+    """
+    if seed is None:
+        seed = 42  # Default seed value for reproducibility
+    generators = compile_schema(schema)
+    try:
+        # an empty table still gets one empty chunk, so sinks see its columns
+        for block_id, block_start in enumerate(range(0, max(num_rows, 1), chunk_rows)):
+            block_rows = min(chunk_rows, num_rows - block_start)
+            sink.write(block_id, draw_block_columns(generators, seed, block_id, block_start, block_rows, sources,
+                                                    match_count, shuffle, mapping_options))
+    finally:
+        result = sink.close()
+    return result
+
+
+def iter_block_results(executor, tasks, max_pending):
+    """
+    Submit block tasks to `executor` and yield their results in block order,
+    keeping at most `max_pending` blocks in flight.
+
+    :param executor: concurrent.futures executor to run `generate_block` on.
+    :param tasks: Iterable of `generate_block` argument tuples.
+    :param max_pending: Maximum number of submitted but not yet consumed blocks.
+    :return: Generator of block results.
+    """
+    pending = deque()
+    for task in tasks:
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+        pending.append(executor.submit(generate_block, *task))
+    while pending:
+        yield pending.popleft().result()
+
+
+def generate_combined_data_chunked(schemas, num_rows, mapped_source_and_target_columns=None, match_fraction=0.5,
+                                   block_rows=BLOCK_ROWS, num_workers=None, output_dir=None, fmt='csv',
+                                   shuffle_matched=False):
+    """
+    Generate synthetic data for multiple schemas in fixed-size blocks on a process pool.
+
+    Rows are cut into blocks of `block_rows` and every column of every block is
+    drawn from its own child `SeedSequence` of the schema seed (see `block_rng`).
+    The tables therefore depend only on the schemas, seeds, `num_rows` and
+    `block_rows`, never on `num_workers`, and match those of the 'numpy' engine
+    of `generate_combined_data` with `chunk_rows=block_rows`. Mapped columns are
+    built block by block: integer and boolean values of unmatched rows are
+    sampled from the source blocks, and `shuffle_matched`, duplicate ratios and
+    key skew apply within each block.
+
+    :param schemas: Dictionary with schema names as keys and dictionaries containing schema and seed as values.
+    :param num_rows: Number of rows to generate.
+    :param mapped_source_and_target_columns: Dictionary mapping columns between source and target data.
+    :param match_fraction: Fraction of rows where mapped columns should have matching data. Default is 0.5.
+    :param block_rows: Number of rows per block. Default is BLOCK_ROWS.
+    :param num_workers: Number of worker processes. Default is the CPU count.
+    :param output_dir: Directory to stream each schema to as `<schema name>.<fmt>`.
+        When None, the blocks are concatenated into DataFrames in memory.
+    :param fmt: Output format when streaming, one of chunk_formats.FORMATS. Default is 'csv'.
+    :param shuffle_matched: Scatter matched rows over mapped columns instead of putting them first. Default is False.
+    :return: Dictionary with schema names as keys and dictionaries containing the schema
+        and either the DataFrame ('table') or the output file path and its size in bytes
+        ('path', 'bytes') as values.
+    """
+    if output_dir is not None:
+        check_format(fmt)
+        os.makedirs(output_dir, exist_ok=True)
+    num_workers = num_workers or os.cpu_count()
+    sources = resolve_block_sources(schemas, mapped_source_and_target_columns)
+    mapping_options = build_mapping_options(mapped_source_and_target_columns)
+    match_count = int(num_rows * match_fraction)
+    block_starts = range(0, num_rows, block_rows)
+
+    result = {}
+    with concurrent.futures.ProcessPoolExecutor(max_workers=num_workers) as executor:
+        for schema_name, schema_info in schemas.items():
+            print(f"Generating data for schema: {schema_name}")
+            schema = schema_info['schema']
+            generators = compile_schema(schema)
+            schema_sources = {name: source for name, source in sources.items()
+                              if any(generator.name == name for generator in generators)}
+            tasks = (
+                (generators, schema_info['seed'], block_id, block_start, min(block_rows, num_rows - block_start),
+                 schema_sources, match_count, None if output_dir is None else fmt, shuffle_matched, mapping_options)
+                for block_id, block_start in enumerate(block_starts)
+            )
+            blocks = iter_block_results(executor, tasks, max_pending=2 * num_workers)
+            if output_dir is None:
+                table = pd.concat(list(blocks), ignore_index=True) if num_rows else generate_synthetic_data(schema, 0, seed=schema_info['seed'])
+                result[schema_name] = {"schema": schema, "table": table}
+            else:
+                output_file = os.path.join(output_dir, f"{schema_name}.{fmt}")
+                if os.path.exists(output_file):
+                    os.remove(output_file)
+                sink = open_chunk_sink(fmt, output_file)
+                try:
+                    for block_id, payload in enumerate(blocks):
+                        sink.write(block_id, payload)
+                finally:
+                    size = sink.close()
+                result[schema_name] = {"schema": schema, "path": output_file, "bytes": size}
+            print(f"Generated {num_rows} rows for schema: {schema_name}")
+    return result
+
 def create_sample_source_schema():
     """
     Create a sample source JSON schema.
@@ -169,32 +595,63 @@ def create_sample_target_schema():
         ]
     }
 
-# Example usage of the sample schemas
-if __name__ == "__main__":
-    source_schema = create_sample_source_schema()
-    target_schema = create_sample_target_schema()
-    num_rows = 10
+def print_sample_combined_data(num_rows=10):
+    """
+    Print matched source and target tables generated from the sample schemas.
 
-    # Generate synthetic data using the sample schemas
+    :param num_rows: Number of rows per table.
+    """
     schemas = {
-        "source": {"schema": source_schema, "seed": 7},
-        "target": {"schema": target_schema, "seed": 13}
+        "source": {"schema": create_sample_source_schema(), "seed": 7},
+        "target": {"schema": create_sample_target_schema(), "seed": 13}
     }
     mapped_source_and_target_columns={"source_id": "target_id"}
     combined_data = generate_combined_data(
         schemas, num_rows, mapped_source_and_target_columns=mapped_source_and_target_columns
     )
 
-    source_data = combined_data["source"]["table"]
-    target_data = combined_data["target"]["table"]
-
     print("Source Data:")
-    print(source_data)
+    print(combined_data["source"]["table"])
 
     print("Target Data:")
-    print(target_data)
+    print(combined_data["target"]["table"])
 
 
+def get_args(argv=None, prog=None):
+    """
+    Parse the command-line arguments.
 
+    :param argv: Arguments to parse, defaults to `sys.argv[1:]`.
+    :param prog: Program name shown in the usage.
+    :return: argparse.Namespace with schema, num_rows, seed, chunk_rows, output and demo.
+    """
+    parser = argparse.ArgumentParser(prog=prog, description='Generate synthetic data from a JSON schema.')
+    parser.add_argument('--schema', help=' Enter JSON schema file (defaults to the sample source schema)')
+    parser.add_argument('--num_rows', type=int, default=10, help=' Enter number of rows')
+    parser.add_argument('--seed', type=int, help=' Enter seed')
+    parser.add_argument('--chunk_rows', type=int, default=BLOCK_ROWS, help=' Enter rows per written chunk')
+    parser.add_argument(
+        '--output', help=' Enter output file: .csv, .parquet, .npz, .db or .sqlite (prints the table when omitted)'
+    )
+    parser.add_argument('--demo', action='store_true', help=' Print matched tables from the sample schemas')
+    return parser.parse_args(argv)
 
 
+def cli(argv=None, prog=None):
+    """
+    Generate synthetic data from command-line arguments, see `get_args`.
+    """
+    args = get_args(argv, prog)
+    if args.demo:
+        print_sample_combined_data(args.num_rows)
+        return
+    schema = load_schema_from_json(args.schema) if args.schema else create_sample_source_schema()
+    if args.output:
+        size = generate_to(open_sink(args.output), schema, args.num_rows, chunk_rows=args.chunk_rows, seed=args.seed)
+        print(f'Wrote {args.num_rows} rows ({size} bytes) to {args.output}')
+    else:
+        print(generate_synthetic_data(schema, args.num_rows, seed=args.seed))
+
+
+if __name__ == "__main__":
+    cli()
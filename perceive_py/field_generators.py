@@ -0,0 +1,454 @@
+# Vectorized per-field generators for synthetic data, compiled once per schema
+import functools
+import string
+
+from perceive_py.utils import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+STRING_ALPHABET = string.ascii_letters + string.digits
+STRING_LENGTH = 10
+ASCII_HEX_DIGITS = b'0123456789abcdef'
+UUID_HEX_POSITIONS = [i for i in range(36) if i not in (8, 13, 18, 23)]
+ZIPF_TABLE_KEYS = 1 << 22  # larger key spaces use the continuous inverse CDF
+GOLDEN_RATIO = (5 ** 0.5 - 1) / 2
+
+FIELD_GENERATORS = {}
+
+
+@functools.cache
+def ascii_alphabet_pairs():
+    """
+    Every two-character string of `STRING_ALPHABET` as one little-endian uint16,
+    so strings are drawn two characters per random number. Built on first use,
+    so importing this module does not load numpy.
+
+    :return: uint16 numpy.ndarray of len(STRING_ALPHABET) ** 2 pairs.
+    """
+    alphabet = np.frombuffer(STRING_ALPHABET.encode('ascii'), dtype=np.uint8).astype(np.uint16)
+    return (alphabet[:, None] | alphabet[None, :] << 8).ravel()
+
+
+def register_field_type(field_type):
+    """
+    Class decorator that registers a FieldGenerator subclass for a schema field type.
+
+    :param field_type: Value of the 'type' key the class handles.
+    :return: The decorator.
+    """
+    def register(cls):
+        FIELD_GENERATORS[field_type] = cls
+        cls.field_type = field_type
+        return cls
+    return register
+
+
+class FieldGenerator:
+    """
+    Base class for compiled field generators.
+
+    The field spec is parsed and validated once in `__init__`; `draw` then
+    produces a whole column with vectorized NumPy calls. Every field accepts a
+    'nullable' fraction of rows to blank out.
+    """
+
+    field_type = None
+
+    def __init__(self, field):
+        self.name = field.get('name')
+        self.nullable = float(field.get('nullable', 0.0))
+        if not 0.0 <= self.nullable <= 1.0:
+            raise ValueError(f"nullable must be a fraction between 0 and 1, got {self.nullable} for field {self.name}")
+
+    def draw(self, num_rows, rng, offset=0):
+        """
+        Draw the non-null values of the column.
+
+        :param num_rows: Number of rows to generate.
+        :param rng: numpy.random.Generator to draw from.
+        :param offset: Position of the first row in the whole table, for position-dependent distributions.
+        :return: NumPy array of generated values.
+        """
+        raise NotImplementedError
+
+    def null_mask(self, num_rows, rng):
+        """
+        Draw which rows are null.
+
+        :param num_rows: Number of rows to generate.
+        :param rng: numpy.random.Generator to draw from.
+        :return: Boolean NumPy array, or None if the field is not nullable.
+        """
+        if not self.nullable:
+            return None
+        return rng.random(num_rows) < self.nullable
+
+    def column(self, num_rows, rng, offset=0):
+        """
+        Draw the values and the null mask and combine them with `apply_nulls`.
+
+        :param num_rows: Number of rows to generate.
+        :param rng: numpy.random.Generator to draw from.
+        :param offset: Position of the first row in the whole table, for position-dependent distributions.
+        :return: NumPy or pandas array for the column.
+        """
+        values = self.draw(num_rows, rng, offset)
+        return apply_nulls(values, self.null_mask(num_rows, rng))
+
+
+def check_range(field, low, high):
+    if low > high:
+        raise ValueError(f"min must not be greater than max for field {field.get('name')}")
+    return low, high
+
+
+def zipf_ranks(num_rows, num_keys, exponent, rng):
+    """
+    Draw 0-based ranks from a Zipf distribution bounded to `num_keys` keys,
+    where rank k is drawn with probability proportional to 1 / (k + 1) ** exponent.
+
+    Small key spaces invert the exact CDF with `searchsorted`; larger ones
+    invert the continuous approximation, so no per-key table is built.
+
+    :param num_rows: Number of ranks to draw.
+    :param num_keys: Number of distinct keys.
+    :param exponent: Skew exponent; 0 is uniform, larger is more skewed.
+    :param rng: numpy.random.Generator to draw from.
+    :return: int64 NumPy array of ranks in [0, num_keys).
+    """
+    uniforms = rng.random(num_rows)
+    if num_keys <= ZIPF_TABLE_KEYS:
+        cdf = np.cumsum(np.arange(1, num_keys + 1, dtype=float) ** -exponent)
+        cdf /= cdf[-1]
+        return np.minimum(np.searchsorted(cdf, uniforms, side='right'), num_keys - 1)
+    if exponent == 1:
+        ranks = np.exp(uniforms * np.log(num_keys + 1))
+    else:
+        ranks = (1 + uniforms * ((num_keys + 1) ** (1 - exponent) - 1)) ** (1 / (1 - exponent))
+    return np.minimum(ranks.astype(np.int64) - 1, num_keys - 1)
+
+
+class NumericField(FieldGenerator):
+    """
+    Base class for numbers between 'min' and 'max' with a 'distribution'.
+
+    - uniform (default): uniform over the range.
+    - normal: 'mean' and 'std' (defaults: the middle of the range and a sixth
+      of its width), clipped to the range.
+    """
+
+    distributions = ('uniform', 'normal')
+    default_min = 0
+    default_max = 100
+
+    def __init__(self, field):
+        super().__init__(field)
+        self.low, self.high = check_range(
+            field, self.cast(field.get('min', self.default_min)), self.cast(field.get('max', self.default_max))
+        )
+        self.distribution = field.get('distribution', 'uniform')
+        if self.distribution not in self.distributions:
+            raise ValueError(f"Unsupported distribution for {self.field_type} field {self.name}: {self.distribution}")
+        self.mean = float(field.get('mean', (self.low + self.high) / 2))
+        self.std = float(field.get('std', (self.high - self.low) / 6))
+
+    def draw_normal(self, num_rows, rng):
+        return np.clip(rng.normal(self.mean, self.std, size=num_rows), self.low, self.high)
+
+
+@register_field_type('integer')
+class IntegerField(NumericField):
+    """
+    Integers between 'min' and 'max' inclusive (defaults 0 and 100). Besides
+    uniform and normal, the 'distribution' can be:
+
+    - zipf: 'exponent' (default 1.1) skew over the range, 'min' being the hottest key.
+    - sequential: 'min', 'min' + 'step', ... by row position (default step 1), ignoring 'max'.
+    - unique: a distinct value of the range per row position, from the
+      bijection i -> min + (i * stride) mod range_size, so blocks generated
+      separately never collide. The range must hold every row and be below 2 ** 32.
+    """
+
+    distributions = ('uniform', 'normal', 'zipf', 'sequential', 'unique')
+    cast = staticmethod(int)
+
+    def __init__(self, field):
+        super().__init__(field)
+        self.exponent = float(field.get('exponent', 1.1))
+        self.step = int(field.get('step', 1))
+        self.range_size = self.high - self.low + 1
+        if self.distribution == 'unique':
+            if self.range_size >= 1 << 32:
+                raise ValueError(f"unique integer field {self.name} needs a range smaller than 2 ** 32")
+            stride = max(int(self.range_size * GOLDEN_RATIO), 1)
+            while np.gcd(stride, self.range_size) != 1:
+                stride += 1
+            self.stride = stride
+
+    def draw(self, num_rows, rng, offset=0):
+        if self.distribution == 'normal':
+            return np.rint(self.draw_normal(num_rows, rng)).astype(np.int64)
+        if self.distribution == 'zipf':
+            return self.low + zipf_ranks(num_rows, self.range_size, self.exponent, rng)
+        if self.distribution == 'sequential':
+            return self.low + np.arange(offset, offset + num_rows, dtype=np.int64) * self.step
+        if self.distribution == 'unique':
+            if offset + num_rows > self.range_size:
+                raise ValueError(f"unique integer field {self.name} has only {self.range_size} values for {offset + num_rows} rows")
+            positions = np.arange(offset, offset + num_rows, dtype=np.uint64)
+            return self.low + (positions * np.uint64(self.stride) % np.uint64(self.range_size)).astype(np.int64)
+        return rng.integers(self.low, self.high, size=num_rows, endpoint=True)
+
+
+@register_field_type('float')
+class FloatField(NumericField):
+    """
+    Floats between 'min' and 'max' (defaults 0.0 and 100.0), uniform or normal.
+    """
+
+    cast = staticmethod(float)
+
+    def draw(self, num_rows, rng, offset=0):
+        if self.distribution == 'normal':
+            return self.draw_normal(num_rows, rng)
+        return rng.uniform(self.low, self.high, size=num_rows)
+
+
+@register_field_type('boolean')
+class BooleanField(FieldGenerator):
+    """
+    Fair coin flips.
+    """
+
+    def draw(self, num_rows, rng, offset=0):
+        return rng.integers(0, 2, size=num_rows, dtype=np.uint8).astype(bool)
+
+
+@register_field_type('string')
+class StringField(FieldGenerator):
+    """
+    Alphanumeric strings of 'length' characters (default 10), or of a uniform
+    length between 'min_length' and 'max_length'.
+
+    Strings are drawn as a (num_rows, max_length) matrix of ASCII bytes, two
+    characters per draw from `ascii_alphabet_pairs()`, and viewed as a fixed-width
+    bytes ('S') array, so no per-cell Python work happens; `apply_nulls` turns it
+    into an Arrow-backed string column. Shorter strings are padded with NUL
+    bytes, which NumPy strips on access.
+    """
+
+    def __init__(self, field):
+        super().__init__(field)
+        length = int(field.get('length', STRING_LENGTH))
+        self.min_length, self.max_length = check_range(
+            field, int(field.get('min_length', length)), int(field.get('max_length', length))
+        )
+        if self.min_length < 0:
+            raise ValueError(f"String lengths must not be negative for field {self.name}")
+
+    def draw(self, num_rows, rng, offset=0):
+        if not self.max_length:
+            return np.zeros(num_rows, dtype='S1')
+        alphabet_pairs = ascii_alphabet_pairs()
+        pairs = rng.integers(0, len(alphabet_pairs), size=(num_rows, -(-self.max_length // 2)), dtype=np.uint16)
+        chars = alphabet_pairs[pairs].view(np.uint8)
+        if self.max_length % 2:
+            chars = np.ascontiguousarray(chars[:, :self.max_length])
+        if self.min_length < self.max_length:
+            lengths = rng.integers(self.min_length, self.max_length, size=num_rows, endpoint=True)
+            chars[np.arange(self.max_length) >= lengths[:, None]] = 0
+        return chars.view(f'S{self.max_length}').ravel()
+
+
+@register_field_type('datetime')
+class DatetimeField(FieldGenerator):
+    """
+    Uniform datetime64 values between 'min' and 'max' inclusive, in steps of `unit`.
+    """
+
+    unit = 's'
+    default_min = '2000-01-01T00:00:00'
+    default_max = '2030-12-31T23:59:59'
+
+    def __init__(self, field):
+        super().__init__(field)
+        self.low, self.high = check_range(
+            field,
+            np.datetime64(field.get('min', self.default_min), self.unit),
+            np.datetime64(field.get('max', self.default_max), self.unit),
+        )
+
+    def draw(self, num_rows, rng, offset=0):
+        span = int((self.high - self.low) / np.timedelta64(1, self.unit))
+        return self.low + rng.integers(0, span, size=num_rows, endpoint=True).astype(f'timedelta64[{self.unit}]')
+
+
+@register_field_type('date')
+class DateField(DatetimeField):
+    """
+    Uniform calendar dates between 'min' and 'max' inclusive.
+    """
+
+    unit = 'D'
+    default_min = '2000-01-01'
+    default_max = '2030-12-31'
+
+
+@register_field_type('category')
+class CategoryField(FieldGenerator):
+    """
+    Values picked from 'values', uniformly or with the relative 'weights'.
+    """
+
+    def __init__(self, field):
+        super().__init__(field)
+        self.values = np.asarray(field.get('values', []))
+        if not len(self.values):
+            raise ValueError(f"Category field {self.name} needs a non-empty 'values' list")
+        weights = field.get('weights')
+        self.probabilities = None
+        if weights is not None:
+            weights = np.asarray(weights, dtype=float)
+            if weights.shape != self.values.shape or (weights < 0).any() or not weights.sum() > 0:
+                raise ValueError(f"Category field {self.name} needs one non-negative weight per value")
+            self.probabilities = weights / weights.sum()
+
+    def draw(self, num_rows, rng, offset=0):
+        if self.probabilities is None:
+            codes = rng.integers(0, len(self.values), size=num_rows)
+        else:
+            codes = rng.choice(len(self.values), size=num_rows, p=self.probabilities)
+        return self.values[codes]
+
+
+@register_field_type('uuid')
+class UuidField(FieldGenerator):
+    """
+    Random (version 4) UUID strings, built from a (num_rows, 16) byte matrix
+    whose nibbles are mapped to ASCII hex digits in one indexing step.
+    """
+
+    def draw(self, num_rows, rng, offset=0):
+        raw = rng.integers(0, 256, size=(num_rows, 16), dtype=np.uint8)
+        raw[:, 6] = raw[:, 6] & 0x0F | 0x40
+        raw[:, 8] = raw[:, 8] & 0x3F | 0x80
+        nibbles = np.empty((num_rows, 32), dtype=np.uint8)
+        nibbles[:, 0::2] = raw >> 4
+        nibbles[:, 1::2] = raw & 0x0F
+        chars = np.full((num_rows, 36), ord('-'), dtype=np.uint8)
+        chars[:, UUID_HEX_POSITIONS] = np.frombuffer(ASCII_HEX_DIGITS, dtype=np.uint8)[nibbles]
+        return chars.view('S36').ravel()
+
+
+def arrow_strings(values, mask=None):
+    """
+    Build a pyarrow string array from a fixed-width NumPy string array without
+    creating a Python object per cell.
+
+    ASCII bytes ('S') arrays, as drawn by the string and uuid fields, become the
+    Arrow data buffer directly, with the trailing NUL padding cut off; unicode
+    ('U') arrays are converted by pyarrow.
+
+    :param values: NumPy 'S' array of ASCII strings, or 'U' array.
+    :param mask: Boolean NumPy array of null rows, or None.
+    :return: pyarrow.StringArray, or LargeStringArray above 2 GiB of characters.
+    :raises ImportError: If pyarrow is not installed.
+    """
+    import pyarrow as pa
+
+    if values.dtype.kind == 'U':
+        return pa.array(values, mask=mask, type=pa.string())
+    num_rows, width = len(values), values.dtype.itemsize
+    chars = np.ascontiguousarray(values).view(np.uint8).reshape(num_rows, width)
+    filled = chars != 0
+    if filled.all():
+        data = chars.ravel()
+        ends = np.arange(1, num_rows + 1, dtype=np.int64) * width
+    else:
+        # NumPy strips trailing NULs only, so a string ends after its last non-NUL byte
+        lengths = np.where(filled.any(axis=1), width - filled[:, ::-1].argmax(axis=1), 0)
+        data = chars[np.arange(width) < lengths[:, None]]
+        ends = np.cumsum(lengths, dtype=np.int64)
+    large = len(data) > np.iinfo(np.int32).max
+    offsets = np.zeros(num_rows + 1, dtype=np.int64 if large else np.int32)
+    offsets[1:] = ends
+    validity, null_count = None, 0
+    if mask is not None and mask.any():
+        validity = pa.py_buffer(np.packbits(~mask, bitorder='little'))
+        null_count = int(mask.sum())
+    array_type = pa.LargeStringArray if large else pa.StringArray
+    return array_type.from_buffers(num_rows, pa.py_buffer(offsets), pa.py_buffer(data), validity, null_count)
+
+
+def string_column(values, mask=None):
+    """
+    Turn a NumPy string array into a pandas column: Arrow-backed `string[pyarrow]`
+    when pyarrow is installed (see `arrow_strings`), else an object array of str
+    holding None for nulls.
+
+    :param values: NumPy 'S' array of ASCII strings, or 'U' array.
+    :param mask: Boolean NumPy array of null rows, or None.
+    :return: pandas ArrowStringArray or NumPy object array.
+    """
+    try:
+        return pd.arrays.ArrowStringArray(arrow_strings(values, mask))
+    except ImportError:
+        column = values.astype(str).astype(object)
+        if mask is not None:
+            column[mask] = None
+        return column
+
+
+def apply_nulls(values, mask):
+    """
+    Blank out the rows of `values` where `mask` is True.
+
+    Floats get NaN and dates get NaT; integers and booleans become pandas
+    nullable arrays so they keep their type; strings become a `string_column`;
+    everything else becomes an object array holding None.
+
+    :param values: NumPy array of generated values.
+    :param mask: Boolean NumPy array, or None for no nulls.
+    :return: NumPy or pandas array for the column.
+    """
+    kind = values.dtype.kind
+    if kind in 'SU':
+        return string_column(values, mask)
+    if mask is None or not mask.any():
+        return values
+    if kind == 'f':
+        return np.where(mask, np.nan, values)
+    if kind == 'M':
+        return np.where(mask, np.datetime64('NaT'), values)
+    if kind in 'iu':
+        return pd.arrays.IntegerArray(values, mask)
+    if kind == 'b':
+        return pd.arrays.BooleanArray(values, mask)
+    column = values.astype(object)
+    column[mask] = None
+    return column
+
+
+def compile_field(field):
+    """
+    Build the generator for one schema field.
+
+    :param field: Field spec with at least a 'type' key.
+    :return: FieldGenerator for the field.
+    """
+    generator_class = FIELD_GENERATORS.get(field.get('type'))
+    if generator_class is None:
+        raise ValueError(f"Unsupported field type: {field.get('type')}")
+    return generator_class(field)
+
+
+def compile_schema(schema):
+    """
+    Build the generators for every field of a schema, so type dispatch and
+    validation happen once per schema instead of once per column draw.
+
+    :param schema: JSON schema defining the structure of the data.
+    :return: List of FieldGenerator, in field order.
+    """
+    return [compile_field(field) for field in schema['fields']]
@@ -0,0 +1,154 @@
+"""
+On-disk cache for the flag downloaders.
+
+Flag bodies are stored once per content hash under `<DEST_DIR>/.flag_cache/objects`,
+and every country code gets a small JSON metadata file with the URL, ETag,
+Last-Modified, SHA-256 of the body and the time it was last validated:
+
+- within `ttl` seconds of the last validation the cached body is used without
+  touching the network;
+- after that a conditional request (`If-None-Match` / `If-Modified-Since`) is
+  sent and a 304 only refreshes the metadata.
+
+Every file is written with `utils.atomic_write`, so parallel downloaders can
+share the cache.
+"""
+
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+from perceive_py import sequential_downloads
+from perceive_py.sequential_downloads import main, save_flag
+from perceive_py.utils import atomic_write
+
+DEFAULT_TTL = 24 * 60 * 60
+CACHE_DIR_NAME = ".flag_cache"
+
+
+class FlagCache:
+    """
+    Content-addressed flag cache. Used as a context manager it shares one
+    pooled `httpx.Client`, created only once a request is actually needed.
+
+    Args:
+        cache_dir (Path, optional): Where metadata and objects live. Defaults to `DEST_DIR/.flag_cache`.
+        ttl (float, optional): Seconds a validated entry is used without a request. Defaults to `DEFAULT_TTL`.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, ttl: float = DEFAULT_TTL):
+        self.cache_dir = Path(cache_dir or sequential_downloads.DEST_DIR / CACHE_DIR_NAME)
+        self.ttl = ttl
+        self.counters = {"fresh": 0, "revalidated": 0, "fetched": 0}
+        self._client = None
+        (self.cache_dir / "objects").mkdir(parents=True, exist_ok=True)
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            self._client = httpx.Client(timeout=6.1, follow_redirects=True)
+        return self._client
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def meta_path(self, cc: str) -> Path:
+        return self.cache_dir / f"{cc.lower()}.json"
+
+    def object_path(self, digest: str) -> Path:
+        return self.cache_dir / "objects" / digest
+
+    def load(self, cc: str) -> tuple[Optional[dict], Optional[bytes]]:
+        """
+        Reads the metadata and body cached for `cc`.
+
+        Returns:
+            tuple: The metadata dict and body, or `(None, None)` when there is no
+            usable entry, including when the body no longer matches its hash.
+        """
+        try:
+            meta = json.loads(self.meta_path(cc).read_text())
+            body = self.object_path(meta["sha256"]).read_bytes()
+        except (OSError, ValueError, KeyError):
+            return None, None
+        if hashlib.sha256(body).hexdigest() != meta["sha256"]:
+            return None, None
+        return meta, body
+
+    def store(self, cc: str, url: str, resp: httpx.Response, body: bytes) -> dict:
+        digest = hashlib.sha256(body).hexdigest()
+        object_path = self.object_path(digest)
+        if not object_path.exists():
+            atomic_write(object_path, body)
+        meta = {
+            "url": url,
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "sha256": digest,
+            "validated_at": time.time(),
+        }
+        atomic_write(self.meta_path(cc), json.dumps(meta).encode())
+        return meta
+
+    def get_flag(self, cc: str) -> tuple[bytes, bool]:
+        """
+        Returns the flag for `cc`, from the cache when possible.
+
+        Args:
+            cc (str): The country code.
+
+        Returns:
+            tuple: The body and whether it was downloaded, i.e. changed since the cached copy.
+        """
+        url = f"{sequential_downloads.BASE_URL}/{cc}/{cc}.gif".lower()
+        meta, body = self.load(cc)
+        if meta is not None and meta["url"] == url and time.time() - meta["validated_at"] < self.ttl:
+            self.counters["fresh"] += 1
+            return body, False
+        headers = {}
+        if meta is not None and meta["url"] == url:
+            if meta["etag"]:
+                headers["If-None-Match"] = meta["etag"]
+            if meta["last_modified"]:
+                headers["If-Modified-Since"] = meta["last_modified"]
+        resp = self.client.get(url, headers=headers)
+        if resp.status_code == 304 and headers:
+            self.counters["revalidated"] += 1
+            meta["validated_at"] = time.time()
+            atomic_write(self.meta_path(cc), json.dumps(meta).encode())
+            return body, False
+        resp.raise_for_status()
+        self.counters["fetched"] += 1
+        self.store(cc, url, resp, resp.content)
+        return resp.content, True
+
+
+def get_flag(cc: str) -> bytes:
+    with FlagCache() as cache:
+        return cache.get_flag(cc)[0]
+
+
+def download_many(cc_list: list[str], ttl: float = DEFAULT_TTL) -> int:
+    with FlagCache(ttl=ttl) as cache:
+        for cc in sorted(cc_list):
+            image, changed = cache.get_flag(cc)
+            if changed or not (sequential_downloads.DEST_DIR / f"{cc}.gif").exists():
+                save_flag(image, f"{cc}.gif")
+            print(cc, end=" ", flush=True)
+    return len(cc_list)
+
+
+if __name__ == "__main__":
+    main(download_many)
@@ -0,0 +1,51 @@
+import asyncio
+import importlib.util
+import httpx
+
+from perceive_py import sequential_downloads
+from perceive_py.sequential_downloads import main, save_flag
+
+MAX_CONCURRENCY = 10
+
+
+def http2_available() -> bool:
+    # httpx only speaks HTTP/2 when the optional h2 package is installed
+    return importlib.util.find_spec("h2") is not None
+
+
+def make_client(concurrency: int = MAX_CONCURRENCY) -> httpx.AsyncClient:
+    # one pooled client per run: connections are kept alive and reused across flags
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    return httpx.AsyncClient(http2=http2_available(), limits=limits, timeout=6.1, follow_redirects=True)
+
+
+async def get_flag(client: httpx.AsyncClient, cc: str) -> bytes:
+    url = f"{sequential_downloads.BASE_URL}/{cc}/{cc}.gif".lower()
+    resp = await client.get(url)
+    resp.raise_for_status()
+    return resp.content
+
+
+async def download_one(client: httpx.AsyncClient, cc: str, semaphore: asyncio.Semaphore) -> str:
+    async with semaphore:
+        image = await get_flag(client, cc)
+    # file writes block, so they run on the default thread pool instead of the event loop
+    await asyncio.to_thread(save_flag, image, f"{cc}.gif")
+    print(cc, end=" ", flush=True)
+    return cc
+
+
+async def supervisor(cc_list: list[str], concurrency: int) -> int:
+    semaphore = asyncio.Semaphore(concurrency)
+    async with make_client(concurrency) as client:
+        to_do = [download_one(client, cc, semaphore) for cc in sorted(cc_list)]
+        res = await asyncio.gather(*to_do)
+    return len(res)
+
+
+def download_many(cc_list: list[str], concurrency: int = MAX_CONCURRENCY) -> int:
+    return asyncio.run(supervisor(cc_list, concurrency))
+
+
+if __name__ == "__main__":
+    main(download_many)
@@ -1,19 +1,11 @@
-import time
-import functools
-
-
-def timer(func):
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        start_time = time.perf_counter()
-        time.sleep(3)
-        result = func(*args, **kwargs)
-        stop_time = time.perf_counter()
-        run_time = stop_time - start_time
-        print(f"Execution Time of {func.__name__} is {stop_time-start_time} seconds")
-        return result
-
-    return wrapper
+from perceive_py.instrumentation import instrument
+
+
+def print_execution_time(measurement):
+    print(f"Execution Time of {measurement.name} is {measurement.wall} seconds")
+
+
+timer = instrument(report=print_execution_time)
 
 
 def no_decorator():
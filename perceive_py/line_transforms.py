@@ -0,0 +1,163 @@
+"""
+Pluggable line transforms for `read_parallel`.
+
+A transform pipeline is an ordered list of stages, each loaded from a dotted
+path such as `perceive_py.line_transforms.is_not_blank` or
+`my_jobs.grep:match_error`:
+
+- map: returns the new line, or for batch callables the new list of lines.
+- filter: returns whether to keep the line, or for batch callables one flag per line.
+- aggregate: an `Aggregate` that folds lines into a per-worker partial result,
+  which the parent merges across parts.
+
+Callables work on one `bytes` line at a time unless they are marked with
+`@batched`, in which case they get a whole list of lines per call and the
+per-line Python call overhead disappears.
+"""
+
+import importlib
+from typing import Any, Callable, NamedTuple
+
+STAGE_KINDS = ("map", "filter", "aggregate")
+
+
+class Stage(NamedTuple):
+    kind: str
+    name: str
+    func: Any
+    batch: bool
+
+
+class Aggregate:
+    """
+    Base class for aggregate stages.
+
+    `update` gets one line, or a list of lines when `batch` is True.
+    """
+
+    batch = False
+
+    def initial(self):
+        raise NotImplementedError
+
+    def update(self, acc, line):
+        raise NotImplementedError
+
+    def merge(self, left, right):
+        raise NotImplementedError
+
+
+def batched(func: Callable) -> Callable:
+    """
+    Marks a map or filter callable as taking a list of lines per call.
+    """
+    func.batch = True
+    return func
+
+
+def load_plugin(path: str) -> Any:
+    """
+    Imports the object at `path`, written as `package.module.name` or `package.module:name`.
+    """
+    module_name, sep, attr = path.partition(":")
+    if not sep:
+        module_name, _, attr = path.rpartition(".")
+    if not module_name or not attr:
+        raise ValueError(f"Invalid plugin path: {path}")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def load_stages(specs: list[tuple[str, str]]) -> list[Stage]:
+    """
+    Loads `(kind, dotted_path)` specs into stages, instantiating aggregate classes.
+    """
+    stages = []
+    for kind, path in specs:
+        if kind not in STAGE_KINDS:
+            raise ValueError(f"Unsupported stage kind: {kind}")
+        func = load_plugin(path)
+        if kind == "aggregate" and isinstance(func, type):
+            func = func()
+        stages.append(Stage(kind, path, func, bool(getattr(func, "batch", False))))
+    return stages
+
+
+def initial_aggregates(stages: list[Stage]) -> list:
+    return [stage.func.initial() for stage in stages if stage.kind == "aggregate"]
+
+
+def apply_stages(stages: list[Stage], lines: list[bytes], aggregates: list) -> list[bytes]:
+    """
+    Runs one batch of lines through the stages, updating `aggregates` in place.
+
+    Returns:
+        list: The lines left after all map and filter stages.
+    """
+    agg_index = 0
+    for stage in stages:
+        if stage.kind == "map":
+            lines = list(stage.func(lines)) if stage.batch else [stage.func(line) for line in lines]
+        elif stage.kind == "filter":
+            if stage.batch:
+                lines = [line for line, keep in zip(lines, stage.func(lines)) if keep]
+            else:
+                lines = [line for line in lines if stage.func(line)]
+        else:
+            acc = aggregates[agg_index]
+            if stage.batch:
+                acc = stage.func.update(acc, lines)
+            else:
+                for line in lines:
+                    acc = stage.func.update(acc, line)
+            aggregates[agg_index] = acc
+            agg_index += 1
+    return lines
+
+
+def merge_aggregates(stages: list[Stage], partials: list[list]) -> dict:
+    """
+    Merges the per-part aggregate results, in part order, into `{stage name: result}`.
+    """
+    agg_stages = [stage for stage in stages if stage.kind == "aggregate"]
+    results = initial_aggregates(agg_stages)
+    for partial in partials:
+        results = [stage.func.merge(left, right) for stage, left, right in zip(agg_stages, results, partial)]
+    return {stage.name: result for stage, result in zip(agg_stages, results)}
+
+
+# Built-in stages, usable as perceive_py.line_transforms.<name>
+
+
+def is_not_blank(line: bytes) -> bool:
+    return bool(line.strip())
+
+
+@batched
+def to_upper(lines: list[bytes]) -> list[bytes]:
+    return [line.upper() for line in lines]
+
+
+class LineCount(Aggregate):
+    batch = True
+
+    def initial(self):
+        return 0
+
+    def update(self, acc, lines):
+        return acc + len(lines)
+
+    def merge(self, left, right):
+        return left + right
+
+
+class ByteCount(Aggregate):
+    batch = True
+
+    def initial(self):
+        return 0
+
+    def update(self, acc, lines):
+        return acc + sum(map(len, lines))
+
+    def merge(self, left, right):
+        return left + right
@@ -10,4 +10,5 @@ def run():
     print("main is called.")
 
 
-run()
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,296 @@
+"""
+Local stand-in for the flags server used by the downloaders.
+
+Serves a synthetic GIF for every `/<cc>/<cc>.gif` path over HTTP/1.1
+keep-alive, with an ETag and Last-Modified (answering matching
+`If-None-Match` requests with 304), single byte-range requests (206) and
+configurable latency, jitter, bandwidth cap, error rate and rate of responses
+cut off half way, so download strategies can be compared without the network
+in the way.
+
+Usage:
+    poetry run python -m perceive_py.mock_flag_server --port 8001 --latency_ms 50
+    FLAGS_BASE_URL=http://127.0.0.1:8001 poetry run python -m perceive_py.flags_asyncio
+"""
+
+import argparse
+import email.utils
+import multiprocessing
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FLAG_PATH = re.compile(r"^/([a-z0-9]+)/\1\.gif$")
+BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+GIF_HEADER = b"GIF89a"
+WRITE_BLOCK_BYTES = 16 * 1024
+LAST_MODIFIED = email.utils.formatdate(0, usegmt=True)
+
+
+def flag_body(cc, size):
+    """
+    Builds the deterministic GIF body served for a country code.
+
+    Args:
+        cc (str): The lower-case country code.
+        size (int): The body size in bytes.
+
+    Returns:
+        bytes: `size` bytes starting with the GIF header.
+    """
+    payload = random.Random(zlib.crc32(cc.encode())).randbytes(max(size - len(GIF_HEADER), 0))
+    return (GIF_HEADER + payload)[:size]
+
+
+class FlagHandler(BaseHTTPRequestHandler):
+    """
+    Request handler; `MockFlagServer` sets the behaviour on a subclass per server.
+    """
+
+    protocol_version = "HTTP/1.1"
+    server_state = None
+
+    def setup(self):
+        super().setup()
+        self.server_state.count("connections")
+
+    def do_HEAD(self):
+        self.do_GET(send_body=False)
+
+    def do_GET(self, send_body=True):
+        state = self.server_state
+        state.count("requests")
+        match = FLAG_PATH.match(self.path)
+        time.sleep(state.delay())
+        if match is None:
+            self.send_error_response(404)
+            return
+        if state.should_fail():
+            state.count("errors")
+            self.send_error_response(503)
+            return
+        body = state.body(match.group(1))
+        etag = f'"{zlib.crc32(body):08x}"'
+        if self.headers.get("If-None-Match") == etag:
+            state.count("not_modified")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        byte_range = self.byte_range(len(body))
+        if byte_range is None:
+            self.send_response(200)
+            start, end = 0, len(body) - 1
+        elif byte_range == (None, None):
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{len(body)}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        else:
+            state.count("partial")
+            self.send_response(206)
+            start, end = byte_range
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(body)}")
+        self.send_header("Content-Type", "image/gif")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.end_headers()
+        if not send_body:
+            return
+        body = body[start:end + 1]
+        if state.should_drop():
+            state.count("dropped")
+            self.write_throttled(body[:len(body) // 2])
+            self.close_connection = True
+            return
+        self.write_throttled(body)
+
+    def byte_range(self, size):
+        """
+        Parses a single `Range: bytes=start-end` header.
+
+        Returns:
+            tuple: None to send the whole body, `(None, None)` when the range is not
+            satisfiable, else the inclusive `(start, end)` offsets.
+        """
+        match = BYTE_RANGE.match(self.headers.get("Range", ""))
+        if match is None or match.groups() == ("", ""):
+            return None
+        start, end = match.groups()
+        if not start:
+            start, end = max(size - int(end), 0), size - 1
+        else:
+            start, end = int(start), min(int(end), size - 1) if end else size - 1
+        if start > end:
+            return None, None
+        return start, end
+
+    def send_error_response(self, status):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def write_throttled(self, body):
+        bandwidth = self.server_state.bandwidth
+        if not bandwidth:
+            self.wfile.write(body)
+            return
+        for start in range(0, len(body), WRITE_BLOCK_BYTES):
+            block = body[start:start + WRITE_BLOCK_BYTES]
+            self.wfile.write(block)
+            time.sleep(len(block) / bandwidth)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ServerState:
+    """
+    Behaviour and counters shared by the handler threads of one server.
+    """
+
+    def __init__(self, latency, jitter, bandwidth, error_rate, size, seed, drop_rate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.size = size
+        self.drop_rate = drop_rate
+        self.counters = {
+            "connections": 0, "requests": 0, "errors": 0, "not_modified": 0, "partial": 0, "dropped": 0,
+        }
+        self._random = random.Random(seed)
+        self._bodies = {}
+        self._lock = threading.Lock()
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def delay(self):
+        with self._lock:
+            return self.latency + self._random.uniform(0, self.jitter)
+
+    def should_fail(self):
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def should_drop(self):
+        if not self.drop_rate:
+            return False
+        with self._lock:
+            return self._random.random() < self.drop_rate
+
+    def body(self, cc):
+        if cc not in self._bodies:
+            self._bodies[cc] = flag_body(cc, self.size)
+        return self._bodies[cc]
+
+
+class MockFlagServer:
+    """
+    A threaded local flags server.
+
+    Args:
+        latency (float, optional): Seconds to wait before answering each request. Defaults to 0.
+        jitter (float, optional): Extra uniform random delay of up to this many seconds. Defaults to 0.
+        bandwidth (float, optional): Per-response cap in bytes per second, or None for no cap. Defaults to None.
+        error_rate (float, optional): Fraction of flag requests answered with 503. Defaults to 0.
+        size (int, optional): Size of every GIF in bytes. Defaults to 1024.
+        seed (int, optional): Seed for jitter, errors and drops. Defaults to 0.
+        host (str, optional): Address to bind. Defaults to "127.0.0.1".
+        port (int, optional): Port to bind, 0 for any free port. Defaults to 0.
+        drop_rate (float, optional): Fraction of bodies cut off half way by closing the connection. Defaults to 0.
+
+    Use it as a context manager to serve from a background thread, or call
+    `start_process` to serve from a child process so the server's CPU time is
+    not charged to the caller. `counters` are only visible in thread mode.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, bandwidth=None, error_rate=0.0, size=1024, seed=0,
+                 host="127.0.0.1", port=0, drop_rate=0.0):
+        self.state = ServerState(latency, jitter, bandwidth, error_rate, size, seed, drop_rate)
+        handler = type("BoundFlagHandler", (FlagHandler,), {"server_state": self.state})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+        self._process = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def counters(self):
+        return dict(self.state.counters)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def start_process(self):
+        self._process = multiprocessing.Process(target=self.httpd.serve_forever, daemon=True)
+        self._process.start()
+        return self
+
+    def stop(self):
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+        elif self._thread is not None:
+            self.httpd.shutdown()
+            self._thread.join()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def get_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1", help=" Enter address to bind")
+    parser.add_argument("--port", type=int, default=8001, help=" Enter port to bind")
+    parser.add_argument("--latency_ms", type=float, default=0.0, help=" Enter latency per request")
+    parser.add_argument("--jitter_ms", type=float, default=0.0, help=" Enter maximum extra random latency")
+    parser.add_argument("--bandwidth_kbps", type=float, default=None, help=" Enter per-response bandwidth cap in KB/s")
+    parser.add_argument("--error_rate", type=float, default=0.0, help=" Enter fraction of requests answered with 503")
+    parser.add_argument("--size", type=int, default=1024, help=" Enter GIF size in bytes")
+    parser.add_argument("--drop_rate", type=float, default=0.0, help=" Enter fraction of bodies cut off half way")
+    return parser.parse_args()
+
+
+def main(host, port, latency_ms, jitter_ms, bandwidth_kbps, error_rate, size, drop_rate=0.0):
+    server = MockFlagServer(
+        latency=latency_ms / 1000,
+        jitter=jitter_ms / 1000,
+        bandwidth=bandwidth_kbps * 1024 if bandwidth_kbps else None,
+        error_rate=error_rate,
+        size=size,
+        host=host,
+        port=port,
+        drop_rate=drop_rate,
+    )
+    print(f"Serving flags on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    args = get_args()
+    main(args.host, args.port, args.latency_ms, args.jitter_ms, args.bandwidth_kbps, args.error_rate, args.size,
+         args.drop_rate)
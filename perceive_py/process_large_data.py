@@ -1,81 +1,253 @@
-import numpy as np
-import pandas as pd
+import argparse
 import concurrent.futures
+import functools
+import io
+import json
+import logging
+import math
 import os
+import queue
+import tempfile
+import threading
 import time
-import os
-import argparse
+import traceback
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-import functools
-import time
-import logging
-from logging.handlers import RotatingFileHandler
+
+from perceive_py.chunk_formats import (
+    FORMATS,
+    check_format,
+    column_with_mask,
+    encode_columnar,
+    import_pyarrow,
+    open_chunk_sink,
+    restore_column,
+)
+from perceive_py.instrumentation import instrument, log_to, measure, write_metrics
+from perceive_py.utils import RetryBudget, RetryStats, atomic_write, lazy_import, load_lazy_modules, with_retry
+
+# Loaded on first use, so `--help` and importing the module stay fast
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
 
 
 FILE_PATH = "large_data.csv"
+BACKENDS = ("thread", "process")
+DTYPE_BACKENDS = ("numpy", "pyarrow")
+STRING_CATEGORIES = ["A", "B", "C", "D"]
+CODE_BLOCK_ROWS = 1 << 20
+STREAM_BLOCK_ROWS = 1 << 16
+DEFAULT_TARGET_CHUNK_MB = 8
+AUTOTUNE_SAMPLE_ROWS = 10_000
+MANIFEST_SUFFIX = ".manifest.jsonl"
+DEAD_LETTER_SUFFIX = ".deadletter"
+CHUNK_RETRY_LIMIT = 3
+# Each export gets its own retry budget (see `write_to_file`): every chunk deposits
+# half a retry and 20 retries are available up front, so a short outage recovers
+# while an encoder that keeps failing is only retried for every other chunk
+CHUNK_RETRY_RATIO = 0.5
+CHUNK_RETRY_INITIAL = 20
+CHUNK_RETRY_STATS = RetryStats()
 
 
-# Configure logger
+# Logger; its handlers are attached by `configure_logging` when `main` runs
 LOG_FILE = "process_large_data.log"
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
 logger = logging.getLogger("process_large_data")
 logger.setLevel(logging.DEBUG)
 
-# Create a rotating file handler
-handler = RotatingFileHandler(LOG_FILE, maxBytes=5 * 1024 * 1024, backupCount=5)
-formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-handler.setFormatter(formatter)
-logger.addHandler(handler)
+# Listener started by `configure_logging`, and the queue process-pool workers log to
+_log_listener = None
+_worker_log_queue = None
+
+
+def configure_logging(log_file=LOG_FILE, multiprocess=False):
+    """
+    Sends the module's log records through a queue to a rotating log file.
+
+    Callers only enqueue records; a `QueueListener` thread formats them and does
+    the file writes, so logging never holds a file lock in the worker threads.
+    With `multiprocess`, the queue is a `multiprocessing.Queue` that process-pool
+    workers attach to through `init_worker_logging`, so their records reach the
+    same file instead of being lost or interleaved.
+
+    Nothing is done if logging is already configured.
+
+    Args:
+        log_file (str, optional): The log file path. Defaults to `LOG_FILE`.
+        multiprocess (bool, optional): Accept records from worker processes. Defaults to False.
+
+    Returns:
+        logging.handlers.QueueListener or None: The started listener to pass to
+        `stop_logging`, or None if logging was already configured.
+    """
+    global _log_listener, _worker_log_queue
+    if _log_listener is not None:
+        return None
+    import multiprocessing  # slow to import, only needed once an export runs
+    handler = RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT)
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    log_queue = multiprocessing.Queue() if multiprocess else queue.SimpleQueue()
+    _log_listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _log_listener.start()
+    _worker_log_queue = log_queue if multiprocess else None
+    logger.addHandler(QueueHandler(log_queue))
+    return _log_listener
+
+
+def stop_logging(listener):
+    """
+    Detaches the queue handler, flushes every queued record to the file and stops the listener.
+
+    Args:
+        listener (logging.handlers.QueueListener or None): The value returned by `configure_logging`.
+    """
+    global _log_listener, _worker_log_queue
+    if listener is None:
+        return
+    for queue_handler in [h for h in logger.handlers if isinstance(h, QueueHandler) and h.queue is listener.queue]:
+        logger.removeHandler(queue_handler)
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+    if listener.queue is _worker_log_queue:
+        _worker_log_queue.close()
+        _worker_log_queue.join_thread()
+    _log_listener = _worker_log_queue = None
+
+
+def init_worker_logging(log_queue):
+    """
+    Process-pool initializer that replaces the handlers a worker inherited with
+    a `QueueHandler` on the parent's multiprocessing queue.
+
+    Args:
+        log_queue (multiprocessing.Queue or None): The queue from `configure_logging`, or None to drop
+                                                   the inherited handlers only.
+    """
+    for inherited in list(logger.handlers):
+        logger.removeHandler(inherited)
+    if log_queue is not None:
+        logger.addHandler(QueueHandler(log_queue))
 
-def get_args():
+def get_args(argv=None, prog=None):
     """
     Parses command-line arguments for the script.
 
+    Args:
+        argv (list, optional): The arguments to parse. Defaults to `sys.argv[1:]`.
+        prog (str, optional): The program name shown in the usage. Defaults to the script name.
+
     Returns:
         argparse.Namespace: An object containing the following attributes:
             - filename (str): The name of the input file provided via the --filename argument.
             - output_location (str): The directory path for the output provided via the --output_location argument.
+            - backend (str): The CSV encoding backend, "thread" or "process", provided via the --backend argument.
+            - format (str): The output format, one of `FORMATS`, provided via the --format argument.
+            - dtype_backend (str): The DataFrame dtype backend, "numpy" or "pyarrow", provided via the --dtype_backend argument.
+            - num_rows (int): The number of rows to generate, provided via the --num_rows argument.
+            - num_cols (int): The number of data columns, provided via the --num_cols argument.
+            - stream (bool): Whether to stream chunks with `iter_large_dataframe`, set by the --stream flag.
+            - chunk_size (int or None): Rows per chunk provided via the --chunk_size argument.
+            - num_workers (int or None): Number of workers provided via the --num_workers argument.
+            - target_chunk_mb (float): Target output size per chunk provided via the --target_chunk_mb argument.
+            - resume (bool): Whether to continue a crashed CSV export from its manifest, set by the --resume flag.
+            - metrics_file (str or None): Where to write the collected metrics, provided via the --metrics_file argument.
+            - log_file (str): The log file provided via the --log_file argument.
+            - multiprocess_logging (bool or None): Whether worker processes log through a multiprocessing
+              queue, set by the --multiprocess_logging flag; None lets `main` decide from the backend.
     """
-    parser = argparse.ArgumentParser()
+    parser = argparse.ArgumentParser(prog=prog)
     parser.add_argument("--filename", help=" Enter filename")
     parser.add_argument("--output_location", help=" Enter output directory")
-    args = parser.parse_args()
+    parser.add_argument("--backend", choices=BACKENDS, default="thread", help=" Enter CSV encoding backend")
+    parser.add_argument("--format", choices=FORMATS, default="csv", help=" Enter output format")
+    parser.add_argument("--dtype_backend", choices=DTYPE_BACKENDS, default="numpy", help=" Enter DataFrame dtype backend")
+    parser.add_argument("--num_rows", type=int, default=30000, help=" Enter number of rows")
+    parser.add_argument("--num_cols", type=int, default=10, help=" Enter number of columns")
+    parser.add_argument("--stream", action="store_true", help=" Stream chunks instead of building the DataFrame")
+    parser.add_argument("--chunk_size", type=int, help=" Enter rows per chunk (autotuned when omitted)")
+    parser.add_argument("--num_workers", type=int, help=" Enter number of workers (autotuned when omitted)")
+    parser.add_argument(
+        "--target_chunk_mb", type=float, default=DEFAULT_TARGET_CHUNK_MB, help=" Enter target output megabytes per chunk"
+    )
+    parser.add_argument("--resume", action="store_true", help=" Continue a crashed CSV export from its manifest")
+    parser.add_argument("--metrics_file", help=" Enter file for metrics (.prom for Prometheus text, else JSON)")
+    parser.add_argument("--log_file", default=LOG_FILE, help=" Enter log file")
+    parser.add_argument(
+        "--multiprocess_logging",
+        action="store_true",
+        default=None,
+        help=" Collect worker process logs through a multiprocessing queue (default with --backend process)",
+    )
+    args = parser.parse_args(argv)
     return args
 
-def timer(func):
+def build_string_codes(rng, num_rows, num_string_cols):
     """
-    A decorator that measures and logs the execution time of the decorated function.
+    Draws the category codes for the string columns.
 
-    This decorator logs the start time, end time, and the elapsed time of the function
-    execution. It also logs the function name and timestamps in a human-readable format.
+    The codes are drawn in row blocks of `CODE_BLOCK_ROWS`, which consumes the
+    random stream exactly like one `rng.choice(STRING_CATEGORIES, size=(num_rows, num_string_cols))`
+    call, while the int64 draw buffer never holds more than one block.
 
     Args:
-        func (Callable): The function to be wrapped and timed.
+        rng (numpy.random.RandomState): The seeded random state.
+        num_rows (int): Number of rows to draw.
+        num_string_cols (int): Number of string columns.
 
     Returns:
-        Callable: The wrapped function with timing functionality.
+        numpy.ndarray: An int8 array of shape `(num_rows, num_string_cols)`.
+    """
+    codes = np.empty((num_rows, num_string_cols), dtype=np.int8)
+    for start in range(0, num_rows, CODE_BLOCK_ROWS):
+        stop = min(start + CODE_BLOCK_ROWS, num_rows)
+        codes[start:stop] = rng.randint(0, len(STRING_CATEGORIES), size=(stop - start, num_string_cols))
+    return codes
 
-    Example:
-        @timer
-        def example_function():
-            # Function logic here
-            pass
+
+def build_typed_columns(row_ids, numeric_data, numeric_columns, string_codes, string_columns, dtype_backend):
     """
-    @functools.wraps(func)
-    def wrapper_timer(*args, **kwargs):
-        start_time = time.perf_counter()
-        logger.info(f"Starting '{func.__name__}' at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime())}")
-        value = func(*args, **kwargs)
-        end_time = time.perf_counter()
-        elapsed_time = end_time - start_time
-        logger.info(f"Finished '{func.__name__}' at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime())}")
-        logger.info(f"Elapsed time for '{func.__name__}': {elapsed_time:0.4f} seconds")
-        return value
+    Assembles the typed DataFrame from its column arrays.
+
+    With the "numpy" backend the numeric block is wrapped without a copy and the
+    string columns become `pandas.Categorical`. With the "pyarrow" backend every
+    column is backed by an Arrow array and the string columns are dictionary encoded.
+
+    Args:
+        row_ids (numpy.ndarray): The row identifiers.
+        numeric_data (numpy.ndarray): The `(num_rows, num_numeric_cols)` float64 block.
+        numeric_columns (list): Names of the numeric columns.
+        string_codes (numpy.ndarray): The `(num_rows, num_string_cols)` category codes.
+        string_columns (list): Names of the string columns.
+        dtype_backend (str): "numpy" or "pyarrow".
+
+    Returns:
+        pd.DataFrame: The assembled DataFrame.
+    """
+    if dtype_backend == "pyarrow":
+        pa = import_pyarrow()
+        categories = pa.array(STRING_CATEGORIES)
+        columns = {"row_id": pd.arrays.ArrowExtensionArray(pa.array(row_ids))}
+        for i, column in enumerate(numeric_columns):
+            columns[column] = pd.arrays.ArrowExtensionArray(pa.array(numeric_data[:, i]))
+        for i, column in enumerate(string_columns):
+            dictionary = pa.DictionaryArray.from_arrays(pa.array(string_codes[:, i]), categories)
+            columns[column] = pd.arrays.ArrowExtensionArray(dictionary)
+        return pd.DataFrame(columns)
+
+    df = pd.DataFrame(numeric_data, columns=numeric_columns, copy=False)
+    df.insert(0, "row_id", row_ids)
+    for i, column in enumerate(string_columns):
+        df[column] = pd.Categorical.from_codes(string_codes[:, i], categories=STRING_CATEGORIES)
+    return df
 
-    return wrapper_timer
 
 #  Create sample large DataFrame
-@timer
-def create_large_dataframe(num_rows=3000, num_cols=10):
+@instrument("process_large_data.create_large_dataframe", report=log_to(logger))
+def create_large_dataframe(num_rows=3000, num_cols=10, dtype_backend="numpy"):
     """
     Create a large DataFrame for testing purposes with a row identifier column,
     alternating numeric and string columns.
@@ -84,37 +256,136 @@ def create_large_dataframe(num_rows=3000, num_cols=10):
     The first column is a row identifier, and the remaining columns alternate between
     numeric and string data. The random number generation is seeded for reproducibility.
 
+    Columns are built with their own types: an int32 `row_id` (int64 once the row
+    count no longer fits), float64 numeric columns and categorical string columns
+    over `STRING_CATEGORIES`. The values are the same as those of the former
+    all-string frame, they just are not upcast to strings.
+
     Args:
         num_rows (int): Number of rows in the DataFrame.
         num_cols (int): Total number of columns excluding the row identifier.
+        dtype_backend (str, optional): "numpy" or "pyarrow". Defaults to "numpy".
 
     Returns:
         pd.DataFrame: A DataFrame containing the generated data with column names
         in the format 'row_id', 'num_col_0', 'str_col_1', ..., alternating between numeric and string columns.
+
+    Raises:
+        ValueError: If `dtype_backend` is not one of `DTYPE_BACKENDS`.
     """
-    np.random.seed(0)  # For reproducibility
+    if dtype_backend not in DTYPE_BACKENDS:
+        raise ValueError(f"Unsupported dtype backend: {dtype_backend}")
+    rng = np.random.RandomState(0)  # For reproducibility, same stream as np.random.seed(0)
 
     # Generate row identifier
-    row_ids = np.arange(1, num_rows + 1).reshape(-1, 1)
+    row_id_dtype = np.int32 if num_rows <= np.iinfo(np.int32).max else np.int64
+    row_ids = np.arange(1, num_rows + 1, dtype=row_id_dtype)
 
     # Determine the number of numeric and string columns
     num_numeric_cols = num_cols // 2
     num_string_cols = num_cols - num_numeric_cols
 
     # Generate numeric data
-    numeric_data = np.random.rand(num_rows, num_numeric_cols)
+    numeric_data = rng.rand(num_rows, num_numeric_cols)
     numeric_columns = [f"num_col_{i}" for i in range(num_numeric_cols)]
 
-    # Generate string data
-    string_data = np.random.choice(['A', 'B', 'C', 'D'], size=(num_rows, num_string_cols))
+    # Generate string data as category codes
+    string_codes = build_string_codes(rng, num_rows, num_string_cols)
     string_columns = [f"str_col_{i}" for i in range(num_string_cols)]
 
-    # Combine row identifier, numeric, and string data into a single DataFrame
-    data = np.hstack((row_ids, numeric_data, string_data))
-    columns = ["row_id"] + numeric_columns + string_columns
-    df = pd.DataFrame(data, columns=columns)
+    return build_typed_columns(row_ids, numeric_data, numeric_columns, string_codes, string_columns, dtype_backend)
 
-    return df
+
+def generate_stream_block(seed, block_id, num_rows, num_numeric_cols, num_string_cols):
+    """
+    Generates the random data of one `STREAM_BLOCK_ROWS` block for `iter_large_dataframe`.
+
+    Every block owns two independent `numpy.random.Generator` streams, one for
+    the numeric columns and one for the category codes. They are the children of
+    the block's child `SeedSequence`, i.e. `SeedSequence(seed).spawn(...)[block_id].spawn(2)`,
+    so any block can be regenerated on its own.
+
+    Args:
+        seed (int): The root seed.
+        block_id (int): The index of the block.
+        num_rows (int): The total number of rows, used to clip the last block.
+        num_numeric_cols (int): Number of numeric columns.
+        num_string_cols (int): Number of string columns.
+
+    Returns:
+        tuple: The `(rows, num_numeric_cols)` float64 block and the `(rows, num_string_cols)` int8 codes.
+    """
+    block_rows = min(STREAM_BLOCK_ROWS, num_rows - block_id * STREAM_BLOCK_ROWS)
+    numeric_seq, string_seq = np.random.SeedSequence(seed, spawn_key=(block_id,)).spawn(2)
+    numeric_data = np.random.default_rng(numeric_seq).random((block_rows, num_numeric_cols))
+    string_codes = np.random.default_rng(string_seq).integers(
+        0, len(STRING_CATEGORIES), size=(block_rows, num_string_cols), dtype=np.int8
+    )
+    return numeric_data, string_codes
+
+
+def iter_large_dataframe(num_rows=3000, num_cols=10, chunk_size=1000, seed=0, dtype_backend="numpy"):
+    """
+    Streams a large DataFrame one chunk at a time so it never fully materializes.
+
+    Chunks have the same columns and types as `create_large_dataframe`. The data
+    is drawn in fixed `STREAM_BLOCK_ROWS` blocks, each with its own RNG streams
+    (see `generate_stream_block`), and chunks are cut from those blocks. The rows
+    therefore depend only on `num_rows`, `num_cols` and `seed`: concatenating the
+    chunks gives the same frame for any `chunk_size`, including the one-shot
+    `chunk_size=num_rows`. Peak memory is bounded by one chunk plus one block.
+
+    Args:
+        num_rows (int): Number of rows to generate.
+        num_cols (int): Total number of columns excluding the row identifier.
+        chunk_size (int): Number of rows per yielded chunk; the last chunk holds the remainder.
+        seed (int, optional): The root seed. Defaults to 0.
+        dtype_backend (str, optional): "numpy" or "pyarrow". Defaults to "numpy".
+
+    Yields:
+        pd.DataFrame: The next chunk, indexed by its global row positions.
+
+    Raises:
+        ValueError: If `chunk_size` is not positive or `dtype_backend` is not one of `DTYPE_BACKENDS`.
+
+    Example:
+        >>> write_to_file("large_data.csv", iter_large_dataframe(10**9, 10, chunk_size=10**6))
+    """
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+    if dtype_backend not in DTYPE_BACKENDS:
+        raise ValueError(f"Unsupported dtype backend: {dtype_backend}")
+
+    row_id_dtype = np.int32 if num_rows <= np.iinfo(np.int32).max else np.int64
+    num_numeric_cols = num_cols // 2
+    num_string_cols = num_cols - num_numeric_cols
+    numeric_columns = [f"num_col_{i}" for i in range(num_numeric_cols)]
+    string_columns = [f"str_col_{i}" for i in range(num_string_cols)]
+
+    cached_block_id, cached_block = None, None
+    for start in range(0, num_rows, chunk_size):
+        stop = min(start + chunk_size, num_rows)
+        numeric_parts, code_parts = [], []
+        for block_id in range(start // STREAM_BLOCK_ROWS, (stop - 1) // STREAM_BLOCK_ROWS + 1):
+            if block_id != cached_block_id:
+                cached_block_id = block_id
+                cached_block = generate_stream_block(seed, block_id, num_rows, num_numeric_cols, num_string_cols)
+            block_start = block_id * STREAM_BLOCK_ROWS
+            lo, hi = max(start, block_start) - block_start, min(stop, block_start + STREAM_BLOCK_ROWS) - block_start
+            numeric_parts.append(cached_block[0][lo:hi])
+            code_parts.append(cached_block[1][lo:hi])
+
+        row_ids = np.arange(start + 1, stop + 1, dtype=row_id_dtype)
+        chunk_df = build_typed_columns(
+            row_ids,
+            np.concatenate(numeric_parts),
+            numeric_columns,
+            np.concatenate(code_parts),
+            string_columns,
+            dtype_backend,
+        )
+        chunk_df.index = pd.RangeIndex(start, stop)
+        yield chunk_df
 
 
 # Split DataFrame into chunks
@@ -142,13 +413,14 @@ def write_chunk(chunk_id, chunk_df, output_file,write_header=False):
     Writes a DataFrame chunk to a CSV file.
     This function appends the given DataFrame chunk to the specified CSV file. 
     If the file does not exist, it creates a new file and writes the header. 
-    In case of any failure during the write operation, an error message is logged.
+    In case of any failure during the write operation, an error message is logged
+    and the exception is re-raised, so the caller can retry or dead-letter the chunk.
     Args:
         chunk_id (int): The identifier for the chunk being written.
         chunk_df (pandas.DataFrame): The DataFrame chunk to be written to the file.
-        output_file (str): The path to the output CSV file.
+        output_file (str or file-like): The path to the output CSV file, or an open text buffer.
     Raises:
-        Exception: Catches and logs any exception that occurs during the write operation.
+        Exception: Any exception that occurs during the write operation, after logging it.
     """
     try:
         mode = "a"  # Always append mode
@@ -159,93 +431,707 @@ def write_chunk(chunk_id, chunk_df, output_file,write_header=False):
 
     except Exception as e:
         logger.error(f"Error writing chunk {chunk_id}: {e}")
+        raise
 
-def write_to_file(output_file, chunks, num_workers=5):
+
+@instrument("process_large_data.encode_chunk")
+def encode_chunk(chunk_id, chunk_df, write_header=False, fmt="csv"):
     """
-    Writes data chunks to a file using multithreading for parallel processing.
+    Encodes a DataFrame chunk without touching the output file.
+
+    CSV chunks are rendered through `write_chunk` into an in-memory buffer, so the
+    CSV layout is exactly what a direct append to the file would produce. Other
+    formats are encoded by `chunk_formats.encode_columnar`.
 
     Args:
-        output_file (str): The path to the output file where the chunks will be written.
-        chunks (list): A list of data chunks to be written to the file.
-        num_workers (int, optional): The number of worker threads to use for parallel processing. Defaults to 6.
+        chunk_id (int): The identifier for the chunk being encoded.
+        chunk_df (pandas.DataFrame): The DataFrame chunk to be encoded.
+        write_header (bool, optional): Whether to emit the CSV header row. Defaults to False.
+        fmt (str, optional): The output format, one of `FORMATS`. Defaults to "csv".
 
     Returns:
-        None
+        bytes or object: The UTF-8 encoded CSV text for the chunk, or the payload
+        expected by the sink for `fmt`.
+    """
+    if fmt != "csv":
+        return encode_columnar(fmt, chunk_df)
+    buffer = io.StringIO()
+    write_chunk(chunk_id, chunk_df, buffer, write_header=write_header)
+    return buffer.getvalue().encode("utf-8")
 
-    This function processes the given data chunks in parallel using a ThreadPoolExecutor. 
-    If any chunk fails to write, it retries writing the failed chunks sequentially. 
-    Errors during both the initial write and retry attempts are logged to the console.
+
+def share_chunk(chunk_df):
     """
+    Copies a DataFrame chunk into a shared memory block for a worker process.
 
-    failed_chunks = []
-    with concurrent.futures.ThreadPoolExecutor(max_workers=num_workers) as executor:
-        futures = {}
-        for i, chunk in enumerate(chunks):
-            if i == 0:
-                write_chunk(i, chunk, output_file,write_header=True)  # Write the first chunk immediately
-            else:
-                future = executor.submit(write_chunk, i, chunk,output_file,write_header=False)
-                futures[future] = (i, chunk)
-
-        # Wait for all futures to complete
-        for future in concurrent.futures.as_completed(futures):
-            i, chunk = futures[future]
+    Categorical columns are stored as their codes and every other column as the
+    values and null mask of `chunk_formats.column_with_mask`, so missing values
+    and nullable dtypes come back unchanged. All arrays live in one shared memory
+    block, so only the block name and a small layout travel through the process
+    pool instead of a pickled DataFrame.
+
+    Args:
+        chunk_df (pandas.DataFrame): The DataFrame chunk to be shared.
+
+    Returns:
+        tuple: The `SharedMemory` block, which the caller must close and unlink,
+        and the layout as a list of `(column, dtype, offset, categories, mask_offset, pandas_dtype)`
+        tuples, where `categories` is None for non-categorical columns and
+        `mask_offset` is None for columns without missing values.
+    """
+    from multiprocessing import shared_memory
+
+    columns = []
+    for column in chunk_df.columns:
+        values = chunk_df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            columns.append((column, values.cat.codes.to_numpy(), list(values.cat.categories), None, values.dtype))
+        else:
+            array, mask, dtype = column_with_mask(values)
+            columns.append((column, array, None, mask, dtype))
+
+    layout = []
+    arrays = []
+    offset = 0
+    for column, array, categories, mask, dtype in columns:
+        offsets = []
+        for part in (array, mask):
+            if part is None:
+                offsets.append(None)
+                continue
+            offsets.append(offset)
+            arrays.append((part, offset))
+            offset += -(-part.nbytes // 8) * 8  # keep every array 8-byte aligned
+        layout.append((column, array.dtype.str, offsets[0], categories, offsets[1], dtype))
+
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for array, start in arrays:
+        target = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf, offset=start)
+        target[:] = array
+        del target
+    return shm, layout
+
+
+def encode_shared_chunk(chunk_id, shm_name, num_rows, layout, write_header=False, fmt="csv"):
+    """
+    Rebuilds a chunk from shared memory inside a worker process and encodes it.
+
+    Args:
+        chunk_id (int): The identifier for the chunk being encoded.
+        shm_name (str): The name of the shared memory block created by `share_chunk`.
+        num_rows (int): The number of rows in the chunk.
+        layout (list): The layout returned by `share_chunk`.
+        write_header (bool, optional): Whether to emit the CSV header row. Defaults to False.
+        fmt (str, optional): The output format, one of `FORMATS`. Defaults to "csv".
+
+    Returns:
+        bytes or object: The encoded chunk, as returned by `encode_chunk`.
+    """
+    from multiprocessing import shared_memory
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        columns = {}
+        for column, dtype, offset, categories, mask_offset, pandas_dtype in layout:
+            values = np.ndarray((num_rows,), dtype=dtype, buffer=shm.buf, offset=offset).copy()
+            if categories is not None:
+                columns[column] = pd.Categorical.from_codes(values, dtype=pandas_dtype)
+                continue
+            mask = None
+            if mask_offset is not None:
+                mask = np.ndarray((num_rows,), dtype=bool, buffer=shm.buf, offset=mask_offset).copy()
+            columns[column] = restore_column(values, mask, pandas_dtype)
+    finally:
+        shm.close()
+    return encode_chunk(chunk_id, pd.DataFrame(columns), write_header=write_header, fmt=fmt)
+
+
+def release_shared_chunk(shm):
+    """
+    Closes and unlinks a shared memory block created by `share_chunk`.
+
+    Args:
+        shm (multiprocessing.shared_memory.SharedMemory or None): The block to release.
+    """
+    if shm is not None:
+        shm.close()
+        shm.unlink()
+
+
+class ChunkWriteError(RuntimeError):
+    """
+    Raised by `write_to_file` when chunks could not be encoded and were dead-lettered.
+    """
+
+    def __init__(self, chunk_ids, dead_letter_dir):
+        super().__init__(f"Chunks {chunk_ids} could not be written, see {dead_letter_dir}")
+        self.chunk_ids = chunk_ids
+        self.dead_letter_dir = dead_letter_dir
+
+
+def retry_chunk(func, budget=None):
+    """
+    Wraps `func` with the retry policy shared by all chunk writes: up to
+    `CHUNK_RETRY_LIMIT` attempts with jittered exponential backoff, drawing on
+    the export's `budget` and counted in `CHUNK_RETRY_STATS`.
+    """
+    return with_retry(
+        limit=CHUNK_RETRY_LIMIT,
+        allow_exceptions=(Exception,),
+        base_delay=0.05,
+        max_delay=2.0,
+        budget=budget,
+        stats=CHUNK_RETRY_STATS,
+    )(func)
+
+
+def dead_letter_chunk(dead_letter_dir, chunk_id, chunk_df, error):
+    """
+    Saves a chunk that could not be written, with the traceback of its last error.
+
+    Args:
+        dead_letter_dir (str or Path): The dead-letter directory, created if missing.
+        chunk_id (int): The identifier of the failed chunk.
+        chunk_df (pandas.DataFrame): The failed chunk, stored as `chunk_<id>.pkl`.
+        error (Exception): The last error, stored as `chunk_<id>.error`.
+    """
+    dead_letter_dir = Path(dead_letter_dir)
+    dead_letter_dir.mkdir(parents=True, exist_ok=True)
+    chunk_df.to_pickle(dead_letter_dir / f"chunk_{chunk_id:05d}.pkl")
+    (dead_letter_dir / f"chunk_{chunk_id:05d}.error").write_text("".join(traceback.format_exception(error)))
+    logger.error(f"Chunk {chunk_id} moved to dead-letter directory {dead_letter_dir}")
+
+
+def clear_dead_letters(dead_letter_dir):
+    """
+    Removes the chunks saved by `dead_letter_chunk` in a previous export; any
+    other file in `dead_letter_dir` is left alone.
+
+    Args:
+        dead_letter_dir (str or Path): The dead-letter directory, which may not exist.
+    """
+    for path in Path(dead_letter_dir).glob("chunk_*"):
+        if path.suffix in (".pkl", ".error"):
+            path.unlink()
+
+
+def read_manifest(manifest_file):
+    """
+    Reads an export manifest written by `write_encoded_chunks`.
+
+    The first line is a JSON header describing the export; every further line
+    records one committed chunk as `{"chunk": id, "end": offset}`, where `end` is
+    the output file size once the chunk was flushed. A torn last line left by a
+    crash is ignored.
+
+    Args:
+        manifest_file (str or Path): The manifest path.
+
+    Returns:
+        tuple: The header dict, or None when there is no manifest, and the list of
+        `(chunk_id, end)` entries in commit order.
+    """
+    try:
+        lines = Path(manifest_file).read_text().splitlines()
+    except FileNotFoundError:
+        return None, []
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            break
+    if not records:
+        return None, []
+    return records[0], [(record["chunk"], record["end"]) for record in records[1:]]
+
+
+def plan_resume(manifest_file, header):
+    """
+    Works out which chunks of an interrupted export are already in the output file.
+
+    Chunks are appended in chunk order, so the committed chunks are the longest run
+    `0, 1, 2, ...` in the manifest; anything after a gap (a dead-lettered chunk) is
+    rewritten to keep the rows in order.
+
+    Args:
+        manifest_file (str or Path): The manifest path.
+        header (dict): The header the export would write; it must match the stored one.
+
+    Returns:
+        tuple: The committed entries and the byte offset the output file is truncated to.
+
+    Raises:
+        ValueError: If the manifest belongs to a different export.
+    """
+    stored_header, entries = read_manifest(manifest_file)
+    if stored_header is None:
+        return [], 0
+    if stored_header != header:
+        raise ValueError(f"Manifest {manifest_file} was written for {stored_header}, not {header}")
+    committed = []
+    for expected, (chunk_id, end) in enumerate(entries):
+        if chunk_id != expected:
+            break
+        committed.append((chunk_id, end))
+    return committed, committed[-1][1] if committed else 0
+
+
+def write_encoded_chunks(output_file, encoded_queue, writer_state, fmt="csv", manifest_file=None):
+    """
+    Single writer loop that appends encoded chunks to the output file.
+
+    Items are taken from `encoded_queue` in the order they were queued until a
+    `None` sentinel arrives. If a write fails, the error is recorded in
+    `writer_state["errors"]` and the queue is still drained so producers never block.
+
+    With a `manifest_file` (CSV only), every chunk is flushed and then recorded
+    in the manifest, so the manifest never lists a chunk that is not in the file.
+
+    Args:
+        output_file (str): The path to the output file.
+        encoded_queue (queue.Queue): Queue of `(chunk_id, payload)` tuples followed by `None`.
+        writer_state (dict): Receives the `"errors"` list and the final `"bytes_written"`.
+        fmt (str, optional): The output format, one of `FORMATS`. Defaults to "csv".
+        manifest_file (str, optional): Manifest to append committed chunks to. Defaults to None.
+    """
+    errors = writer_state.setdefault("errors", [])
+    sink = open_chunk_sink(fmt, output_file)
+    manifest = open(manifest_file, "a") if manifest_file else None
+    try:
+        while True:
+            item = encoded_queue.get()
+            if item is None:
+                break
+            if errors:
+                continue
+            chunk_id, payload = item
             try:
-                future.result()  # Raise exception if the task failed
+                with measure("process_large_data.append_chunk"):
+                    sink.write(chunk_id, payload)
+                if manifest is not None:
+                    manifest.write(json.dumps({"chunk": chunk_id, "end": sink.flush()}) + "\n")
+                    manifest.flush()
             except Exception as e:
-                logger.error(f"Failed to write chunk {i}: {e}")
-                failed_chunks.append((i, chunk))
-
-        # Retry failed chunks
-        if failed_chunks:
-            logger.warning(f"The following chunks failed to process: {[i for i, _ in failed_chunks]}")
-            logger.info("Retrying failed chunks...")
-            for i, chunk in failed_chunks:
-                try:
-                    write_chunk(i, chunk)
-                    logger.info(f"Chunk {i} successfully written on retry.")
-                except Exception as e:
-                    logger.error(f"Retry failed for chunk {i}: {e}")
-
-@timer
-def main(filename, output_location):
+                logger.error(f"Error appending chunk {chunk_id}: {e}")
+                errors.append(e)
+    finally:
+        writer_state["bytes_written"] = sink.close()
+        if manifest is not None:
+            manifest.close()
+
+
+def collect_next_chunk(pending, encoded_queue, failed_chunks, fmt="csv", dead_letter_dir=None, budget=None):
+    """
+    Waits for the oldest in-flight chunk and hands its payload to the writer.
+
+    Chunks are collected strictly in submission order, so `pending` acts as the
+    reorder buffer: later chunks may finish first, but they wait in the deque
+    until every chunk before them has been queued for writing. A chunk whose
+    encoding failed is retried in place through `retry_chunk` to keep the output
+    ordered; if every retry fails it is dead-lettered and skipped. Every chunk
+    deposits once into `budget`, successful ones here and retried ones through
+    `retry_chunk`.
+
+    Args:
+        pending (collections.deque): In-flight `(chunk_id, chunk, future, shm)` tuples in chunk order.
+        encoded_queue (queue.Queue): Queue feeding the writer thread.
+        failed_chunks (list): Collects the ids of chunks that could not be encoded.
+        fmt (str, optional): The output format, one of `FORMATS`. Defaults to "csv".
+        dead_letter_dir (str, optional): Where failed chunks are saved, see `dead_letter_chunk`. Defaults to None.
+        budget (RetryBudget, optional): The export's retry budget. Defaults to None, i.e. unlimited.
+    """
+    i, chunk, future, shm = pending.popleft()
+    try:
+        payload = future.result()  # Raise exception if the task failed
+        if budget is not None:
+            budget.deposit()
+    except Exception as e:
+        logger.error(f"Failed to write chunk {i}: {e}")
+        logger.info(f"Retrying chunk {i}...")
+        try:
+            payload = retry_chunk(encode_chunk, budget)(i, chunk, write_header=(i == 0), fmt=fmt)
+            logger.info(f"Chunk {i} successfully written on retry.")
+        except Exception as e:
+            logger.error(f"Retry failed for chunk {i}: {e}")
+            failed_chunks.append(i)
+            if dead_letter_dir is not None:
+                dead_letter_chunk(dead_letter_dir, i, chunk, e)
+            return
+    finally:
+        release_shared_chunk(shm)
+    encoded_queue.put((i, payload))
+
+
+def write_to_file(
+    output_file,
+    chunks,
+    num_workers=5,
+    max_pending=None,
+    backend="thread",
+    fmt="csv",
+    resume=False,
+    dead_letter_dir=None,
+    manifest_info=None,
+):
+    """
+    Writes data chunks to a file through an ordered, single-writer pipeline.
+
+    Workers encode chunks to CSV bytes in parallel while one writer thread
+    appends the encoded chunks to `output_file` in chunk order. At most
+    `max_pending` chunks are in flight and at most `max_pending` encoded chunks
+    wait for the writer, so memory stays bounded no matter how many chunks the
+    iterable yields. The first chunk carries the CSV header.
+
+    Non-CSV formats keep the column types: every chunk becomes one Parquet row
+    group, one Feather record batch, a slice of one `.npy` record array or a set
+    of `chunk_<id>/<column>` arrays in an `.npz` archive. The bytes written and
+    the throughput are logged when the file is complete.
+
+    With the "thread" backend chunks are encoded by a thread pool. Encoding holds
+    the GIL, so the "process" backend hands each chunk to a process pool through
+    shared memory (see `share_chunk`) and gets the encoded bytes back.
+
+    A chunk that fails to encode is retried with `retry_chunk`, within a retry
+    budget of this export (see `CHUNK_RETRY_RATIO`), then saved to
+    `dead_letter_dir` and skipped; the export finishes and `ChunkWriteError` is
+    raised at the end. Dead letters of a previous export are cleared first, except
+    on resume. CSV exports record every committed chunk in
+    `<output_file>.manifest.jsonl`, and `resume=True` truncates the file to the
+    last committed chunk and only encodes the chunks after it. The other formats
+    cannot be reopened for appending once their writer is gone, so they cannot
+    be resumed.
+
+    Args:
+        output_file (str): The path to the output file where the chunks will be written.
+        chunks (Iterable[pandas.DataFrame]): The data chunks to be written to the file.
+        num_workers (int, optional): The number of worker threads used for encoding. Defaults to 5.
+        max_pending (int, optional): Size of the reorder buffer. Defaults to twice `num_workers`.
+        backend (str, optional): "thread" or "process". Defaults to "thread".
+        fmt (str, optional): The output format, one of `FORMATS`. Defaults to "csv".
+        resume (bool, optional): Continue from the manifest of an interrupted CSV export. Defaults to False.
+        dead_letter_dir (str, optional): Where failed chunks are saved. Defaults to `<output_file>.deadletter`.
+        manifest_info (dict, optional): Describes how the chunks are produced; a resumed export
+                                        must pass the same values. Defaults to None.
+
+    Returns:
+        int: The number of bytes written to `output_file`.
+
+    Raises:
+        ValueError: If `backend` is not one of `BACKENDS` or `fmt` is not one of `FORMATS`, if
+                    `resume` is used with another format than CSV or the manifest belongs to another export.
+        ImportError: If `fmt` needs pyarrow and it is not installed.
+        ChunkWriteError: If chunks were dead-lettered.
+        Exception: Re-raises the first error hit by the writer thread.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unsupported backend: {backend}")
+    check_format(fmt)
+    if resume and fmt != "csv":
+        raise ValueError(f"Only csv exports can be resumed, not {fmt}")
+    if backend == "process":
+        executor_class = functools.partial(
+            concurrent.futures.ProcessPoolExecutor, initializer=init_worker_logging, initargs=(_worker_log_queue,)
+        )
+    else:
+        executor_class = concurrent.futures.ThreadPoolExecutor
+    dead_letter_dir = dead_letter_dir or f"{output_file}{DEAD_LETTER_SUFFIX}"
+    if not resume:
+        # The dead letters of an interrupted export are kept for the operator
+        clear_dead_letters(dead_letter_dir)
+    manifest_file = None
+    committed = set()
+    if fmt == "csv":
+        manifest_file = f"{output_file}{MANIFEST_SUFFIX}"
+        header = {"format": fmt, **(manifest_info or {})}
+        entries, offset = plan_resume(manifest_file, header) if resume else ([], 0)
+        if resume and os.path.exists(output_file):
+            os.truncate(output_file, offset)
+        lines = [header, *({"chunk": chunk_id, "end": end} for chunk_id, end in entries)]
+        atomic_write(manifest_file, "".join(json.dumps(line) + "\n" for line in lines).encode())
+        committed = {chunk_id for chunk_id, _ in entries}
+        if committed:
+            logger.info(f"Resuming {output_file} after {len(committed)} committed chunks at byte {offset}.")
+    max_pending = max_pending or 2 * num_workers
+    # Load numpy and pandas before the writer and worker threads first touch them
+    load_lazy_modules()
+    encoded_queue = queue.Queue(maxsize=max_pending)
+    writer_state = {"errors": [], "bytes_written": 0}
+    failed_chunks = []
+    budget = RetryBudget(ratio=CHUNK_RETRY_RATIO, initial=CHUNK_RETRY_INITIAL)
+    start_time = time.perf_counter()
+    writer = threading.Thread(
+        target=write_encoded_chunks,
+        args=(output_file, encoded_queue, writer_state, fmt, manifest_file),
+        name="chunk-writer",
+        daemon=True,
+    )
+    writer.start()
+    pending = deque()
+    try:
+        with executor_class(max_workers=num_workers) as executor:
+            for i, chunk in enumerate(chunks):
+                if i in committed:
+                    continue
+                shm = None
+                if backend == "process":
+                    shm, layout = share_chunk(chunk)
+                    try:
+                        future = executor.submit(
+                            encode_shared_chunk, i, shm.name, len(chunk), layout, write_header=(i == 0), fmt=fmt
+                        )
+                    except BaseException:
+                        release_shared_chunk(shm)
+                        raise
+                else:
+                    future = executor.submit(encode_chunk, i, chunk, write_header=(i == 0), fmt=fmt)
+                pending.append((i, chunk, future, shm))
+                if len(pending) >= max_pending:
+                    collect_next_chunk(pending, encoded_queue, failed_chunks, fmt, dead_letter_dir, budget)
+            while pending:
+                collect_next_chunk(pending, encoded_queue, failed_chunks, fmt, dead_letter_dir, budget)
+    finally:
+        # Only left over when the loop was interrupted; the pool has shut down, so no worker still reads them
+        for _, _, _, shm in pending:
+            release_shared_chunk(shm)
+        encoded_queue.put(None)
+        writer.join()
+
+    if writer_state["errors"]:
+        raise writer_state["errors"][0]
+
+    elapsed_time = time.perf_counter() - start_time
+    bytes_written = writer_state["bytes_written"]
+    logger.info(
+        f"Wrote {bytes_written} bytes as {fmt} to {output_file} in {elapsed_time:0.4f} seconds "
+        f"({bytes_written / max(elapsed_time, 1e-9) / 1e6:0.2f} MB/s)"
+    )
+    if failed_chunks:
+        logger.warning(f"The following chunks failed to process: {failed_chunks}")
+        raise ChunkWriteError(failed_chunks, dead_letter_dir)
+    return bytes_written
+
+def measure_sample(sample_df, fmt="csv"):
+    """
+    Encodes and writes a sample chunk to measure the cost of both pipeline stages.
+
+    The sample is written to a temporary file with the same sink the real export
+    uses, so the byte count is the on-disk size for `fmt`.
+
+    Args:
+        sample_df (pandas.DataFrame): A representative chunk.
+        fmt (str, optional): The output format, one of `FORMATS`. Defaults to "csv".
+
+    Returns:
+        tuple: Bytes written per row, encode seconds and write seconds for the sample.
+    """
+    start_time = time.perf_counter()
+    payload = encode_chunk(0, sample_df, write_header=False, fmt=fmt)
+    encode_time = time.perf_counter() - start_time
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sink = open_chunk_sink(fmt, str(Path(tmp_dir) / f"sample.{fmt}"))
+        start_time = time.perf_counter()
+        sink.write(0, payload)
+        bytes_written = sink.close()
+        write_time = time.perf_counter() - start_time
+    return bytes_written / max(len(sample_df), 1), encode_time, write_time
+
+
+def autotune(sample_df, num_rows, fmt="csv", target_chunk_mb=DEFAULT_TARGET_CHUNK_MB, cpu_count=None):
+    """
+    Picks the chunk size and worker count for an export from a measured sample.
+
+    The chunk size is the number of rows that produces about `target_chunk_mb`
+    of output. Encoding runs in parallel while a single thread writes, so the
+    worker count is the number of encoders needed to keep the writer busy,
+    `ceil(encode_time / write_time)`, capped by the CPU count.
+
+    Args:
+        sample_df (pandas.DataFrame): A representative chunk, e.g. the first `AUTOTUNE_SAMPLE_ROWS` rows.
+        num_rows (int): The total number of rows to export.
+        fmt (str, optional): The output format, one of `FORMATS`. Defaults to "csv".
+        target_chunk_mb (float, optional): Target output megabytes per chunk. Defaults to `DEFAULT_TARGET_CHUNK_MB`.
+        cpu_count (int, optional): Upper bound on workers. Defaults to `os.cpu_count()`.
+
+    Returns:
+        tuple: The chunk size in rows and the number of workers.
+    """
+    cpu_count = cpu_count or os.cpu_count() or 1
+    bytes_per_row, encode_time, write_time = measure_sample(sample_df, fmt)
+    chunk_size = int(target_chunk_mb * 1024 * 1024 / max(bytes_per_row, 1e-9))
+    chunk_size = min(max(chunk_size, 1), max(num_rows, 1))
+    num_workers = min(max(math.ceil(encode_time / max(write_time, 1e-9)), 1), cpu_count)
+    logger.info(
+        f"Autotuned chunk size: {chunk_size} rows ({bytes_per_row:0.1f} bytes/row, target {target_chunk_mb} MB per chunk)"
+    )
+    logger.info(
+        f"Autotuned workers: {num_workers} (encode {encode_time:0.4f}s, write {write_time:0.4f}s "
+        f"per {len(sample_df)} sample rows, {cpu_count} CPUs)"
+    )
+    return chunk_size, num_workers
+
+
+def main(
+    filename,
+    output_location,
+    backend="thread",
+    fmt="csv",
+    dtype_backend="numpy",
+    num_rows=30000,
+    num_cols=10,
+    stream=False,
+    chunk_size=None,
+    num_workers=None,
+    target_chunk_mb=DEFAULT_TARGET_CHUNK_MB,
+    resume=False,
+    log_file=LOG_FILE,
+    multiprocess_logging=None,
+):
     """
     Main function to process a large DataFrame, split it into chunks, and write the chunks to an output file.
 
+    Logging is configured for the duration of the export (see `configure_logging`).
+
+    The chunk size and worker count are autotuned from a sample (see `autotune`)
+    unless they are given. The last chunk holds the remaining rows.
+
+    With `resume`, an interrupted CSV export of the same data is continued from
+    its manifest (see `write_to_file`), reusing the manifest's chunk size.
+
     Args:
         filename (str): The name of the output file where the processed data will be saved.
         output_location (str or Path): The directory where the output file will be stored. 
                                        If it does not exist, it will be created.
+        backend (str, optional): The CSV encoding backend passed to `write_to_file`. Defaults to "thread".
+        fmt (str, optional): The output format passed to `write_to_file`. Defaults to "csv".
+        dtype_backend (str, optional): The dtype backend passed to `create_large_dataframe`. Defaults to "numpy".
+        num_rows (int, optional): Number of rows to generate. Defaults to 30000.
+        num_cols (int, optional): Number of data columns to generate. Defaults to 10.
+        stream (bool, optional): Generate chunks one at a time with `iter_large_dataframe`
+                                 instead of building the whole DataFrame first. Defaults to False.
+        chunk_size (int, optional): Rows per chunk. Autotuned when None.
+        num_workers (int, optional): Number of encoding workers. Autotuned when None.
+        target_chunk_mb (float, optional): Target output megabytes per chunk for autotuning.
+                                           Defaults to `DEFAULT_TARGET_CHUNK_MB`.
+        resume (bool, optional): Continue an interrupted CSV export instead of starting over. Defaults to False.
+        log_file (str, optional): The log file. Defaults to `LOG_FILE`.
+        multiprocess_logging (bool, optional): Collect worker process logs through a multiprocessing queue.
+                                               Defaults to None, i.e. only for the "process" backend.
 
     Returns:
         None
     """
-    num_rows=30000
-    num_cols=10
-    df  = create_large_dataframe(num_rows, num_cols)
-    logger.info(f"Created DataFrame with {len(df)} rows and {len(df.columns)} columns.")
-   
-    
+    if multiprocess_logging is None:
+        multiprocess_logging = backend == "process"
+    listener = configure_logging(log_file, multiprocess=multiprocess_logging)
+    try:
+        run_export(
+            filename,
+            output_location,
+            backend,
+            fmt,
+            dtype_backend,
+            num_rows,
+            num_cols,
+            stream,
+            chunk_size,
+            num_workers,
+            target_chunk_mb,
+            resume,
+        )
+    finally:
+        stop_logging(listener)
+
+
+@instrument("process_large_data.main", process_cpu=True, report=log_to(logger))
+def run_export(
+    filename,
+    output_location,
+    backend,
+    fmt,
+    dtype_backend,
+    num_rows,
+    num_cols,
+    stream,
+    chunk_size,
+    num_workers,
+    target_chunk_mb,
+    resume,
+):
+    """
+    Runs the export described in `main` once logging is configured.
+    """
     # Ensure output directory exists
     output_location = Path(output_location)
     output_location.mkdir(parents=True, exist_ok=True)
     output_file = str(output_location / filename)
     
-    # Delete the existing file if it exists
-    if os.path.exists(output_file):
+    # Delete the existing file if it exists, unless it is resumed
+    if resume:
+        manifest_header, _ = read_manifest(f"{output_file}{MANIFEST_SUFFIX}")
+        chunk_size = chunk_size or (manifest_header or {}).get("chunk_size")
+    elif os.path.exists(output_file):
         os.remove(output_file)
-    # Split DataFrame into chunks
-    NUM_CHUNKS = 5
-    CHUNK_SIZE = len(df) // NUM_CHUNKS
-    NUM_WORKERS = 5
 
-    chunks = chunk_generator(df, CHUNK_SIZE, NUM_CHUNKS)
+    df = None
+    if stream:
+        sample_df = next(iter_large_dataframe(num_rows, num_cols, AUTOTUNE_SAMPLE_ROWS, dtype_backend=dtype_backend), None)
+    else:
+        df = create_large_dataframe(num_rows, num_cols, dtype_backend=dtype_backend)
+        logger.info(f"Created DataFrame with {len(df)} rows and {len(df.columns)} columns.")
+        sample_df = df.iloc[:AUTOTUNE_SAMPLE_ROWS]
 
+    if (chunk_size is None or num_workers is None) and sample_df is not None:
+        tuned_chunk_size, tuned_num_workers = autotune(sample_df, num_rows, fmt, target_chunk_mb)
+        chunk_size = chunk_size or tuned_chunk_size
+        num_workers = num_workers or tuned_num_workers
+    chunk_size = max(chunk_size or 1, 1)
+    num_workers = max(num_workers or 1, 1)
+    num_chunks = math.ceil(num_rows / chunk_size)
+    logger.info(f"Writing {num_rows} rows as {num_chunks} chunks of up to {chunk_size} rows with {num_workers} workers.")
+
+    # Split DataFrame into chunks
+    if stream:
+        chunks = iter_large_dataframe(num_rows, num_cols, chunk_size, dtype_backend=dtype_backend)
+    else:
+        chunks = chunk_generator(df, chunk_size, num_chunks)
 
-    write_to_file(output_file, chunks,NUM_WORKERS)
+    manifest_info = {
+        "num_rows": num_rows,
+        "num_cols": num_cols,
+        "chunk_size": chunk_size,
+        "dtype_backend": dtype_backend,
+        "stream": stream,
+    }
+    write_to_file(
+        output_file, chunks, num_workers, backend=backend, fmt=fmt, resume=resume, manifest_info=manifest_info
+    )
 
 
+def cli(argv=None, prog=None):
+    """
+    Runs the export from command-line arguments, see `get_args`.
+    """
+    args = get_args(argv, prog)
+    main(
+        args.filename,
+        args.output_location,
+        args.backend,
+        args.format,
+        args.dtype_backend,
+        args.num_rows,
+        args.num_cols,
+        args.stream,
+        args.chunk_size,
+        args.num_workers,
+        args.target_chunk_mb,
+        args.resume,
+        args.log_file,
+        args.multiprocess_logging,
+    )
+    if args.metrics_file:
+        write_metrics(args.metrics_file)
+
 
 if __name__ == "__main__":
-    args = get_args()
-    main(args.filename, args.output_location)
+    cli()
@@ -1,90 +1,284 @@
+import codecs
+import mmap
 import multiprocessing as mp
-import time
 import os
 import argparse
 from pathlib import Path
-import functools
-import time
+import contextlib
+import zlib
+
+from perceive_py.instrumentation import instrument
+from perceive_py.line_transforms import (
+    STAGE_KINDS,
+    apply_stages,
+    initial_aggregates,
+    load_stages,
+    merge_aggregates,
+)
+from perceive_py.utils import lazy_import
+
+np = lazy_import("numpy")
 
 
 LINE_DELIMITER = "\n"
+SCAN_BLOCK_BYTES = 1 << 24
+BOUNDARY_BLOCK_BYTES = 1 << 16
+BATCH_LINES = 4096
 
 
-def timer(func):
-    @functools.wraps(func)
-    def wrapper_timer(*args, **kwargs):
-        tic = time.perf_counter()
-        value = func(*args, **kwargs)
-        toc = time.perf_counter()
-        elapsed_time = toc - tic
-        print(f"Elapsed time: {elapsed_time:0.4f} seconds")
-        return value
+def as_delimiter(line_delimiter):
+    if isinstance(line_delimiter, str):
+        line_delimiter = line_delimiter.encode()
+    if not line_delimiter:
+        raise ValueError("line delimiter must not be empty")
+    return line_delimiter
 
-    return wrapper_timer
 
+def line_offsets(buffer, chunk_start, chunk_end, line_delimiter=LINE_DELIMITER):
+    """
+    Finds the lines of `buffer[chunk_start:chunk_end]` without copying or decoding them.
 
-def process_line(line):
-    return line
+    The range is scanned in `SCAN_BLOCK_BYTES` windows of NumPy views over the
+    buffer. Multi-byte delimiters such as `\r\n` are matched on their last byte
+    and then checked backwards, with the window reaching back far enough to see
+    a delimiter that straddles two windows. Each line keeps its delimiter; a
+    trailing line without one is returned as well.
 
+    Returns:
+        tuple: int64 arrays with the absolute offset and the length of every line.
+    """
+    delimiter = as_delimiter(line_delimiter)
+    overlap = len(delimiter) - 1
+    ends = []
+    for window_start in range(chunk_start, chunk_end, SCAN_BLOCK_BYTES):
+        window_end = min(window_start + SCAN_BLOCK_BYTES, chunk_end)
+        view_start = max(chunk_start, window_start - overlap)
+        window = np.frombuffer(buffer, dtype=np.uint8, count=window_end - view_start, offset=view_start)
+        hits = np.flatnonzero(window[window_start - view_start:] == delimiter[-1]) + (window_start - view_start)
+        for k in range(1, len(delimiter)):
+            hits = hits[hits >= k]
+            hits = hits[window[hits - k] == delimiter[-1 - k]]
+        ends.append(hits + (view_start + 1))
+        del window
+    ends = np.concatenate(ends) if ends else np.empty(0, dtype=np.int64)
+    if chunk_end > chunk_start and (len(ends) == 0 or ends[-1] != chunk_end):
+        ends = np.append(ends, chunk_end)
+    ends = ends.astype(np.int64, copy=False)
+    offsets = np.empty_like(ends)
+    offsets[:1] = chunk_start
+    offsets[1:] = ends[:-1]
+    return offsets, ends - offsets
 
-def process_chunk(file_name, chunk_start, chunk_end):
-    chunk_results = []
-    with open(file_name, "r") as f:
-        # Moving stream position to `chunk_start`
-        f.seek(chunk_start)
 
-        # Read and process lines until `chunk_end`
-        for line in f:
-            chunk_start += len(line)
-            if chunk_start > chunk_end:
-                break
-            chunk_results.append(process_line(line))
-    return chunk_results
+def iter_lines(buffer, offsets, lengths):
+    """
+    Yields a zero-copy `memoryview` of every line described by `offsets` and `lengths`.
+    """
+    view = memoryview(buffer)
+    try:
+        for offset, length in zip(offsets.tolist(), lengths.tolist()):
+            yield view[offset:offset + length]
+    finally:
+        view.release()
 
 
-def is_line_start(file_ctx, position, line_delimiter):
-    if position == 0:
-        return True
-    # check if last character is EOL
-    file_ctx.seek(position - 1)
-    return file_ctx.read(1) == line_delimiter
+def find_line_start(file_ctx, position, lower_bound, file_size, line_delimiter=LINE_DELIMITER):
+    """
+    Resolves a candidate chunk boundary to the nearest line start.
 
+    Reads `BOUNDARY_BLOCK_BYTES` blocks backwards from `position` and looks for
+    the last delimiter with `bytes.rfind`, so one boundary costs a few reads
+    instead of one `seek`/`read(1)` pair per byte. If no line starts in
+    `(lower_bound, position]`, i.e. the chunk is smaller than the line, the
+    search continues forwards to the end of that line.
 
-def seek_next_line(file_ctx, position):
-    file_ctx.seek(position)
-    file_ctx.readline()
-    return file_ctx.tell()
+    Returns:
+        int: The offset just past the delimiter, or `file_size` if there is none.
+    """
+    delimiter = as_delimiter(line_delimiter)
+    if position >= file_size:
+        return file_size
+    block_end = position
+    while block_end > lower_bound:
+        block_start = max(lower_bound, block_end - BOUNDARY_BLOCK_BYTES)
+        file_ctx.seek(block_start)
+        index = file_ctx.read(block_end - block_start).rfind(delimiter)
+        if index != -1:
+            return block_start + index + len(delimiter)
+        if block_start == lower_bound:
+            break
+        # let the next block see a delimiter that straddles the two blocks
+        block_end = block_start + len(delimiter) - 1
 
+    block_start = max(lower_bound, position - len(delimiter) + 1)
+    while block_start < file_size:
+        file_ctx.seek(block_start)
+        block = file_ctx.read(BOUNDARY_BLOCK_BYTES)
+        index = block.find(delimiter)
+        if index != -1:
+            return block_start + index + len(delimiter)
+        block_start += max(len(block) - len(delimiter) + 1, 1)
+    return file_size
 
-def read_parallel(filename):
-    no_of_cpus = mp.cpu_count()
+
+def plan_chunks(filename, num_chunks=None, line_delimiter=LINE_DELIMITER):
+    """
+    Splits a file into about `num_chunks` ranges that start and end on line boundaries.
+
+    Returns:
+        list: `(filename, chunk_start, chunk_end)` tuples covering the whole file.
+    """
+    num_chunks = num_chunks or mp.cpu_count()
     file_size = os.path.getsize(filename)
-    chunk_size = file_size // no_of_cpus
+    chunk_size = max(file_size // num_chunks, 1)
     chunk_args = []
-    chunk_results = []
     print("Chunk size", chunk_size)
-    with open(filename, "r") as file_ctx:
+    with open(filename, "rb") as file_ctx:
         chunk_start = 0
         while chunk_start < file_size:
-            chunk_end = min(file_size, chunk_start + chunk_size)
-            while not is_line_start(file_ctx, chunk_end, line_delimiter=LINE_DELIMITER):
-                chunk_end -= 1
-            # edge case if chunk size < line
-            if chunk_start == chunk_end:
-                chunk_end = seek_next_line(file_ctx, chunk_end)
-
+            chunk_end = find_line_start(
+                file_ctx, chunk_start + chunk_size, chunk_start, file_size, line_delimiter=line_delimiter
+            )
             chunk_args.append((filename, chunk_start, chunk_end))
             chunk_start = chunk_end
-    with mp.Pool(no_of_cpus) as p:
-        chunk_results = p.starmap(process_chunk, chunk_args)
-    return chunk_results
+    return chunk_args
+
+
+def write_part(
+    file_name,
+    output_location,
+    partno,
+    chunk_start,
+    chunk_end,
+    line_delimiter=LINE_DELIMITER,
+    stage_specs=(),
+    write_output=True,
+):
+    """
+    Processes one chunk in a worker and writes it straight to its part file.
+
+    Without transform stages the chunk is copied to the part file in a single
+    write. Otherwise lines are handed to the stages (see `line_transforms`) in
+    batches of `BATCH_LINES`, and the lines that survive are written.
+
+    Returns:
+        dict: Part metadata with `partno`, `output_filename` (None when output
+        is disabled), `lines_in`, `lines`, `bytes`, the CRC-32 `checksum` of the
+        written bytes and the partial `aggregates`, instead of the lines themselves.
+    """
+    stages = load_stages(stage_specs)
+    aggregates = initial_aggregates(stages)
+    output_filename = get_output_filename(output_location, file_name, partno) if write_output else None
+    lines_in = lines = nbytes = checksum = 0
+    with open(output_filename, "wb") if write_output else contextlib.nullcontext() as out_ctx:
+        if chunk_end > chunk_start:
+            with open(file_name, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                offsets, lengths = line_offsets(mm, chunk_start, chunk_end, line_delimiter)
+                lines_in = len(offsets)
+                if not stages:
+                    lines = lines_in
+                    with memoryview(mm)[chunk_start:chunk_end] as data:
+                        if write_output:
+                            out_ctx.write(data)
+                        checksum = zlib.crc32(data)
+                        nbytes = len(data)
+                for batch_start in range(0, lines_in if stages else 0, BATCH_LINES):
+                    batch_end = batch_start + BATCH_LINES
+                    batch = [
+                        mm[offset:offset + length]
+                        for offset, length in zip(
+                            offsets[batch_start:batch_end].tolist(), lengths[batch_start:batch_end].tolist()
+                        )
+                    ]
+                    batch = apply_stages(stages, batch, aggregates)
+                    data = b"".join(batch)
+                    if write_output:
+                        out_ctx.write(data)
+                    checksum = zlib.crc32(data, checksum)
+                    lines += len(batch)
+                    nbytes += len(data)
+    return {
+        "partno": partno,
+        "output_filename": str(output_filename) if write_output else None,
+        "lines_in": lines_in,
+        "lines": lines,
+        "bytes": nbytes,
+        "checksum": checksum,
+        "aggregates": aggregates,
+    }
+
+
+def run_write_part(task):
+    return write_part(*task)
+
 
+def write_parts(
+    chunk_args, output_location, line_delimiter=LINE_DELIMITER, num_workers=None, stage_specs=(), write_output=True
+):
+    """
+    Writes every planned chunk to its own part file in a process pool.
 
-def get_args():
-    parser = argparse.ArgumentParser()
+    Yields:
+        dict: The metadata of each part as soon as it is written, in completion order.
+    """
+    tasks = [
+        (name, output_location, partno, chunk_start, chunk_end, line_delimiter, tuple(stage_specs), write_output)
+        for partno, (name, chunk_start, chunk_end) in enumerate(chunk_args)
+    ]
+    with mp.Pool(num_workers or mp.cpu_count()) as p:
+        yield from p.imap_unordered(run_write_part, tasks)
+
+
+def read_parallel(
+    filename, output_location, line_delimiter=LINE_DELIMITER, stage_specs=(), write_output=True, on_part=None
+):
+    """
+    Splits `filename` into part files, running the transform stages given as `(kind, dotted_path)` specs.
+
+    Args:
+        on_part (callable, optional): Called with the metadata of every part as soon as it is
+            written, its rank in completion order and the number of parts. Defaults to None.
+
+    Returns:
+        tuple: The part metadata in part order and the merged aggregates as `{dotted_path: result}`.
+    """
+    stages = load_stages(stage_specs)  # fail fast on a bad plugin path
+    no_of_cpus = mp.cpu_count()
+    chunk_args = plan_chunks(filename, no_of_cpus, line_delimiter)
+    parts = []
+    for done, part in enumerate(
+        write_parts(chunk_args, output_location, line_delimiter, no_of_cpus, stage_specs, write_output), 1
+    ):
+        if on_part is not None:
+            on_part(part, done, len(chunk_args))
+        parts.append(part)
+    parts.sort(key=lambda part: part["partno"])
+    aggregates = merge_aggregates(stages, [part["aggregates"] for part in parts])
+    return parts, aggregates
+
+
+def get_args(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog)
     parser.add_argument("filename", help=" Enter filename")
     parser.add_argument("output_location", help=" Enter output directory")
-    args = parser.parse_args()
+    parser.add_argument(
+        "--line_delimiter",
+        type=lambda value: codecs.decode(value, "unicode_escape"),
+        default=LINE_DELIMITER,
+        help=r" Enter line delimiter, e.g. \r\n",
+    )
+    for kind in STAGE_KINDS:
+        parser.add_argument(
+            f"--{kind}",
+            dest="stages",
+            action="append",
+            default=[],
+            type=lambda path, kind=kind: (kind, path),
+            metavar="DOTTED_PATH",
+            help=f" Add a {kind} stage, e.g. perceive_py.line_transforms.LineCount",
+        )
+    parser.add_argument("--no_output", action="store_true", help=" Do not write part files")
+    args = parser.parse_args(argv)
     return args
 
 
@@ -99,17 +293,33 @@ def get_output_filename(output_location, filename, partno):
     return output_path
 
 
-@timer
-def main(filename, output_location):
-    chunk_results = read_parallel(filename)
-    for partno, result in enumerate(chunk_results):
-        output_filename = get_output_filename(output_location, filename, partno)
-        with open(output_filename, "w") as out_ctx:
-            for chunk in result:
-                out_ctx.write(chunk)
-            print("Chunk ", partno, "written to", output_filename)
+def print_elapsed(measurement):
+    print(f"Elapsed time: {measurement.wall:0.4f} seconds")
+
+
+def print_part(part, done, num_parts):
+    print(
+        "Chunk ", part["partno"], "written to", part["output_filename"],
+        f"[{done}/{num_parts}] lines={part['lines']} bytes={part['bytes']} crc32={part['checksum']:08x}",
+    )
+
+
+@instrument("read_parallel.main", process_cpu=True, report=print_elapsed)
+def main(filename, output_location, line_delimiter=LINE_DELIMITER, stage_specs=(), write_output=True):
+    parts, aggregates = read_parallel(
+        filename, output_location, line_delimiter, stage_specs, write_output, on_part=print_part
+    )
+    total_lines = sum(part["lines"] for part in parts)
+    total_bytes = sum(part["bytes"] for part in parts)
+    print("Wrote", total_lines, "lines and", total_bytes, "bytes in", len(parts), "parts")
+    for name, result in aggregates.items():
+        print(name, "=", result)
+
+
+def cli(argv=None, prog=None):
+    args = get_args(argv, prog)
+    main(args.filename, args.output_location, args.line_delimiter, args.stages, not args.no_output)
 
 
 if __name__ == "__main__":
-    args = get_args()
-    main(args.filename, args.output_location)
+    cli()
@@ -1,15 +1,39 @@
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import threading
 import time
-import httpx
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Optional
+
+from perceive_py.utils import atomic_write, lazy_import, load_lazy_modules
+
+httpx = lazy_import("httpx")
 
 POP20_CC = ("CN IN US ID BR PK NG BD RU JP MX PH VN ET EG DE IR TR CD FR").split()
-BASE_URL = "https://www.fluentpython.com/data/flags"
+BASE_URL = os.environ.get("FLAGS_BASE_URL", "https://www.fluentpython.com/data/flags")
 DEST_DIR = Path("downloaded")
+DOWNLOADERS = {
+    "sequential": "perceive_py.sequential_downloads",
+    "threadpool": "perceive_py.flags_threadpool",
+    "threadpool_futures": "perceive_py.flags_threadpool_futures",
+    "threadpool_process": "perceive_py.flags_threadpool_process",
+    "asyncio": "perceive_py.flags_asyncio",
+    "cache": "perceive_py.flag_cache",
+}
+STREAM_BUFFER_BYTES = 64 * 1024
+PART_SUFFIX = ".part"
+
+
+class ChecksumMismatch(Exception):
+    pass
 
 
 def save_flag(img: bytes, filename: str) -> None:
-    (DEST_DIR / filename).write_bytes(img)
+    atomic_write(DEST_DIR / filename, img)
 
 
 def get_flag(cc: str) -> bytes:
@@ -27,13 +51,206 @@ def download_many(cc_list: list[str]) -> int:
     return len(cc_list)
 
 
+def part_path(dest: Path) -> Path:
+    return dest.with_name(dest.name + PART_SUFFIX)
+
+
+def file_digest(path: Path, chunk_size: int = STREAM_BUFFER_BYTES, digest=None):
+    """
+    Hashes a file through one reused buffer.
+
+    Args:
+        path (Path): The file to hash.
+        chunk_size (int, optional): Buffer size in bytes. Defaults to `STREAM_BUFFER_BYTES`.
+        digest (hashlib hash, optional): Hash to update. Defaults to a new SHA-256.
+
+    Returns:
+        The updated hash object.
+    """
+    digest = digest or hashlib.sha256()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, "rb") as file_ctx:
+        while size := file_ctx.readinto(buffer):
+            digest.update(view[:size])
+    return digest
+
+
+def probe_size(client: "httpx.Client", url: str) -> Optional[int]:
+    """
+    Returns the size of `url` if the server accepts byte ranges for it, else None.
+    """
+    resp = client.head(url)
+    resp.raise_for_status()
+    if resp.headers.get("Accept-Ranges") != "bytes" or "Content-Length" not in resp.headers:
+        return None
+    return int(resp.headers["Content-Length"])
+
+
+def stream_to_part(client: "httpx.Client", url: str, part: Path, chunk_size: int, verify: bool):
+    """
+    Streams `url` into `part`, continuing from its current size with a Range request.
+
+    A server that ignores the range answers 200 and the file is rewritten from the
+    start; a 416 for a range starting at the end means the part is already complete.
+
+    Returns:
+        The SHA-256 of the whole file if `verify`, else None.
+    """
+    offset = part.stat().st_size if part.exists() else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+    with client.stream("GET", url, headers=headers) as resp:
+        if resp.status_code == 416 and resp.headers.get("Content-Range") == f"bytes */{offset}":
+            return file_digest(part, chunk_size) if verify else None
+        resp.raise_for_status()
+        if resp.status_code != 206:
+            offset = 0
+        digest = None
+        if verify:
+            digest = file_digest(part, chunk_size) if offset else hashlib.sha256()
+        with open(part, "ab" if offset else "wb") as part_ctx:
+            for chunk in resp.iter_bytes(chunk_size):
+                part_ctx.write(chunk)
+                if digest is not None:
+                    digest.update(chunk)
+    return digest
+
+
+def fetch_range(client: "httpx.Client", url: str, part: Path, start: int, end: int, chunk_size: int) -> None:
+    """
+    Streams bytes `start` to `end` (inclusive) of `url` into the same offsets of `part`.
+    """
+    with client.stream("GET", url, headers={"Range": f"bytes={start}-{end}"}) as resp:
+        resp.raise_for_status()
+        if resp.status_code != 206 or not resp.headers.get("Content-Range", "").startswith(f"bytes {start}-{end}/"):
+            raise httpx.RemoteProtocolError(f"Server ignored range {start}-{end} of {url}", request=resp.request)
+        with open(part, "r+b") as part_ctx:
+            part_ctx.seek(start)
+            for chunk in resp.iter_bytes(chunk_size):
+                part_ctx.write(chunk)
+
+
+def parallel_to_part(client: "httpx.Client", url: str, part: Path, size: int, parts: int, chunk_size: int) -> None:
+    """
+    Fetches `url` as `parts` byte ranges in parallel into a preallocated `part`.
+
+    Finished ranges are recorded in a `<part>.json` progress file, so a retry only
+    fetches the ranges that did not complete.
+    """
+    bounds = [size * index // parts for index in range(parts + 1)]
+    ranges = [(start, end - 1) for start, end in zip(bounds, bounds[1:]) if end > start]
+    progress = part.with_name(part.name + ".json")
+    try:
+        state = json.loads(progress.read_text())
+        done = set(state["done"]) if state["size"] == size and part.exists() else set()
+    except (OSError, ValueError, KeyError):
+        done = set()
+    if not done:
+        with open(part, "wb") as part_ctx:
+            part_ctx.truncate(size)
+    lock = threading.Lock()
+
+    def fetch(index):
+        fetch_range(client, url, part, *ranges[index], chunk_size)
+        with lock:
+            done.add(index)
+            atomic_write(progress, json.dumps({"size": size, "done": sorted(done)}).encode())
+
+    with ThreadPoolExecutor(max_workers=parts) as executor:
+        list(executor.map(fetch, [index for index in range(len(ranges)) if index not in done]))
+    progress.unlink(missing_ok=True)
+
+
+def stream_download(
+    url: str,
+    dest: Path,
+    sha256: Optional[str] = None,
+    parts: int = 1,
+    retries: int = 3,
+    chunk_size: int = STREAM_BUFFER_BYTES,
+    client: Optional["httpx.Client"] = None,
+) -> Path:
+    """
+    Downloads `url` to `dest` without holding the body in memory.
+
+    The body is streamed through `chunk_size` buffers into `<dest>.part`, which is
+    renamed to `dest` only once complete and, if `sha256` is given, verified.
+    After a transport error the download resumes from the `.part` file with a
+    Range request, up to `retries` times, and a later call resumes the same way.
+
+    Args:
+        url (str): The URL to download.
+        dest (Path): The destination file.
+        sha256 (str, optional): Expected hex SHA-256 of the body. Defaults to None (not checked).
+        parts (int, optional): Number of byte ranges fetched in parallel when the server
+            supports ranges. Defaults to 1 (a single stream).
+        retries (int, optional): Resumes after transport errors. Defaults to 3.
+        chunk_size (int, optional): Buffer size in bytes. Defaults to `STREAM_BUFFER_BYTES`.
+        client (httpx.Client, optional): Client to use. Defaults to a new one, closed on return.
+
+    Returns:
+        Path: `dest`.
+
+    Raises:
+        ChecksumMismatch: The body does not match `sha256`; the `.part` file is removed.
+    """
+    dest = Path(dest)
+    part = part_path(dest)
+    owns_client = client is None
+    client = client or httpx.Client(timeout=6.1, follow_redirects=True)
+    try:
+        size = probe_size(client, url) if parts > 1 else None
+        for attempt in range(retries + 1):
+            try:
+                if size:
+                    parallel_to_part(client, url, part, size, min(parts, size), chunk_size)
+                    digest = file_digest(part, chunk_size) if sha256 else None
+                else:
+                    digest = stream_to_part(client, url, part, chunk_size, verify=sha256 is not None)
+                break
+            except httpx.TransportError:
+                if attempt == retries:
+                    raise
+    finally:
+        if owns_client:
+            client.close()
+    if sha256 is not None and digest.hexdigest() != sha256.lower():
+        part.unlink()
+        raise ChecksumMismatch(f"{url}: expected sha256 {sha256}, got {digest.hexdigest()}")
+    os.replace(part, dest)
+    return dest
+
+
 def main(downloader: Callable[[list[str]], int]) -> None:
     DEST_DIR.mkdir(exist_ok=True)
+    # The threaded strategies must not be the first to touch the lazily imported httpx
+    load_lazy_modules()
     t0 = time.perf_counter()
     count = downloader(POP20_CC)
     elapsed = time.perf_counter() - t0
     print(f"\n{count} downloads in {elapsed:.2f}s")
 
 
+def get_args(argv: Optional[list[str]] = None, prog: Optional[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog=prog, description="Download the top 20 flags.")
+    parser.add_argument("--strategy", choices=DOWNLOADERS, default="sequential", help=" Enter download strategy")
+    parser.add_argument("--base_url", default=BASE_URL, help=" Enter flags server URL")
+    parser.add_argument("--dest_dir", type=Path, default=DEST_DIR, help=" Enter directory to save flags in")
+    return parser.parse_args(argv)
+
+
+def cli(argv: Optional[list[str]] = None, prog: Optional[str] = None) -> None:
+    """
+    Runs `main` with the strategy chosen on the command line. The settings go on
+    the imported module, which is what every strategy reads, even when this file
+    runs as `__main__`.
+    """
+    args = get_args(argv, prog)
+    settings = importlib.import_module("perceive_py.sequential_downloads")
+    settings.BASE_URL = args.base_url
+    settings.DEST_DIR = args.dest_dir
+    settings.main(importlib.import_module(DOWNLOADERS[args.strategy]).download_many)
+
+
 if __name__ == "__main__":
-    main(download_many)
+    cli()
@@ -0,0 +1,188 @@
+# Sinks that take synthetic data column buffers chunk by chunk, see create_synthetic_data.generate_to
+import csv
+import os
+import sqlite3
+
+from perceive_py.chunk_formats import NpzChunkSink, import_pyarrow
+from perceive_py.field_generators import apply_nulls, arrow_strings
+from perceive_py.utils import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+SQLITE_TYPES = {'b': 'INTEGER', 'i': 'INTEGER', 'u': 'INTEGER', 'f': 'REAL'}
+
+
+def column_values(values, mask):
+    """
+    Convert a column buffer into a list of Python values, with None for null rows.
+    Only the sinks that hand rows to Python APIs (csv, sqlite3) box the values.
+
+    :param values: NumPy array of values.
+    :param mask: Boolean NumPy array of null rows, or None.
+    :return: List of values.
+    """
+    if values.dtype.kind in 'MS':
+        values = values.astype(str)
+    values = values.tolist()
+    if mask is not None:
+        for row in np.flatnonzero(mask).tolist():
+            values[row] = None
+    return values
+
+
+class DataFrameSink:
+    """
+    Collects the chunks and builds one pandas DataFrame when closed.
+
+    Values and null masks are concatenated per column first, so pandas only
+    sees one array per column.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._masks = {}
+
+    def write(self, chunk_id, columns):
+        for name, (values, mask) in columns.items():
+            self._values.setdefault(name, []).append(values)
+            self._masks.setdefault(name, []).append(mask)
+
+    def close(self):
+        data = {}
+        for name, chunks in self._values.items():
+            masks = self._masks[name]
+            values = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+            if all(mask is None for mask in masks):
+                mask = None
+            else:
+                mask = np.concatenate([np.zeros(len(v), dtype=bool) if m is None else m for v, m in zip(chunks, masks)])
+            data[name] = apply_nulls(values, mask)
+        return pd.DataFrame(data)
+
+
+class CsvSink:
+    """
+    Appends the chunks as CSV rows, with a header line and empty fields for nulls.
+    """
+
+    def __init__(self, output_file):
+        self._output_file = output_file
+        self._file = open(output_file, 'w', newline='')
+        self._writer = csv.writer(self._file, lineterminator='\n')
+        self._header = False
+
+    def write(self, chunk_id, columns):
+        if not self._header:
+            self._writer.writerow(columns.keys())
+            self._header = True
+        self._writer.writerows(zip(*(column_values(values, mask) for values, mask in columns.values())))
+
+    def close(self):
+        self._file.close()
+        return os.path.getsize(self._output_file)
+
+
+class ParquetSink:
+    """
+    Writes every chunk as one Parquet row group. Needs pyarrow.
+    """
+
+    def __init__(self, output_file):
+        self._pa = import_pyarrow()
+        self._output_file = output_file
+        self._writer = None
+
+    def write(self, chunk_id, columns):
+        table = self._pa.table(
+            {
+                name: arrow_strings(values, mask) if values.dtype.kind in 'SU' else self._pa.array(values, mask=mask)
+                for name, (values, mask) in columns.items()
+            }
+        )
+        if self._writer is None:
+            import pyarrow.parquet as pq
+
+            self._writer = pq.ParquetWriter(self._output_file, table.schema)
+        self._writer.write_table(table, row_group_size=max(table.num_rows, 1))
+
+    def close(self):
+        if self._writer is None:
+            return 0
+        self._writer.close()
+        return os.path.getsize(self._output_file)
+
+
+class NpzSink:
+    """
+    Stores every column of every chunk as `chunk_<id>/<column>.npy` in an `.npz`
+    archive, plus a `chunk_<id>/<column>.mask.npy` boolean array for chunks with nulls.
+    ASCII string columns are stored as unicode arrays, so they load as str.
+    """
+
+    def __init__(self, output_file):
+        self._sink = NpzChunkSink(output_file)
+
+    def write(self, chunk_id, columns):
+        arrays = {}
+        for name, (values, mask) in columns.items():
+            arrays[name] = values.astype(f'U{values.dtype.itemsize}') if values.dtype.kind == 'S' else values
+            if mask is not None:
+                arrays[f'{name}.mask'] = mask
+        self._sink.write(chunk_id, arrays)
+
+    def close(self):
+        return self._sink.close()
+
+
+class SqliteSink:
+    """
+    Inserts the chunks into a SQLite table, created from the first chunk's
+    column types. Integers and booleans become INTEGER, floats REAL and
+    everything else TEXT, with dates as ISO strings.
+
+    Like the other sinks it replaces an existing output file, so running an
+    export again does not append to the old rows, and `close()` returns the
+    size of a database holding only this table.
+    """
+
+    def __init__(self, output_file, table_name='data'):
+        self._output_file = output_file
+        self._table_name = table_name
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        self._connection = sqlite3.connect(output_file)
+        self._created = False
+
+    def write(self, chunk_id, columns):
+        if not self._created:
+            column_defs = ', '.join(
+                f'"{name}" {SQLITE_TYPES.get(values.dtype.kind, "TEXT")}' for name, (values, _) in columns.items()
+            )
+            self._connection.execute(f'CREATE TABLE "{self._table_name}" ({column_defs})')
+            self._created = True
+        placeholders = ', '.join('?' * len(columns))
+        rows = zip(*(column_values(values, mask) for values, mask in columns.values()))
+        self._connection.executemany(f'INSERT INTO "{self._table_name}" VALUES ({placeholders})', rows)
+
+    def close(self):
+        self._connection.commit()
+        self._connection.close()
+        return os.path.getsize(self._output_file)
+
+
+SINK_SUFFIXES = {'.csv': CsvSink, '.parquet': ParquetSink, '.npz': NpzSink, '.db': SqliteSink, '.sqlite': SqliteSink}
+
+
+def open_sink(output_file):
+    """
+    Open the sink for `output_file`, chosen by its suffix (see `SINK_SUFFIXES`).
+
+    :param output_file: Path of the output file.
+    :return: The sink.
+    :raises ValueError: For a suffix without a sink.
+    """
+    suffix = os.path.splitext(output_file)[1].lower()
+    if suffix not in SINK_SUFFIXES:
+        raise ValueError(f'Unsupported output suffix: {suffix!r}, expected one of {sorted(SINK_SUFFIXES)}')
+    return SINK_SUFFIXES[suffix](output_file)
@@ -1,4 +1,13 @@
+import importlib.util
+import os
+import random
+import stat
+import sys
+import tempfile
+import threading
+import time
 from functools import wraps
+from pathlib import Path
 
 
 class ControlledException(Exception):
@@ -6,32 +15,366 @@ class ControlledException(Exception):
 
 
 DEFAULT_LIMIT = 3
+DEFAULT_BASE_DELAY = 0.1
+DEFAULT_MAX_DELAY = 10.0
 
 
-def with_retry(limit=DEFAULT_LIMIT, allow_exceptions=None):
+class CircuitOpenError(Exception):
+    pass
+
+
+class RetryStats:
+    """
+    Thread-safe counters of a retry policy: calls, attempts, retries, give-ups,
+    calls rejected by an open circuit and seconds spent sleeping between attempts.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.give_ups = 0
+        self.rejected = 0
+        self.sleep_seconds = 0.0
+
+    def add(self, **counts):
+        with self._lock:
+            for name, count in counts.items():
+                setattr(self, name, getattr(self, name) + count)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "attempts": self.attempts,
+                "retries": self.retries,
+                "give_ups": self.give_ups,
+                "rejected": self.rejected,
+                "sleep_seconds": self.sleep_seconds,
+            }
+
+
+class RetryBudget:
+    """
+    A retry budget shared across threads, so retries stay a bounded fraction of
+    the traffic when a dependency is down instead of multiplying it.
+
+    Every call deposits `ratio` tokens and every retry withdraws one; retries are
+    refused while the balance is below one.
+
+    Args:
+        ratio (float): Tokens deposited per call, i.e. the sustained retries per call. Defaults to 0.2.
+        initial (float): Starting balance, which lets a few retries through before any call. Defaults to 10.
+        capacity (float): Maximum balance. Defaults to 100.
+    """
+
+    def __init__(self, ratio=0.2, initial=10.0, capacity=100.0):
+        self.ratio = ratio
+        self.capacity = capacity
+        self._tokens = min(initial, capacity)
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self) -> float:
+        return self._tokens
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self._tokens + self.ratio, self.capacity)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class CircuitBreaker:
+    """
+    A circuit breaker keeping one circuit per target.
+
+    A circuit opens after `failure_threshold` consecutive failures and rejects
+    calls with `CircuitOpenError` for `reset_timeout` seconds. After that one
+    trial call is let through (half-open): success closes the circuit, failure
+    opens it again, and any other outcome (see `release`) lets the next call be
+    the trial.
+
+    Args:
+        failure_threshold (int): Consecutive failures that open a circuit. Defaults to 5.
+        reset_timeout (float): Seconds an open circuit rejects calls. Defaults to 30.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = {}
+        self._opened_at = {}
+        self._trial = set()
+        self._lock = threading.Lock()
+
+    def state(self, target) -> str:
+        with self._lock:
+            if target not in self._opened_at:
+                return "closed"
+            if time.monotonic() - self._opened_at[target] < self.reset_timeout:
+                return "open"
+            return "half-open"
+
+    def allow(self, target) -> bool:
+        with self._lock:
+            opened_at = self._opened_at.get(target)
+            if opened_at is None:
+                return True
+            if time.monotonic() - opened_at < self.reset_timeout or target in self._trial:
+                return False
+            self._trial.add(target)
+            return True
+
+    def record_success(self, target) -> None:
+        with self._lock:
+            self._failures.pop(target, None)
+            self._opened_at.pop(target, None)
+            self._trial.discard(target)
+
+    def record_failure(self, target) -> None:
+        with self._lock:
+            self._failures[target] = self._failures.get(target, 0) + 1
+            if target in self._trial or self._failures[target] >= self.failure_threshold:
+                self._opened_at[target] = time.monotonic()
+            self._trial.discard(target)
+
+    def release(self, target) -> None:
+        """
+        Ends a call that neither succeeded nor failed in the breaker's sense, e.g.
+        one cancelled or raising an exception that is not counted, without
+        changing the state. A half-open circuit takes the next call as its trial.
+        """
+        with self._lock:
+            self._trial.discard(target)
+
+
+def backoff_delay(retry, base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY) -> float:
+    """
+    Exponential backoff with full jitter: a uniform delay between zero and
+    `base_delay * 2 ** retry`, capped at `max_delay`.
     """
-    A decorator to retry a function multiple times in case of exceptions.
+    return random.uniform(0, min(max_delay, base_delay * 2**retry))
+
+
+def with_retry(
+    limit=DEFAULT_LIMIT,
+    allow_exceptions=None,
+    base_delay=DEFAULT_BASE_DELAY,
+    max_delay=DEFAULT_MAX_DELAY,
+    deadline=None,
+    budget=None,
+    circuit_breaker=None,
+    target=None,
+    stats=None,
+):
+    """
+    A decorator to retry a function multiple times in case of exceptions, for plain and `async def` functions.
+
+    Attempts are spaced by `backoff_delay`. The function is given up on, re-raising the
+    last exception, when `limit` attempts are used, when the next attempt would start
+    after the `deadline`, or when the shared `budget` refuses a retry.
 
     Args:
-        limit (int): The maximum number of retry attempts.
+        limit (int): The maximum number of attempts; values below 1 make a single attempt.
         allow_exceptions (tuple): A tuple of exception classes that are allowed for retry.
+        base_delay (float): Backoff base in seconds; 0 retries immediately.
+        max_delay (float): Cap of a single backoff in seconds.
+        deadline (float): Seconds after the first attempt after which no attempt is started, or None.
+        budget (RetryBudget): Retry budget shared with other functions, or None.
+        circuit_breaker (CircuitBreaker): Breaker counting allowed exceptions as failures, or None.
+        target (Callable): Maps the call arguments to the circuit key; defaults to one circuit per function.
+        stats (RetryStats): Counters to update; defaults to new ones, available as `wrapped.stats`.
 
     Returns:
         Callable: A decorator that retries the function upon encountering allowed exceptions.
+
+    Raises:
+        CircuitOpenError: The circuit for the call's target is open.
     """
     allowed_exceptions = allow_exceptions or (ControlledException,)
+    attempts = max(limit, 1)
 
     def retry(func):
+        import inspect  # deferred, it is slow to import and only needed when decorating
+
+        retry_stats = stats or RetryStats()
+        default_target = getattr(func, "__qualname__", repr(func))
+
+        def start(args, kwargs):
+            retry_stats.add(calls=1)
+            if budget is not None:
+                budget.deposit()
+            return target(*args, **kwargs) if target else default_target
+
+        def check_circuit(key, last_raised):
+            if circuit_breaker is not None and not circuit_breaker.allow(key):
+                retry_stats.add(rejected=1)
+                raise CircuitOpenError(f"Circuit for {key!r} is open") from last_raised
+            retry_stats.add(attempts=1)
+
+        def record(key, success):
+            if circuit_breaker is not None:
+                (circuit_breaker.record_success if success else circuit_breaker.record_failure)(key)
+
+        def release(key):
+            if circuit_breaker is not None:
+                circuit_breaker.release(key)
+
+        def next_delay(attempt, started):
+            """Returns the backoff before the next attempt, or None to give up."""
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            if (
+                attempt + 1 >= attempts
+                or (deadline is not None and time.monotonic() - started + delay > deadline)
+                or (budget is not None and not budget.withdraw())
+            ):
+                retry_stats.add(give_ups=1)
+                return None
+            retry_stats.add(retries=1, sleep_seconds=delay)
+            return delay
+
+        if inspect.iscoroutinefunction(func):
+
+            import asyncio  # only coroutine functions need it, and it is slow to import
+
+            @wraps(func)
+            async def wrapped_async(*args, **kwargs):
+                key = start(args, kwargs)
+                started = time.monotonic()
+                last_raised = None
+                for attempt in range(attempts):
+                    check_circuit(key, last_raised)
+                    try:
+                        result = await func(*args, **kwargs)
+                    except allowed_exceptions as ae:
+                        record(key, False)
+                        delay = next_delay(attempt, started)
+                        if delay is None:
+                            raise
+                        last_raised = ae
+                        await asyncio.sleep(delay)
+                    except BaseException:  # e.g. CancelledError: do not leave a half-open trial taken
+                        release(key)
+                        raise
+                    else:
+                        record(key, True)
+                        return result
+
+            wrapped_async.stats = retry_stats
+            return wrapped_async
+
         @wraps(func)
         def wrapped(*args, **kwargs):
-            for _ in range(limit):
+            key = start(args, kwargs)
+            started = time.monotonic()
+            last_raised = None
+            for attempt in range(attempts):
+                check_circuit(key, last_raised)
                 try:
                     result = func(*args, **kwargs)
-                    return result
                 except allowed_exceptions as ae:
+                    record(key, False)
+                    delay = next_delay(attempt, started)
+                    if delay is None:
+                        raise
                     last_raised = ae
-            raise last_raised
+                    time.sleep(delay)
+                except BaseException:  # e.g. KeyboardInterrupt: do not leave a half-open trial taken
+                    release(key)
+                    raise
+                else:
+                    record(key, True)
+                    return result
 
+        wrapped.stats = retry_stats
         return wrapped
 
     return retry
+
+
+# The umask can only be read by setting it; done once at import, as doing it from a
+# worker thread would race with other threads creating files
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+def atomic_write(path, data: bytes) -> None:
+    """
+    Writes `data` to `path` through a temporary file in the same directory and
+    an `os.replace`, so readers and concurrent writers never see a partial file.
+
+    The file keeps the mode of the file it replaces; a new file gets the mode
+    `open` would give it (0o666 less the umask) rather than mkstemp's 0o600.
+
+    Args:
+        path (str | Path): The destination file.
+        data (bytes): The bytes to write.
+    """
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp_ctx:
+            tmp_ctx.write(data)
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~UMASK
+        os.chmod(tmp_name, mode)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+_lazy_modules = []
+
+
+def lazy_import(name):
+    """
+    Returns module `name`, deferring its import to the first attribute access.
+
+    Meant for heavy dependencies such as numpy and pandas, so importing a module
+    (e.g. to print a command's `--help`) does not load them. Uses
+    `importlib.util.LazyLoader`; a module that is already imported is returned as is.
+
+    The first access is not thread-safe before Python 3.12: a second thread may
+    see the module half loaded. Call `load_lazy_modules` before starting threads.
+
+    Args:
+        name (str): The absolute module name.
+
+    Returns:
+        module: The (lazily loading) module, registered in `sys.modules`.
+
+    Raises:
+        ModuleNotFoundError: If the module cannot be found.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    _lazy_modules.append(module)
+    return module
+
+
+def load_lazy_modules():
+    """
+    Finishes loading every module returned by `lazy_import`, so worker threads
+    only ever see fully loaded modules.
+    """
+    for module in _lazy_modules:
+        # Any attribute access runs the deferred import
+        getattr(module, "__name__")
@@ -0,0 +1,101 @@
+"""
+Unit tests for the `cli` module of the `perceive_py` package.
+"""
+
+import subprocess
+import sys
+import tomllib
+from pathlib import Path
+
+import pytest
+
+from perceive_py import cli, flag_cache, sequential_downloads
+
+HEAVY_MODULES = {"numpy", "pandas", "httpx", "pyarrow"}
+# Import time of the perceive_py modules themselves (the self-time column, so
+# nested modules are counted once) for `perceive --help`; about 5 ms today,
+# numpy alone takes far longer
+HELP_IMPORT_BUDGET_US = 100_000
+PYPROJECT = Path(__file__).parents[2] / "pyproject.toml"
+
+
+def entry_point_script():
+    """
+    Builds what the installed `perceive` script runs from its entry point in pyproject.toml.
+
+    Returns:
+        str: The Python code of the script.
+    """
+    with open(PYPROJECT, "rb") as pyproject_ctx:
+        entry_point = tomllib.load(pyproject_ctx)["tool"]["poetry"]["scripts"]["perceive"]
+    module, function = entry_point.split(":")
+    return f"import sys; from {module} import {function}; sys.exit({function}())"
+
+
+def import_times(*args):
+    """
+    Runs `perceive *args` under `-X importtime`.
+
+    Returns:
+        dict: Import time in microseconds of every module, not counting its own imports, by module name.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", entry_point_script(), *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, _, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(self_us)
+    return times
+
+
+def test_help_import_budget():
+    """
+    test_help_import_budget - Asserts `perceive --help` imports no heavy dependency and stays within its budget
+    """
+    times = import_times("--help")
+    assert not HEAVY_MODULES & times.keys()
+    assert sum(us for name, us in times.items() if name.startswith("perceive_py")) < HELP_IMPORT_BUDGET_US
+
+
+@pytest.mark.parametrize("command", ["large-data", "read-parallel", "synth", "rota", "download"])
+def test_subcommand_help_is_lazy(command):
+    """
+    test_subcommand_help_is_lazy - Asserts a subcommand's --help only imports what the subcommand needs up front
+    """
+    assert not HEAVY_MODULES & import_times(command, "--help").keys()
+
+
+def test_rota(capsys):
+    """
+    test_rota - Asserts arguments after the subcommand reach the subcommand's parser
+    """
+    cli.main(["rota", "--start_date", "2025-03-05", "--rota_days", "4"])
+    assert "Week 0 - 2025-03-10 to 2025-03-14: Alpha and Bravo" in capsys.readouterr().out
+
+
+def test_download(mocker, tmp_path):
+    """
+    test_download - Asserts the download settings are set on `sequential_downloads` and the strategy is used
+    """
+    mocker.patch.object(sequential_downloads, "BASE_URL", sequential_downloads.BASE_URL)
+    mocker.patch.object(sequential_downloads, "DEST_DIR", sequential_downloads.DEST_DIR)
+    main = mocker.patch.object(sequential_downloads, "main")
+    cli.main(["download", "--strategy", "cache", "--base_url", "http://127.0.0.1:1", "--dest_dir", str(tmp_path)])
+    main.assert_called_once_with(flag_cache.download_many)
+    assert sequential_downloads.BASE_URL == "http://127.0.0.1:1"
+    assert sequential_downloads.DEST_DIR == tmp_path
+
+
+def test_unknown_command():
+    """
+    test_unknown_command - Asserts an unknown subcommand exits with a usage error
+    """
+    with pytest.raises(SystemExit) as excinfo:
+        cli.main(["bogus"])
+    assert excinfo.value.code == 2
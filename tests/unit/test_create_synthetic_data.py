@@ -0,0 +1,256 @@
+"""
+Unit tests for the `create_synthetic_data` module in the `perceive_py` package.
+"""
+
+import json
+import os
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from perceive_py import create_synthetic_data
+from perceive_py.create_synthetic_data import (
+    STRING_ALPHABET,
+    STRING_LENGTH,
+    create_sample_source_schema,
+    create_sample_target_schema,
+    generate_combined_data,
+    generate_combined_data_chunked,
+    generate_synthetic_data,
+    handle_mapped_columns,
+)
+from perceive_py.synthetic_sinks import DataFrameSink, open_sink
+
+
+@pytest.fixture
+def schema():
+    return create_sample_source_schema()
+
+
+def test_generate_synthetic_data_numpy(schema):
+    """
+    test_generate_synthetic_data_numpy - Asserts the numpy engine produces typed columns within the legacy ranges
+    """
+    df = generate_synthetic_data(schema, 1000, seed=7)
+    assert list(df.columns) == ["source_id", "source_name", "source_value", "source_boolean"]
+    assert df["source_id"].dtype.kind == "i" and df["source_id"].between(0, 100).all()
+    assert df["source_value"].dtype.kind == "f" and df["source_value"].between(0.0, 100.0).all()
+    assert df["source_boolean"].dtype == bool and df["source_boolean"].nunique() == 2
+    names = df["source_name"]
+    assert names.map(type).eq(str).all()
+    assert names.str.len().eq(STRING_LENGTH).all()
+    assert set("".join(names)) <= set(STRING_ALPHABET)
+
+
+@pytest.mark.parametrize("engine", ["numpy", "python"])
+def test_generate_synthetic_data_reproducible(schema, engine):
+    """
+    test_generate_synthetic_data_reproducible - Asserts the same seed gives the same table and a different seed does not
+    """
+    first = generate_synthetic_data(schema, 500, seed=3, engine=engine)
+    assert first.equals(generate_synthetic_data(schema, 500, seed=3, engine=engine))
+    assert not first.equals(generate_synthetic_data(schema, 500, seed=4, engine=engine))
+
+
+def test_generate_synthetic_data_errors(schema):
+    """
+    test_generate_synthetic_data_errors - Asserts unknown engines and field types are rejected
+    """
+    with pytest.raises(ValueError):
+        generate_synthetic_data(schema, 10, engine="cupy")
+    with pytest.raises(ValueError):
+        generate_synthetic_data({"fields": [{"name": "price", "type": "decimal"}]}, 10)
+
+
+@pytest.fixture
+def schemas():
+    return {
+        "source": {"schema": create_sample_source_schema(), "seed": 7},
+        "target": {"schema": create_sample_target_schema(), "seed": 13},
+    }
+
+
+def test_generate_combined_data_chunked_worker_count(schemas):
+    """
+    test_generate_combined_data_chunked_worker_count - Asserts the tables do not depend on the number of workers
+    and mapped columns match their source for the leading rows
+    """
+    kwargs = dict(mapped_source_and_target_columns={"source_id": "target_id"}, match_fraction=0.4, block_rows=64)
+    one = generate_combined_data_chunked(schemas, 1000, num_workers=1, **kwargs)
+    three = generate_combined_data_chunked(schemas, 1000, num_workers=3, **kwargs)
+    for name in schemas:
+        assert len(one[name]["table"]) == 1000
+        assert one[name]["table"].equals(three[name]["table"])
+    source, target = one["source"]["table"], one["target"]["table"]
+    assert source["source_id"][:400].equals(target["target_id"][:400].rename("source_id"))
+    assert target["target_id"][400:].isin(set(source["source_id"])).all()
+
+
+@pytest.mark.parametrize("fmt", ["csv", "npz"])
+def test_generate_combined_data_chunked_to_disk(schemas, tmp_path, fmt):
+    """
+    test_generate_combined_data_chunked_to_disk - Asserts blocks streamed to disk hold the in-memory tables
+    """
+    in_memory = generate_combined_data_chunked(schemas, 300, block_rows=128, num_workers=2)
+    on_disk = generate_combined_data_chunked(schemas, 300, block_rows=128, num_workers=2, output_dir=tmp_path, fmt=fmt)
+    for name in schemas:
+        expected = in_memory[name]["table"]
+        path = on_disk[name]["path"]
+        assert on_disk[name]["bytes"] == os.path.getsize(path) > 0
+        if fmt == "csv":
+            assert pd.read_csv(path, float_precision="round_trip", dtype=expected.dtypes.to_dict()).equals(expected)
+        else:
+            with np.load(path) as archive:
+                assert sorted(archive.files)[:4] == sorted(f"chunk_00000/{column}" for column in expected.columns)
+                assert (archive["chunk_00002/source_id" if name == "source" else "chunk_00002/target_id"]
+                        == expected.iloc[256:, 0].to_numpy()).all()
+
+
+@pytest.mark.parametrize("field_type", ["integer", "boolean", "float", "string"])
+def test_handle_mapped_columns(field_type):
+    """
+    test_handle_mapped_columns - Asserts the legacy arguments draw the original `random` module stream
+    into a list: the leading rows copy the source, integers and booleans are sampled from it
+    """
+    source = generate_synthetic_data({"fields": [{"name": "src", "type": field_type}]}, 200, seed=1,
+                                     engine="python")["src"].tolist()
+    random.seed(7)
+    if field_type in ["integer", "boolean"]:
+        expected = source[:50] + random.choices(source, k=150)
+    elif field_type == "float":
+        expected = source[:50] + [random.uniform(0.0, 100.0) for _ in range(150)]
+    else:
+        expected = source[:50] + ["".join(random.choices(STRING_ALPHABET, k=STRING_LENGTH)) for _ in range(150)]
+    random.seed(7)
+    assert handle_mapped_columns("tgt", field_type, 200, 0.25, {"tgt": "src"}, {"src": source}) == expected
+    assert handle_mapped_columns("tgt", field_type, 200, 0.25, {"tgt": "src"}, {}) is None
+
+
+@pytest.mark.parametrize("field_type", ["integer", "boolean", "float", "string"])
+def test_handle_mapped_columns_numpy(field_type):
+    """
+    test_handle_mapped_columns_numpy - Asserts a numpy Generator draws the column as an array with
+    the leading rows copied from the source and integers and booleans sampled from it
+    """
+    source = generate_synthetic_data({"fields": [{"name": "src", "type": field_type}]}, 200, seed=1)["src"].tolist()
+    column = handle_mapped_columns("tgt", field_type, 200, 0.25, {"tgt": "src"}, {"src": source},
+                                   rng=np.random.default_rng(0))
+    assert isinstance(column, np.ndarray) and len(column) == 200
+    assert column[:50].tolist() == source[:50]
+    if field_type in ["integer", "boolean"]:
+        assert set(column[50:].tolist()) <= set(source)
+
+
+def test_handle_mapped_columns_many_to_one_shuffle():
+    """
+    test_handle_mapped_columns_many_to_one_shuffle - Asserts matched rows are split between the sources
+    and shuffling only moves them
+    """
+    shared_data = {"a": np.arange(100), "b": np.arange(1000, 1100)}
+    column = handle_mapped_columns("tgt", "integer", 100, 0.5, {"tgt": ["a", "b"]}, shared_data)
+    assert list(column[:25]) == list(range(25))
+    assert list(column[25:50]) == list(range(1025, 1050))
+    shuffled = handle_mapped_columns("tgt", "float", 100, 0.5, {"tgt": ["a", "b"]}, shared_data, shuffle=True,
+                                     rng=np.random.default_rng(0))
+    assert set(range(25)) | set(range(1025, 1050)) <= set(shuffled.tolist())
+    assert shuffled[:50].tolist() != list(column[:50])
+
+
+def test_generate_combined_data_multi_target(schemas):
+    """
+    test_generate_combined_data_multi_target - Asserts one source column can feed several target columns
+    """
+    result = generate_combined_data(
+        schemas, 100, mapped_source_and_target_columns={"source_id": ["target_id", "target_value"]}, match_fraction=0.3
+    )
+    source_ids = result["source"]["table"]["source_id"].to_numpy()
+    target = result["target"]["table"]
+    assert (target["target_id"].to_numpy()[:30] == source_ids[:30]).all()
+    assert (target["target_value"].to_numpy()[:30] == source_ids[:30]).all()
+    assert target["target_value"].dtype.kind == "f"
+
+
+def test_generate_combined_data_sinks(schemas, tmp_path):
+    """
+    test_generate_combined_data_sinks - Asserts the numpy engine streams each schema into its sink,
+    with the same tables as the chunked generator
+    """
+    mapping = {"source_id": "target_id"}
+    in_memory = generate_combined_data(schemas, 300, mapping, chunk_rows=128)
+    chunked = generate_combined_data_chunked(schemas, 300, mapping, block_rows=128, num_workers=1)
+    assert all(in_memory[name]["table"].equals(chunked[name]["table"]) for name in schemas)
+    output_file = tmp_path / "target.csv"
+    streamed = generate_combined_data(schemas, 300, mapping, chunk_rows=128, sinks={"target": open_sink(str(output_file))})
+    assert streamed["source"]["table"].equals(in_memory["source"]["table"])
+    assert streamed["target"]["bytes"] == output_file.stat().st_size
+    assert pd.read_csv(output_file)["target_id"].tolist() == in_memory["target"]["table"]["target_id"].tolist()
+    with pytest.raises(ValueError):
+        generate_combined_data(schemas, 10, engine="python", sinks={"target": DataFrameSink()})
+
+
+def test_generate_combined_data_chunked_rich_schema():
+    """
+    test_generate_combined_data_chunked_rich_schema - Asserts compiled generators with options run in the workers
+    """
+    schema = {
+        "fields": [
+            {"name": "event_id", "type": "uuid"},
+            {"name": "day", "type": "date", "min": "2024-01-01", "max": "2024-01-31"},
+            {"name": "tier", "type": "category", "values": ["gold", "silver"], "weights": [1, 3]},
+            {"name": "score", "type": "integer", "min": 1, "max": 5, "nullable": 0.2},
+        ]
+    }
+    schemas = {"events": {"schema": schema, "seed": 5}}
+    one = generate_combined_data_chunked(schemas, 500, block_rows=100, num_workers=1)["events"]["table"]
+    two = generate_combined_data_chunked(schemas, 500, block_rows=100, num_workers=2)["events"]["table"]
+    assert one.equals(two)
+    assert one["day"].between("2024-01-01", "2024-01-31").all()
+    assert set(one["tier"]) == {"gold", "silver"}
+    assert one["score"].dtype == "Int64" and one["score"].isna().any()
+
+
+@pytest.mark.parametrize("seed", [None, 0])
+def test_handle_mapped_columns_duplicates_and_skew(seed):
+    """
+    test_handle_mapped_columns_duplicates_and_skew - Asserts the duplicate ratio sets the number of distinct
+    matched keys and skew concentrates matched rows on hot keys, in both engines
+    """
+    shared_data = {"src": np.arange(10_000)}
+    rng = None if seed is None else np.random.default_rng(seed)
+    column = handle_mapped_columns("tgt", "integer", 10_000, 0.5, {"tgt": "src"}, shared_data, rng=rng,
+                                   duplicate_ratio=0.8)
+    matched = pd.Series(column[:5000])
+    assert matched.nunique() == 1000 and matched.isin(range(1000)).all()
+    skewed = handle_mapped_columns("tgt", "integer", 10_000, 0.5, {"tgt": "src"}, shared_data, rng=rng, skew=1.2)
+    counts = pd.Series(skewed[:5000]).value_counts()
+    assert counts.index[0] == 0 and counts.iloc[0] > 500
+
+
+def test_generate_combined_data_mapping_options(schemas):
+    """
+    test_generate_combined_data_mapping_options - Asserts per-mapping options reach mapped columns
+    in both the in-memory and the chunked generators
+    """
+    mapping = {"source_id": {"targets": "target_id", "duplicate_ratio": 0.9}}
+    schemas["source"]["schema"]["fields"][0].update(distribution="unique", min=0, max=9999)
+    for result in [
+        generate_combined_data(schemas, 1000, mapping, match_fraction=1.0),
+        generate_combined_data_chunked(schemas, 1000, mapping, match_fraction=1.0, block_rows=1000, num_workers=1),
+    ]:
+        assert result["source"]["table"]["source_id"].is_unique
+        assert result["target"]["table"]["target_id"].nunique() == 100
+
+
+def test_cli_schema_file(tmp_path, mocker):
+    """
+    test_cli_schema_file - Asserts the CLI reads --schema with `load_schema_from_json` and streams to --output
+    """
+    schema_file = tmp_path / "schema.json"
+    schema_file.write_text(json.dumps(create_sample_target_schema()))
+    output_file = tmp_path / "out.csv"
+    load = mocker.spy(create_synthetic_data, "load_schema_from_json")
+    create_synthetic_data.cli(["--schema", str(schema_file), "--num_rows", "20", "--output", str(output_file)])
+    load.assert_called_once_with(str(schema_file))
+    assert pd.read_csv(output_file).columns.tolist() == ["target_id", "target_name", "target_value", "target_boolean"]
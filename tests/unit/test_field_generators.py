@@ -0,0 +1,174 @@
+"""
+Unit tests for the `field_generators` module in the `perceive_py` package.
+"""
+
+import uuid
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from perceive_py.field_generators import (
+    FIELD_GENERATORS,
+    apply_nulls,
+    arrow_strings,
+    compile_field,
+    compile_schema,
+    string_column,
+    zipf_ranks,
+)
+
+
+def draw(field, num_rows=2000, seed=0):
+    return compile_field(field).draw(num_rows, np.random.default_rng(seed))
+
+
+def test_compile_schema():
+    """
+    test_compile_schema - Asserts every field gets the generator registered for its type
+    """
+    generators = compile_schema({"fields": [{"name": "id", "type": "uuid"}, {"name": "day", "type": "date"}]})
+    assert [generator.name for generator in generators] == ["id", "day"]
+    assert [type(generator) for generator in generators] == [FIELD_GENERATORS["uuid"], FIELD_GENERATORS["date"]]
+    with pytest.raises(ValueError):
+        compile_schema({"fields": [{"name": "price", "type": "decimal"}]})
+
+
+@pytest.mark.parametrize(
+    "field",
+    [
+        {"type": "integer", "min": 5, "max": 1},
+        {"type": "date", "min": "2024-02-01", "max": "2024-01-01"},
+        {"type": "category", "values": []},
+        {"type": "category", "values": ["a", "b"], "weights": [1]},
+        {"type": "string", "nullable": 1.5},
+    ],
+)
+def test_compile_field_invalid(field):
+    """
+    test_compile_field_invalid - Asserts bad options are rejected when the schema is compiled
+    """
+    with pytest.raises(ValueError):
+        compile_field(field)
+
+
+def test_ranges():
+    """
+    test_ranges - Asserts min and max bound integers, floats, dates and datetimes inclusively
+    """
+    integers = draw({"type": "integer", "min": -3, "max": 3})
+    assert integers.min() == -3 and integers.max() == 3
+    floats = draw({"type": "float", "min": 1.5, "max": 2.0})
+    assert ((floats >= 1.5) & (floats <= 2.0)).all()
+    dates = draw({"type": "date", "min": "2024-02-27", "max": "2024-03-01"})
+    assert dates.dtype == "datetime64[D]" and set(dates.astype(str)) == {"2024-02-27", "2024-02-28", "2024-02-29", "2024-03-01"}
+    times = draw({"type": "datetime", "min": "2024-01-01T00:00:00", "max": "2024-01-01T00:00:09"})
+    assert times.dtype == "datetime64[s]" and len(set(times.tolist())) == 10
+
+
+def test_string_lengths():
+    """
+    test_string_lengths - Asserts fixed and ranged string lengths
+    """
+    assert set(np.char.str_len(draw({"type": "string", "length": 4}))) == {4}
+    assert set(np.char.str_len(draw({"type": "string", "min_length": 0, "max_length": 3}))) == {0, 1, 2, 3}
+
+
+def test_category_weights():
+    """
+    test_category_weights - Asserts weighted categories follow their weights and zero weights never appear
+    """
+    values = draw({"type": "category", "values": ["hot", "warm", "cold"], "weights": [8, 2, 0]}, num_rows=10_000)
+    counts = pd.Series(values).value_counts(normalize=True)
+    assert set(counts.index) == {"hot", "warm"}
+    assert counts["hot"] == pytest.approx(0.8, abs=0.02)
+
+
+def test_uuid():
+    """
+    test_uuid - Asserts generated UUIDs are valid, unique version 4 UUIDs
+    """
+    values = draw({"type": "uuid"}).astype(str)
+    parsed = [uuid.UUID(value) for value in values]
+    assert all(value.version == 4 and value.variant == uuid.RFC_4122 for value in parsed)
+    assert [str(value) for value in parsed] == values.tolist()
+    assert len(set(values)) == len(values)
+
+
+@pytest.mark.parametrize("field_type", ["integer", "float", "boolean", "string", "date", "uuid"])
+def test_nullable(field_type):
+    """
+    test_nullable - Asserts the nullable fraction of rows comes back as missing values while keeping the column type
+    """
+    generator = compile_field({"name": "value", "type": field_type, "nullable": 0.3})
+    column = pd.Series(generator.column(10_000, np.random.default_rng(0)))
+    assert column.isna().mean() == pytest.approx(0.3, abs=0.02)
+    if field_type in ["integer", "boolean"]:
+        assert column.dtype in ["Int64", "boolean"]
+
+
+def test_apply_nulls_without_mask():
+    """
+    test_apply_nulls_without_mask - Asserts columns without nulls are passed through untouched
+    """
+    values = np.arange(3)
+    assert apply_nulls(values, None) is values
+    assert apply_nulls(values, np.zeros(3, dtype=bool)) is values
+
+
+def test_string_columns():
+    """
+    test_string_columns - Asserts ASCII string draws become Arrow-backed columns holding the same strings and nulls,
+    and an object column of str without pyarrow
+    """
+    pytest.importorskip("pyarrow")
+    values = draw({"type": "string", "min_length": 0, "max_length": 5}, num_rows=1000)
+    assert values.dtype == "S5" and len(set(map(len, values))) == 6
+    mask = np.arange(1000) % 7 == 0
+    expected = [None if null else value.decode() for value, null in zip(values, mask)]
+    assert arrow_strings(values, mask).to_pylist() == expected
+    assert arrow_strings(values.astype(str), mask).to_pylist() == expected
+    column = apply_nulls(values, mask)
+    assert column.dtype == "string[pyarrow]"
+    assert [None if pd.isna(value) else value for value in column] == expected
+
+
+def test_string_column_without_pyarrow(mocker):
+    """
+    test_string_column_without_pyarrow - Asserts string columns fall back to str objects when pyarrow is missing
+    """
+    mocker.patch("perceive_py.field_generators.arrow_strings", side_effect=ImportError)
+    column = string_column(np.array([b"ab", b"c"]), np.array([False, True]))
+    assert column.dtype == object and column.tolist() == ["ab", None]
+
+
+def test_integer_distributions():
+    """
+    test_integer_distributions - Asserts zipf favours low keys, normal centres on its mean,
+    and sequential and unique depend only on the row position
+    """
+    zipf = draw({"type": "integer", "min": 1, "max": 1000, "distribution": "zipf", "exponent": 1.5}, num_rows=20_000)
+    counts = pd.Series(zipf).value_counts()
+    assert counts.index[0] == 1 and counts.iloc[0] > 0.3 * len(zipf)
+    normal = draw({"type": "integer", "min": 0, "max": 100, "distribution": "normal", "mean": 30, "std": 5})
+    assert abs(normal.mean() - 30) < 1 and normal.min() >= 0
+    sequential = compile_field({"type": "integer", "min": 10, "distribution": "sequential", "step": 2})
+    assert sequential.draw(3, None, offset=5).tolist() == [20, 22, 24]
+    unique = compile_field({"type": "integer", "min": 1, "max": 1000, "distribution": "unique"})
+    values = np.concatenate([unique.draw(600, None), unique.draw(400, None, offset=600)])
+    assert sorted(values.tolist()) == list(range(1, 1001))
+    with pytest.raises(ValueError):
+        unique.draw(2, None, offset=999)
+    with pytest.raises(ValueError):
+        compile_field({"type": "float", "distribution": "zipf"})
+
+
+def test_zipf_ranks_large_key_space(mocker):
+    """
+    test_zipf_ranks_large_key_space - Asserts the continuous approximation stays in range and keeps the skew
+    """
+    mocker.patch("perceive_py.field_generators.ZIPF_TABLE_KEYS", 10)
+    for exponent in [1.0, 1.3]:
+        ranks = zipf_ranks(20_000, 1000, exponent, np.random.default_rng(0))
+        assert ranks.min() == 0 and ranks.max() < 1000
+        assert (ranks == 0).mean() > (ranks == 10).mean() * 5
@@ -0,0 +1,84 @@
+"""
+Unit tests for the `flag_cache` module in the `perceive_py` package.
+"""
+
+import os
+import stat
+import time
+
+import pytest
+
+from perceive_py import flag_cache, sequential_downloads, utils
+from perceive_py.flag_cache import FlagCache
+from perceive_py.mock_flag_server import MockFlagServer, flag_body
+from perceive_py.utils import atomic_write
+
+CC_LIST = ["BR", "CN", "DE", "IN"]
+
+
+@pytest.fixture
+def server(tmp_path, mocker):
+    with MockFlagServer() as server:
+        mocker.patch.object(sequential_downloads, "BASE_URL", server.base_url)
+        mocker.patch.object(sequential_downloads, "DEST_DIR", tmp_path)
+        yield server
+
+
+def test_download_many_cold_then_warm(server, tmp_path):
+    """
+    test_download_many_cold_then_warm - Asserts a warm run within the TTL makes no requests
+    """
+    assert flag_cache.download_many(CC_LIST) == len(CC_LIST)
+    assert server.counters["requests"] == len(CC_LIST)
+    assert (tmp_path / "BR.gif").read_bytes() == flag_body("br", 1024)
+    tic = time.perf_counter()
+    flag_cache.download_many(CC_LIST)
+    assert time.perf_counter() - tic < 0.5
+    assert server.counters["requests"] == len(CC_LIST)
+
+
+def test_get_flag_revalidates_after_ttl(server):
+    """
+    test_get_flag_revalidates_after_ttl - Asserts expired entries send If-None-Match and reuse the body on 304
+    """
+    cache = FlagCache(ttl=0)
+    assert cache._client is None
+    body, changed = cache.get_flag("BR")
+    assert changed
+    assert cache.get_flag("BR") == (body, False)
+    assert server.counters["not_modified"] == 1
+    assert cache.counters == {"fresh": 0, "revalidated": 1, "fetched": 1}
+
+
+def test_get_flag_corrupt_object(server):
+    """
+    test_get_flag_corrupt_object - Asserts a cached body that no longer matches its hash is downloaded again
+    """
+    cache = FlagCache()
+    body, _ = cache.get_flag("BR")
+    meta, _ = cache.load("BR")
+    cache.object_path(meta["sha256"]).write_bytes(b"garbage")
+    assert cache.get_flag("BR") == (body, True)
+
+
+def test_atomic_write(tmp_path):
+    """
+    test_atomic_write - Asserts the file is replaced whole and no temporary files are left behind
+    """
+    target = tmp_path / "flag.gif"
+    atomic_write(target, b"old")
+    atomic_write(target, b"new")
+    assert target.read_bytes() == b"new"
+    assert [path.name for path in tmp_path.iterdir()] == ["flag.gif"]
+
+
+def test_atomic_write_mode(tmp_path):
+    """
+    test_atomic_write_mode - Asserts a new file follows the umask and a replaced file keeps its mode
+    """
+    target = tmp_path / "flag.gif"
+    atomic_write(target, b"old")
+    assert stat.S_IMODE(target.stat().st_mode) == 0o666 & ~utils.UMASK
+    os.chmod(target, 0o640)
+    atomic_write(target, b"new")
+    assert stat.S_IMODE(target.stat().st_mode) == 0o640
@@ -0,0 +1,78 @@
+"""
+Unit tests for the `flags_asyncio` module in the `perceive_py` package.
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from perceive_py import flags_asyncio, sequential_downloads
+
+
+class FlagHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = 0
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with FlagHandler.lock:
+            FlagHandler.connections += 1
+
+    def do_GET(self):
+        with FlagHandler.lock:
+            FlagHandler.active += 1
+            FlagHandler.peak = max(FlagHandler.peak, FlagHandler.active)
+        time.sleep(0.02)
+        with FlagHandler.lock:
+            FlagHandler.active -= 1
+        if "zz" in self.path:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = self.path.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def flag_server(tmp_path, mocker):
+    FlagHandler.connections = FlagHandler.peak = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlagHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    mocker.patch.object(sequential_downloads, "BASE_URL", f"http://127.0.0.1:{server.server_port}")
+    mocker.patch.object(sequential_downloads, "DEST_DIR", tmp_path)
+    yield tmp_path
+    server.shutdown()
+    server.server_close()
+
+
+def test_download_many(flag_server):
+    """
+    test_download_many - Asserts every flag is saved while concurrency and connections stay bounded
+    """
+    cc_list = ["BR", "CN", "DE", "FR", "IN", "JP", "US", "VN"]
+    assert flags_asyncio.download_many(cc_list, concurrency=3) == len(cc_list)
+    for cc in cc_list:
+        assert (flag_server / f"{cc}.gif").read_bytes() == f"/{cc}/{cc}.gif".lower().encode()
+    assert FlagHandler.peak <= 3
+    assert FlagHandler.connections <= 3
+
+
+def test_download_many_http_error(flag_server):
+    """
+    test_download_many_http_error - Asserts HTTP errors are raised to the caller
+    """
+    with pytest.raises(httpx.HTTPStatusError):
+        flags_asyncio.download_many(["BR", "ZZ"])
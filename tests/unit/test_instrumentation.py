@@ -0,0 +1,137 @@
+"""
+Unit tests for the `instrumentation` module in the `perceive_py` package.
+"""
+
+import concurrent.futures
+import hashlib
+import json
+import logging
+import time
+
+import pytest
+
+from perceive_py import instrumentation
+from perceive_py.instrumentation import Histogram, MetricsRegistry, instrument, log_to, measure, write_metrics
+
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry()
+
+
+def test_histogram():
+    """
+    test_histogram - Asserts observations land in cumulative buckets with count, sum, min and max
+    """
+    histogram = Histogram((1, 10))
+    for value in (0.5, 1, 5, 50):
+        histogram.observe(value)
+    assert histogram.cumulative() == [(1, 2), (10, 3), (float("inf"), 4)]
+    assert (histogram.count, histogram.sum, histogram.min, histogram.max) == (4, 56.5, 0.5, 50)
+
+
+def test_instrument_records_calls_and_errors(registry):
+    """
+    test_instrument_records_calls_and_errors - Asserts wall and CPU time, calls and errors are recorded per name
+    """
+
+    @instrument(registry=registry)
+    def work(fail=False):
+        time.sleep(0.01)
+        if fail:
+            raise ValueError()
+        return "done"
+
+    assert work() == "done"
+    with pytest.raises(ValueError):
+        work(fail=True)
+    metric = registry.get(f"{__name__}.test_instrument_records_calls_and_errors.<locals>.work")
+    assert metric.calls == 2 and metric.errors == 1
+    assert metric.wall_seconds.count == 2 and metric.wall_seconds.min >= 0.01
+    assert 0 <= metric.cpu_seconds.sum < metric.wall_seconds.sum
+
+
+def busy(seconds):
+    # hashlib releases the GIL, so the threads really run concurrently where there are several cores
+    data = bytes(1 << 20)
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        hashlib.sha256(data).digest()
+
+
+def test_instrument_cpu_is_per_thread(registry):
+    """
+    test_instrument_cpu_is_per_thread - Asserts concurrent calls only count their own thread's CPU time,
+    while a `process_cpu` span counts every thread
+    """
+    work = instrument("work", registry=registry)(busy)
+    with measure("pool", registry=registry, process_cpu=True):
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            list(executor.map(work, [0.05] * 4))
+    metric, pool = registry.get("work"), registry.get("pool")
+    assert metric.calls == 4
+    assert metric.cpu_seconds.max <= metric.wall_seconds.max
+    # The calls split the process CPU between them instead of each counting all of it
+    assert 0.5 * pool.cpu_seconds.sum <= metric.cpu_seconds.sum <= 1.1 * pool.cpu_seconds.sum
+
+
+def test_measure_traces_memory(registry):
+    """
+    test_measure_traces_memory - Asserts the traced allocation peak of the block is recorded
+    """
+    with measure("alloc", rss=True, trace_memory=True, registry=registry) as measurement:
+        block = bytearray(4 * 1024 * 1024)
+        del block
+    assert measurement.traced_peak >= 4 * 1024 * 1024
+    assert measurement.rss_growth >= 0
+    assert registry.get("alloc").traced_peak_bytes.max == measurement.traced_peak
+
+
+def test_disabled_is_pass_through(registry):
+    """
+    test_disabled_is_pass_through - Asserts nothing is recorded while metrics are disabled
+    """
+    work = instrument("work", registry=registry)(lambda: 1)
+    instrumentation.disable()
+    try:
+        assert work() == 1
+        with measure("block", registry=registry) as measurement:
+            assert measurement is None
+    finally:
+        instrumentation.enable()
+    assert registry.as_dict() == {}
+
+
+def test_exports(registry, tmp_path):
+    """
+    test_exports - Asserts JSON and Prometheus text exports
+    """
+    with measure("export.block", registry=registry):
+        pass
+    data = json.loads(registry.to_json())
+    assert data["export.block"]["calls"] == 1
+    assert data["export.block"]["wall_seconds"]["buckets"]["+Inf"] == 1
+    text = registry.to_prometheus()
+    assert "# TYPE perceive_wall_seconds histogram" in text
+    assert 'perceive_calls_total{name="export.block"} 1' in text
+    assert 'perceive_wall_seconds_bucket{name="export.block",le="+Inf"} 1' in text
+    assert 'perceive_wall_seconds_count{name="export.block"} 1' in text
+    write_metrics(tmp_path / "metrics.prom", registry)
+    write_metrics(tmp_path / "metrics.json", registry)
+    assert (tmp_path / "metrics.prom").read_text() == text
+    assert json.loads((tmp_path / "metrics.json").read_text()) == data
+
+
+def test_log_to(registry, caplog):
+    """
+    test_log_to - Asserts one line is logged per call, and none below the logger's level
+    """
+    logger = logging.getLogger("test_instrumentation")
+    work = instrument("logged", registry=registry, report=log_to(logger))(lambda: None)
+    with caplog.at_level(logging.INFO, logger="test_instrumentation"):
+        work()
+    assert len(caplog.records) == 1 and caplog.records[0].getMessage().startswith("logged took ")
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger="test_instrumentation"):
+        work()
+    assert not caplog.records
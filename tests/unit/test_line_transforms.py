@@ -0,0 +1,72 @@
+"""
+Unit tests for the `line_transforms` module in the `perceive_py` package.
+"""
+
+import pytest
+
+from perceive_py.line_transforms import (
+    ByteCount,
+    LineCount,
+    apply_stages,
+    batched,
+    initial_aggregates,
+    load_plugin,
+    load_stages,
+    merge_aggregates,
+    to_upper,
+)
+
+
+def test_load_plugin():
+    """
+    test_load_plugin - Asserts both dotted path spellings resolve to the same object
+    """
+    assert load_plugin("perceive_py.line_transforms.to_upper") is to_upper
+    assert load_plugin("perceive_py.line_transforms:to_upper") is to_upper
+    with pytest.raises(ValueError):
+        load_plugin("to_upper")
+
+
+def test_load_stages():
+    """
+    test_load_stages - Asserts batch flags are detected and aggregate classes are instantiated
+    """
+    stages = load_stages(
+        [("map", "perceive_py.line_transforms.to_upper"), ("aggregate", "perceive_py.line_transforms.LineCount")]
+    )
+    assert [stage.batch for stage in stages] == [True, True]
+    assert isinstance(stages[1].func, LineCount)
+    with pytest.raises(ValueError):
+        load_stages([("reduce", "perceive_py.line_transforms.LineCount")])
+
+
+def test_apply_stages_per_line_and_batch():
+    """
+    test_apply_stages_per_line_and_batch - Asserts per-line and batch callables give the same result
+    """
+    stages = load_stages(
+        [
+            ("filter", "perceive_py.line_transforms.is_not_blank"),
+            ("aggregate", "perceive_py.line_transforms.ByteCount"),
+        ]
+    )
+    stages.insert(1, stages[0]._replace(kind="map", func=bytes.upper, batch=False))
+    stages.append(stages[0]._replace(func=batched(lambda lines: [len(line) > 2 for line in lines]), batch=True))
+    aggregates = initial_aggregates(stages)
+    lines = apply_stages(stages, [b"ab\n", b"  \n", b"c\n", b"def\n"], aggregates)
+    assert lines == [b"AB\n", b"DEF\n"]
+    assert aggregates == [9]
+
+
+def test_merge_aggregates():
+    """
+    test_merge_aggregates - Asserts per-part partial results are merged per stage
+    """
+    stages = load_stages(
+        [("aggregate", "perceive_py.line_transforms.LineCount"), ("aggregate", "perceive_py.line_transforms.ByteCount")]
+    )
+    assert isinstance(stages[1].func, ByteCount)
+    assert merge_aggregates(stages, [[2, 10], [3, 7]]) == {
+        "perceive_py.line_transforms.LineCount": 5,
+        "perceive_py.line_transforms.ByteCount": 17,
+    }
@@ -0,0 +1,62 @@
+"""
+Unit tests for the `mock_flag_server` module in the `perceive_py` package.
+"""
+
+import time
+
+import httpx
+
+from perceive_py.mock_flag_server import MockFlagServer, flag_body
+
+
+def test_flag_body():
+    """
+    test_flag_body - Asserts bodies are GIFs of the requested size and stable per country code
+    """
+    assert flag_body("br", 100) == flag_body("br", 100)
+    assert flag_body("br", 100) != flag_body("cn", 100)
+    assert flag_body("br", 100).startswith(b"GIF89a") and len(flag_body("br", 100)) == 100
+
+
+def test_mock_flag_server():
+    """
+    test_mock_flag_server - Asserts flags are served over one kept-alive connection and unknown paths get 404
+    """
+    with MockFlagServer(size=2048) as server, httpx.Client(base_url=server.base_url) as client:
+        resp = client.get("/br/br.gif")
+        assert resp.status_code == 200 and resp.content == flag_body("br", 2048)
+        assert client.get("/br/cn.gif").status_code == 404
+        assert server.counters == {
+            "connections": 1, "requests": 2, "errors": 0, "not_modified": 0, "partial": 0, "dropped": 0,
+        }
+        assert client.get("/br/br.gif", headers={"If-None-Match": resp.headers["ETag"]}).status_code == 304
+
+
+def test_mock_flag_server_errors_and_bandwidth():
+    """
+    test_mock_flag_server_errors_and_bandwidth - Asserts the error rate and bandwidth cap are applied
+    """
+    with MockFlagServer(error_rate=1.0) as server:
+        assert httpx.get(f"{server.base_url}/br/br.gif").status_code == 503
+        assert server.counters["errors"] == 1
+    with MockFlagServer(size=64 * 1024, bandwidth=256 * 1024) as server:
+        tic = time.perf_counter()
+        assert len(httpx.get(f"{server.base_url}/br/br.gif").content) == 64 * 1024
+        assert time.perf_counter() - tic >= 0.2
+
+
+def test_mock_flag_server_ranges():
+    """
+    test_mock_flag_server_ranges - Asserts byte ranges get 206 or 416 and HEAD advertises range support
+    """
+    body = flag_body("br", 2048)
+    with MockFlagServer(size=2048) as server, httpx.Client(base_url=server.base_url) as client:
+        resp = client.head("/br/br.gif")
+        assert resp.headers["Accept-Ranges"] == "bytes" and resp.headers["Content-Length"] == "2048"
+        resp = client.get("/br/br.gif", headers={"Range": "bytes=100-199"})
+        assert resp.status_code == 206 and resp.content == body[100:200]
+        assert resp.headers["Content-Range"] == "bytes 100-199/2048"
+        assert client.get("/br/br.gif", headers={"Range": "bytes=2000-"}).content == body[2000:]
+        assert client.get("/br/br.gif", headers={"Range": "bytes=-48"}).content == body[-48:]
+        assert client.get("/br/br.gif", headers={"Range": "bytes=2048-"}).status_code == 416
+        assert server.counters["partial"] == 3
@@ -16,6 +16,7 @@ Fixtures:
 Each test ensures the correctness and expected behavior of the corresponding function in the `process_large_data` module.
 """
 
+import numpy as np
 import pandas as pd
 import os
 from pathlib import Path
@@ -24,10 +25,24 @@ import pytest
 from perceive_py.process_large_data import (
     get_args,
     create_large_dataframe,
+    iter_large_dataframe,
     chunk_generator,
     write_chunk,
+    encode_chunk,
     write_to_file,
+    share_chunk,
+    autotune,
+    main,
+    read_manifest,
+    ChunkWriteError,
+    CHUNK_RETRY_STATS,
+    MANIFEST_SUFFIX,
+    configure_logging,
+    stop_logging,
+    logger,
 )
+import perceive_py.process_large_data as process_large_data
+from perceive_py import chunk_formats
 
 
 
@@ -141,6 +156,494 @@ def test_write_to_file(output_file_fixture, chunks_fixture, mocker):
     assert mock_write_chunk.call_count == len(chunks_fixture)
 
 
+def test_encode_chunk():
+    """
+    Test that `encode_chunk` produces the same CSV bytes as a direct `to_csv` call.
+
+    Assertions:
+    - The encoded header chunk matches `DataFrame.to_csv` with a header.
+    - The encoded body chunk matches `DataFrame.to_csv` without a header.
+    """
+    chunk_df = pd.DataFrame({"A": [1, 2, 3], "B": ["x", "y", "z"]})
+    assert encode_chunk(0, chunk_df, write_header=True) == chunk_df.to_csv(index=False).encode()
+    assert encode_chunk(1, chunk_df) == chunk_df.to_csv(index=False, header=False).encode()
+
+
+def test_write_to_file_preserves_chunk_order(output_file_fixture):
+    """
+    Test that `write_to_file` appends chunks in chunk order through the single writer.
+
+    Many small chunks are written with a reorder buffer smaller than the number of
+    chunks, so the pipeline has to keep draining while workers finish out of order.
+
+    Assertions:
+    - The written file is byte-identical to writing the whole DataFrame at once.
+    """
+    df = pd.DataFrame({"A": range(1000), "B": [f"row{i}" for i in range(1000)]})
+    chunks = chunk_generator(df, chunk_size=10, num_chunks=100)
+    write_to_file(str(output_file_fixture), chunks, num_workers=4, max_pending=3)
+    assert output_file_fixture.read_bytes() == df.to_csv(index=False).encode()
+
+
+def test_write_to_file_process_backend(tmp_path):
+    """
+    Test that the "process" backend writes the same bytes as the "thread" backend.
+
+    The chunks mix integer, float, boolean and string columns so every column kind
+    travels through shared memory.
+
+    Assertions:
+    - Both backends produce byte-identical files.
+    """
+    df = pd.DataFrame(
+        {
+            "row_id": range(200),
+            "value": [i / 7 for i in range(200)],
+            "flag": [i % 2 == 0 for i in range(200)],
+            "label": [f"label{i % 5}" for i in range(200)],
+        }
+    )
+    thread_file = tmp_path / "thread.csv"
+    process_file = tmp_path / "process.csv"
+    write_to_file(str(thread_file), chunk_generator(df, 50, 4), num_workers=2, backend="thread")
+    write_to_file(str(process_file), chunk_generator(df, 50, 4), num_workers=2, backend="process")
+    assert process_file.read_bytes() == thread_file.read_bytes()
+
+
+def test_write_to_file_process_backend_missing_values(tmp_path):
+    """
+    Test that missing values and nullable dtypes survive the "process" backend.
+
+    Object, string, nullable integer, float and categorical columns with missing
+    values travel through shared memory as values plus a null mask.
+
+    Assertions:
+    - Both backends produce byte-identical files, with empty fields for missing values.
+    - Nullable integers are written as integers.
+    """
+    df = pd.DataFrame(
+        {
+            "row_id": range(200),
+            "label": [None if i % 3 == 0 else float("nan") if i % 3 == 1 else f"label{i}" for i in range(200)],
+            "name": pd.array([None if i % 4 == 0 else f"name{i}" for i in range(200)], dtype="string"),
+            "count": pd.array([None if i % 5 == 0 else i for i in range(200)], dtype="Int64"),
+            "value": [float("nan") if i % 6 == 0 else i / 2 for i in range(200)],
+            "kind": pd.Categorical([None if i % 7 == 0 else "ab"[i % 2] for i in range(200)]),
+        }
+    )
+    thread_file = tmp_path / "thread.csv"
+    process_file = tmp_path / "process.csv"
+    write_to_file(str(thread_file), chunk_generator(df, 50, 4), num_workers=2, backend="thread")
+    write_to_file(str(process_file), chunk_generator(df, 50, 4), num_workers=2, backend="process")
+    assert process_file.read_bytes() == thread_file.read_bytes()
+    lines = process_file.read_text().splitlines()
+    assert lines[1] == "0,,,,,"
+    assert lines[2] == "1,,name1,1,0.5,b"
+
+
+def test_write_to_file_process_backend_releases_shared_memory(tmp_path, mocker):
+    """
+    Test that shared memory blocks of pending chunks are unlinked when the chunk iterable fails.
+
+    Assertions:
+    - The iterable's error propagates.
+    - None of the blocks created by `share_chunk` can be attached afterwards.
+    """
+    from multiprocessing import shared_memory
+
+    df = pd.DataFrame({"row_id": range(200)})
+    created = []
+
+    def tracking_share_chunk(chunk_df):
+        shm, layout = share_chunk(chunk_df)
+        created.append(shm.name)
+        return shm, layout
+
+    def failing_chunks():
+        yield from chunk_generator(df, 50, 3)
+        raise RuntimeError("source failed")
+
+    mocker.patch.object(process_large_data, "share_chunk", side_effect=tracking_share_chunk)
+    with pytest.raises(RuntimeError, match="source failed"):
+        write_to_file(str(tmp_path / "out.csv"), failing_chunks(), num_workers=2, max_pending=8, backend="process")
+    assert len(created) == 3
+    for name in created:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+
+def test_write_to_file_rejects_unknown_backend(output_file_fixture, chunks_fixture):
+    """
+    Test that `write_to_file` raises `ValueError` for an unsupported backend.
+    """
+    with pytest.raises(ValueError):
+        write_to_file(str(output_file_fixture), chunks_fixture, backend="gpu")
+
+
+def test_write_chunk_propagates_errors(tmp_path):
+    """
+    Test that `write_chunk` re-raises write failures instead of only logging them.
+    """
+    with pytest.raises(OSError):
+        write_chunk(0, pd.DataFrame({"A": [1]}), str(tmp_path / "missing" / "out.csv"))
+
+
+def failing_encode_chunk(mocker, fail_ids, failures):
+    """
+    Patches `encode_chunk` so chunks in `fail_ids` raise `failures` times before succeeding.
+    """
+    real_encode_chunk = process_large_data.encode_chunk
+    attempts = {}
+
+    def encode(chunk_id, chunk_df, write_header=False, fmt="csv"):
+        attempts[chunk_id] = attempts.get(chunk_id, 0) + 1
+        if chunk_id in fail_ids and attempts[chunk_id] <= failures:
+            raise RuntimeError(f"chunk {chunk_id} failed")
+        return real_encode_chunk(chunk_id, chunk_df, write_header=write_header, fmt=fmt)
+
+    mocker.patch.object(process_large_data, "encode_chunk", side_effect=encode)
+    return attempts
+
+
+def test_write_to_file_retries_failed_chunks(output_file_fixture, mocker):
+    """
+    Test that a chunk failing transiently is retried through the shared policy and written in order.
+    """
+    df = pd.DataFrame({"A": range(100)})
+    attempts = failing_encode_chunk(mocker, fail_ids={3}, failures=2)
+    retries = CHUNK_RETRY_STATS.retries
+    write_to_file(str(output_file_fixture), chunk_generator(df, 10, 10), num_workers=2)
+    assert output_file_fixture.read_bytes() == df.to_csv(index=False).encode()
+    assert attempts[3] == 3
+    assert CHUNK_RETRY_STATS.retries == retries + 1
+
+
+def test_write_to_file_recovers_from_outage(tmp_path, mocker):
+    """
+    Test that an outage failing every chunk twice is retried through, in every export.
+
+    Every export has its own retry budget, so the first export cannot drain it for the second.
+    """
+    df = pd.DataFrame({"A": range(300)})
+    for run in range(2):
+        failing_encode_chunk(mocker, fail_ids=set(range(30)), failures=2)
+        stats = CHUNK_RETRY_STATS.as_dict()
+        output_file = tmp_path / f"out{run}.csv"
+        write_to_file(str(output_file), chunk_generator(df, 10, 30), num_workers=2)
+        assert output_file.read_bytes() == df.to_csv(index=False).encode()
+        assert CHUNK_RETRY_STATS.retries == stats["retries"] + 30
+        assert CHUNK_RETRY_STATS.give_ups == stats["give_ups"]
+
+
+def test_write_to_file_dead_letters_chunks(output_file_fixture, mocker):
+    """
+    Test that a chunk failing every retry is dead-lettered, the rest is written and the failure is raised.
+    """
+    df = pd.DataFrame({"A": range(100)})
+    failing_encode_chunk(mocker, fail_ids={3}, failures=100)
+    dead_letter_dir = output_file_fixture.parent / "dead"
+    with pytest.raises(ChunkWriteError) as excinfo:
+        write_to_file(str(output_file_fixture), chunk_generator(df, 10, 10), num_workers=2, dead_letter_dir=dead_letter_dir)
+    assert excinfo.value.chunk_ids == [3]
+    pd.testing.assert_frame_equal(pd.read_pickle(dead_letter_dir / "chunk_00003.pkl"), df.iloc[30:40])
+    assert "chunk 3 failed" in (dead_letter_dir / "chunk_00003.error").read_text()
+    assert pd.read_csv(output_file_fixture)["A"].tolist() == [i for i in range(100) if not 30 <= i < 40]
+
+
+def test_write_to_file_keeps_dead_letter_dir(output_file_fixture):
+    """
+    Test that an export only clears the old dead letters of an existing directory,
+    and a resumed export keeps them.
+    """
+    df = pd.DataFrame({"A": range(100)})
+    dead_letter_dir = output_file_fixture.parent / "dead"
+    dead_letter_dir.mkdir()
+    (dead_letter_dir / "notes.txt").write_text("keep me")
+    (dead_letter_dir / "chunk_00007.pkl").write_bytes(b"old")
+    write_to_file(str(output_file_fixture), chunk_generator(df, 10, 10), resume=True, dead_letter_dir=dead_letter_dir)
+    assert (dead_letter_dir / "chunk_00007.pkl").exists()
+    write_to_file(str(output_file_fixture), chunk_generator(df, 10, 10), dead_letter_dir=dead_letter_dir)
+    assert sorted(path.name for path in dead_letter_dir.iterdir()) == ["notes.txt"]
+
+
+def test_write_to_file_resume(output_file_fixture, mocker):
+    """
+    Test that `resume` truncates a crashed CSV export to its last committed chunk
+    and only encodes the chunks after it.
+    """
+    df = pd.DataFrame({"A": range(100), "B": [f"row{i}" for i in range(100)]})
+    manifest_file = f"{output_file_fixture}{MANIFEST_SUFFIX}"
+    write_to_file(str(output_file_fixture), chunk_generator(df, 10, 10), num_workers=2, manifest_info={"rows": 100})
+    header, entries = read_manifest(manifest_file)
+    assert header == {"format": "csv", "rows": 100} and [chunk_id for chunk_id, _ in entries] == list(range(10))
+    assert entries[-1][1] == output_file_fixture.stat().st_size
+
+    # Crash while chunk 4 was being appended: its bytes are partly in the file, the manifest has a torn line
+    lines = Path(manifest_file).read_text().splitlines()[:5]
+    Path(manifest_file).write_text("\n".join(lines) + '\n{"chunk": 4, "e')
+    with open(output_file_fixture, "r+b") as output_ctx:
+        output_ctx.truncate(entries[3][1] + 7)
+
+    attempts = failing_encode_chunk(mocker, fail_ids=set(), failures=0)
+    write_to_file(
+        str(output_file_fixture), chunk_generator(df, 10, 10), num_workers=2, resume=True, manifest_info={"rows": 100}
+    )
+    assert output_file_fixture.read_bytes() == df.to_csv(index=False).encode()
+    assert sorted(attempts) == list(range(4, 10))
+    with pytest.raises(ValueError):
+        write_to_file(str(output_file_fixture), [], resume=True, manifest_info={"rows": 200})
+    with pytest.raises(ValueError):
+        write_to_file(str(output_file_fixture), [], resume=True, fmt="npy")
+
+
+def test_main_resume(tmp_path):
+    """
+    Test that `main` with `resume` rewrites only the missing chunks and reuses the manifest's chunk size.
+    """
+    log_file = str(tmp_path / "export.log")
+    main("out.csv", tmp_path, num_rows=1000, num_cols=4, stream=True, chunk_size=100, num_workers=2, log_file=log_file)
+    expected = (tmp_path / "out.csv").read_bytes()
+    manifest_file = tmp_path / f"out.csv{MANIFEST_SUFFIX}"
+    lines = manifest_file.read_text().splitlines()
+    manifest_file.write_text("\n".join(lines[:3]) + "\n")
+    main("out.csv", tmp_path, num_rows=1000, num_cols=4, stream=True, num_workers=2, resume=True, log_file=log_file)
+    assert (tmp_path / "out.csv").read_bytes() == expected
+    assert len(manifest_file.read_text().splitlines()) == 11
+
+
+def test_create_large_dataframe_types():
+    """
+    Test that `create_large_dataframe` builds typed columns instead of strings.
+
+    Assertions:
+    - `row_id` is int32, numeric columns are float64 and string columns are categorical.
+    """
+    df = create_large_dataframe(num_rows=100, num_cols=5)
+    assert df["row_id"].dtype == np.int32
+    assert all(df[col].dtype == np.float64 for col in df.columns if col.startswith("num_col_"))
+    assert all(isinstance(df[col].dtype, pd.CategoricalDtype) for col in df.columns if col.startswith("str_col_"))
+
+
+def test_create_large_dataframe_matches_seeded_strings():
+    """
+    Test that the typed DataFrame holds the same seeded values as the former
+    all-string `np.hstack` construction, so CSV exports are unchanged.
+    """
+    num_rows, num_cols = 200, 7
+    np.random.seed(0)
+    row_ids = np.arange(1, num_rows + 1).reshape(-1, 1)
+    numeric_data = np.random.rand(num_rows, num_cols // 2)
+    string_data = np.random.choice(["A", "B", "C", "D"], size=(num_rows, num_cols - num_cols // 2))
+    df = create_large_dataframe(num_rows, num_cols)
+    legacy_df = pd.DataFrame(np.hstack((row_ids, numeric_data, string_data)), columns=df.columns)
+    assert df.to_csv(index=False) == legacy_df.to_csv(index=False)
+
+
+def test_create_large_dataframe_pyarrow_backend():
+    """
+    Test that the "pyarrow" dtype backend holds the same values as the "numpy" backend.
+    """
+    pytest.importorskip("pyarrow")
+    df = create_large_dataframe(num_rows=50, num_cols=4, dtype_backend="pyarrow")
+    assert all(isinstance(dtype, pd.ArrowDtype) for dtype in df.dtypes)
+    assert df.to_csv(index=False) == create_large_dataframe(num_rows=50, num_cols=4).to_csv(index=False)
+
+
+@pytest.mark.parametrize("chunk_size", [1000, 65536, 70001, 150000])
+def test_iter_large_dataframe_matches_one_shot(chunk_size):
+    """
+    Test that the streamed chunks concatenate to the one-shot result regardless
+    of the chunk size, including chunk boundaries inside an RNG block.
+    """
+    num_rows = 150000
+    one_shot = next(iter_large_dataframe(num_rows, 4, chunk_size=num_rows, seed=7))
+    chunks = list(iter_large_dataframe(num_rows, 4, chunk_size=chunk_size, seed=7))
+    assert len(chunks) == -(-num_rows // chunk_size)
+    assert max(len(chunk) for chunk in chunks) <= chunk_size
+    assert pd.concat(chunks).equals(one_shot)
+
+
+def test_iter_large_dataframe_seed():
+    """
+    Test that `iter_large_dataframe` is reproducible for a seed and differs between seeds.
+    """
+    first = pd.concat(iter_large_dataframe(500, 4, chunk_size=100, seed=1))
+    assert first.equals(pd.concat(iter_large_dataframe(500, 4, chunk_size=100, seed=1)))
+    assert not first.equals(pd.concat(iter_large_dataframe(500, 4, chunk_size=100, seed=2)))
+    assert list(first.columns) == list(create_large_dataframe(10, 4).columns)
+
+
+def test_write_to_file_streamed_chunks(output_file_fixture):
+    """
+    Test that `write_to_file` accepts the `iter_large_dataframe` generator directly.
+    """
+    write_to_file(str(output_file_fixture), iter_large_dataframe(1000, 4, chunk_size=300), num_workers=2)
+    written_df = pd.read_csv(output_file_fixture)
+    assert len(written_df) == 1000
+    assert written_df["row_id"].tolist() == list(range(1, 1001))
+
+
+def test_autotune():
+    """
+    Test that `autotune` sizes chunks from the measured bytes per row and keeps
+    the worker count between one and the CPU count.
+    """
+    sample_df = create_large_dataframe(num_rows=1000, num_cols=10)
+    bytes_per_row = len(sample_df.to_csv(index=False, header=False)) / len(sample_df)
+    chunk_size, num_workers = autotune(sample_df, num_rows=10**9, target_chunk_mb=1, cpu_count=4)
+    assert chunk_size == pytest.approx(1024 * 1024 / bytes_per_row, rel=0.01)
+    assert 1 <= num_workers <= 4
+    chunk_size, _ = autotune(sample_df, num_rows=500, target_chunk_mb=1, cpu_count=4)
+    assert chunk_size == 500
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_main_writes_tail_chunk(tmp_path, stream):
+    """
+    Test that `main` keeps the remainder rows when the row count is not a
+    multiple of the chunk size.
+    """
+    main("out.csv", tmp_path, num_rows=1003, num_cols=4, stream=stream, chunk_size=100, num_workers=2,
+         log_file=str(tmp_path / "export.log"))
+    written_df = pd.read_csv(tmp_path / "out.csv")
+    assert written_df["row_id"].tolist() == list(range(1, 1004))
+
+
+def test_configure_logging(tmp_path):
+    """
+    Test that records go through the queue listener to the log file and that
+    no handler is left on the logger once logging is stopped.
+    """
+    log_file = tmp_path / "export.log"
+    assert logger.handlers == []
+    listener = configure_logging(str(log_file))
+    try:
+        assert configure_logging(str(tmp_path / "other.log")) is None
+        logger.info("queued record")
+    finally:
+        stop_logging(listener)
+    assert logger.handlers == []
+    assert log_file.read_text().rstrip().endswith("INFO - queued record")
+    assert not (tmp_path / "other.log").exists()
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_main_logs_worker_records(tmp_path, backend):
+    """
+    Test that `main` configures logging for the export only and that chunk records
+    from process-pool workers reach the log file through the multiprocessing queue.
+    """
+    log_file = tmp_path / "export.log"
+    main("out.csv", tmp_path, backend=backend, num_rows=1000, num_cols=4, chunk_size=100, num_workers=2,
+         log_file=str(log_file))
+    assert logger.handlers == []
+    log_text = log_file.read_text()
+    assert all(f"Chunk {i} written successfully." in log_text for i in range(10))
+    assert "process_large_data.main took" in log_text
+
+
+@pytest.fixture
+def typed_df():
+    return pd.DataFrame(
+        {
+            "row_id": np.arange(1, 101, dtype=np.int64),
+            "num_col_0": np.linspace(0.0, 1.0, 100),
+            "str_col_0": ["A", "B", "C", "D"] * 25,
+        }
+    )
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather"])
+def test_write_to_file_arrow_formats(tmp_path, typed_df, fmt):
+    """
+    Test that parquet and feather exports keep the column types and write one
+    row group or record batch per chunk.
+    """
+    pa = pytest.importorskip("pyarrow")
+    output_file = tmp_path / f"out.{fmt}"
+    bytes_written = write_to_file(str(output_file), chunk_generator(typed_df, 25, 4), num_workers=2, fmt=fmt)
+    assert bytes_written == output_file.stat().st_size
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        assert pq.ParquetFile(output_file).num_row_groups == 4
+        written_df = pd.read_parquet(output_file)
+    else:
+        with pa.ipc.open_file(str(output_file)) as reader:
+            assert reader.num_record_batches == 4
+        written_df = pd.read_feather(output_file)
+    pd.testing.assert_frame_equal(written_df, typed_df)
+
+
+def test_write_to_file_npy(tmp_path, typed_df):
+    """
+    Test that the npy export is a single typed record array holding every chunk.
+    """
+    output_file = tmp_path / "out.npy"
+    write_to_file(str(output_file), chunk_generator(typed_df, 30, 4), num_workers=2, fmt="npy")
+    records = np.load(output_file)
+    assert records.shape == (100,)
+    assert records.dtype["row_id"] == np.int64
+    np.testing.assert_array_equal(records["num_col_0"], typed_df["num_col_0"].to_numpy())
+    np.testing.assert_array_equal(records["str_col_0"], typed_df["str_col_0"].to_numpy(dtype=str))
+
+
+def test_write_to_file_npy_widens_strings(tmp_path, monkeypatch):
+    """
+    Test that a later npy chunk with longer strings widens the records written before it,
+    while categorical columns are as wide as their longest category from the first chunk.
+    """
+    monkeypatch.setattr(chunk_formats, "NPY_WIDEN_BLOCK_BYTES", 64)
+    df = pd.DataFrame(
+        {
+            "row_id": np.arange(100),
+            "text": ["a"] * 90 + ["x" * 200] * 10,
+            "category": pd.Categorical(["A"] * 90 + ["BBBB"] * 10),
+        }
+    )
+    output_file = tmp_path / "out.npy"
+    write_to_file(str(output_file), chunk_generator(df, 10, 10), num_workers=2, fmt="npy")
+    records = np.load(output_file)
+    assert records.dtype["category"] == np.dtype("U4")
+    np.testing.assert_array_equal(records["row_id"], df["row_id"].to_numpy())
+    np.testing.assert_array_equal(records["text"], df["text"].to_numpy(dtype=str))
+    np.testing.assert_array_equal(records["category"], df["category"].to_numpy(dtype=str))
+
+
+@pytest.mark.parametrize("fmt", ["npy", "npz"])
+def test_write_to_file_numpy_formats_masked_integers(tmp_path, fmt):
+    """
+    Test that a nullable integer column is stored as values filled with 0 plus a `.mask`.
+    """
+    df = pd.DataFrame({"count": pd.array([1, None, 3, 4], dtype="Int64")})
+    output_file = tmp_path / f"out.{fmt}"
+    write_to_file(str(output_file), chunk_generator(df, 2, 2), num_workers=2, fmt=fmt)
+    if fmt == "npy":
+        records = np.load(output_file)
+        values, mask = records["count"], records["count.mask"]
+    else:
+        with np.load(output_file) as archive:
+            assert "chunk_00001/count.mask" not in archive.files
+            values = np.concatenate([archive["chunk_00000/count"], archive["chunk_00001/count"]])
+            mask = np.concatenate([archive["chunk_00000/count.mask"], np.zeros(2, dtype=bool)])
+    assert values.dtype == np.int64
+    np.testing.assert_array_equal(values, [1, 0, 3, 4])
+    np.testing.assert_array_equal(mask, [False, True, False, False])
+
+
+def test_write_to_file_npz(tmp_path, typed_df):
+    """
+    Test that the npz export stores typed per-chunk column arrays.
+    """
+    output_file = tmp_path / "out.npz"
+    write_to_file(str(output_file), chunk_generator(typed_df, 50, 2), num_workers=2, fmt="npz", backend="process")
+    with np.load(output_file) as archive:
+        assert sorted(archive.files) == sorted(
+            f"chunk_{i:05d}/{column}" for i in range(2) for column in typed_df.columns
+        )
+        np.testing.assert_array_equal(archive["chunk_00001/row_id"], typed_df["row_id"].to_numpy()[50:])
+
+
 def test_get_args(mock_args):
     """
     Unit test for the `get_args` function.
@@ -0,0 +1,144 @@
+"""
+Unit tests for the `read_parallel` module in the `perceive_py` package.
+"""
+
+import random
+import zlib
+
+import numpy as np
+import pytest
+
+from perceive_py.read_parallel import (
+    iter_lines,
+    line_offsets,
+    plan_chunks,
+    read_parallel,
+    write_parts,
+)
+
+
+@pytest.fixture
+def lines_file(tmp_path):
+    input_file = tmp_path / "input.txt"
+    input_file.write_bytes(b"first\n\nthird line\ncaf\xc3\xa9\nno newline")
+    return input_file
+
+
+def test_line_offsets(lines_file):
+    """
+    test_line_offsets - Asserts offsets and lengths include delimiters and the unterminated tail
+    """
+    data = lines_file.read_bytes()
+    offsets, lengths = line_offsets(data, 0, len(data))
+    assert offsets.dtype == np.int64 and lengths.dtype == np.int64
+    assert [data[o:o + n] for o, n in zip(offsets, lengths)] == data.splitlines(keepends=True)
+
+
+def test_line_offsets_small_windows(lines_file, mocker):
+    """
+    test_line_offsets_small_windows - Asserts lines spanning scan windows are found once
+    """
+    mocker.patch("perceive_py.read_parallel.SCAN_BLOCK_BYTES", 4)
+    data = lines_file.read_bytes()
+    offsets, lengths = line_offsets(data, 6, len(data))
+    assert [data[o:o + n] for o, n in zip(offsets, lengths)] == data[6:].splitlines(keepends=True)
+
+
+def test_iter_lines(lines_file):
+    """
+    test_iter_lines - Asserts a chunk comes back as compact offset arrays that map to memoryviews
+    """
+    data = lines_file.read_bytes()
+    offsets, lengths = line_offsets(data, 0, 18)
+    assert offsets.tolist() == [0, 6, 7]
+    assert [bytes(line) for line in iter_lines(data, offsets, lengths)] == [b"first\n", b"\n", b"third line\n"]
+
+
+def test_line_offsets_empty_range(lines_file):
+    """
+    test_line_offsets_empty_range - Asserts an empty range yields empty arrays
+    """
+    offsets, lengths = line_offsets(lines_file.read_bytes(), 5, 5)
+    assert len(offsets) == 0 and len(lengths) == 0
+
+
+def test_line_offsets_multibyte_delimiter(mocker):
+    """
+    test_line_offsets_multibyte_delimiter - Asserts \\r\\n lines are split even across scan windows
+    """
+    mocker.patch("perceive_py.read_parallel.SCAN_BLOCK_BYTES", 3)
+    data = b"ab\r\ncd\re\r\n\r\nlast"
+    offsets, lengths = line_offsets(data, 0, len(data), "\r\n")
+    assert [data[o:o + n] for o, n in zip(offsets, lengths)] == [b"ab\r\n", b"cd\re\r\n", b"\r\n", b"last"]
+
+
+@pytest.mark.parametrize("delimiter", ["\n", "\r\n"])
+@pytest.mark.parametrize("num_chunks", [1, 3, 8, 50])
+def test_plan_chunks(tmp_path, mocker, delimiter, num_chunks):
+    """
+    test_plan_chunks - Asserts chunks are contiguous, start on line boundaries and cover the file,
+    including lines longer than a chunk and longer than the boundary search block
+    """
+    mocker.patch("perceive_py.read_parallel.BOUNDARY_BLOCK_BYTES", 5)
+    rng = random.Random(num_chunks)
+    lines = [b"x" * rng.choice([0, 1, 3, 40, 200]) + delimiter.encode() for _ in range(30)]
+    data = b"".join(lines) + b"tail"
+    input_file = tmp_path / "input.txt"
+    input_file.write_bytes(data)
+
+    chunk_args = plan_chunks(str(input_file), num_chunks, delimiter)
+    line_starts = set(np.cumsum([0] + [len(line) for line in lines]).tolist())
+    assert chunk_args[0][1] == 0 and chunk_args[-1][2] == len(data)
+    for (_, start, end), (_, next_start, _) in zip(chunk_args, chunk_args[1:]):
+        assert start < end == next_start
+        assert end in line_starts
+
+
+def test_write_parts(lines_file, tmp_path):
+    """
+    test_write_parts - Asserts workers write part files and report line count, bytes and checksum
+    """
+    output_location = tmp_path / "parts"
+    output_location.mkdir()
+    chunk_args = plan_chunks(str(lines_file), 3)
+    parts = sorted(write_parts(chunk_args, output_location, num_workers=2), key=lambda part: part["partno"])
+    assert [part["partno"] for part in parts] == list(range(len(chunk_args)))
+    written = b""
+    for part, (_, chunk_start, chunk_end) in zip(parts, chunk_args):
+        data = open(part["output_filename"], "rb").read()
+        assert part["bytes"] == len(data) == chunk_end - chunk_start
+        assert part["checksum"] == zlib.crc32(data)
+        assert part["lines"] == len(data.splitlines())
+        written += data
+    assert written == lines_file.read_bytes()
+
+
+def test_read_parallel(lines_file, tmp_path):
+    """
+    test_read_parallel - Asserts read_parallel returns part metadata in part order
+    """
+    output_location = tmp_path / "parts"
+    output_location.mkdir()
+    parts, aggregates = read_parallel(str(lines_file), output_location)
+    assert sum(part["lines"] for part in parts) == 5
+    assert [part["partno"] for part in parts] == list(range(len(parts)))
+    assert aggregates == {}
+
+
+def test_read_parallel_with_stages(lines_file, tmp_path):
+    """
+    test_read_parallel_with_stages - Asserts filter and map stages shape the part files
+    and per-part aggregates are merged in the parent
+    """
+    output_location = tmp_path / "parts"
+    output_location.mkdir()
+    stage_specs = [
+        ("filter", "perceive_py.line_transforms.is_not_blank"),
+        ("map", "perceive_py.line_transforms:to_upper"),
+        ("aggregate", "perceive_py.line_transforms.LineCount"),
+    ]
+    parts, aggregates = read_parallel(str(lines_file), output_location, stage_specs=stage_specs)
+    written = b"".join(open(part["output_filename"], "rb").read() for part in parts)
+    assert written == b"FIRST\nTHIRD LINE\nCAF\xc3\xa9\nNO NEWLINE"
+    assert sum(part["lines_in"] for part in parts) == 5
+    assert aggregates == {"perceive_py.line_transforms.LineCount": 4}
@@ -0,0 +1,92 @@
+"""
+Unit tests for the streaming downloads in the `sequential_downloads` module of the `perceive_py` package.
+"""
+
+import hashlib
+import tracemalloc
+
+import httpx
+import pytest
+
+from perceive_py.mock_flag_server import MockFlagServer, flag_body
+from perceive_py.sequential_downloads import ChecksumMismatch, part_path, stream_download
+
+SIZE = 256 * 1024
+SHA256 = hashlib.sha256(flag_body("br", SIZE)).hexdigest()
+
+
+@pytest.fixture
+def server():
+    with MockFlagServer(size=SIZE) as server:
+        yield server
+
+
+def test_stream_download(server, tmp_path):
+    """
+    test_stream_download - Asserts the body is streamed to the destination, verified, and the .part file removed
+    """
+    dest = stream_download(f"{server.base_url}/br/br.gif", tmp_path / "br.gif", sha256=SHA256)
+    assert dest.read_bytes() == flag_body("br", SIZE)
+    assert not part_path(dest).exists()
+
+
+def test_stream_download_resumes_part(server, tmp_path):
+    """
+    test_stream_download_resumes_part - Asserts an existing .part file is continued with a Range request
+    """
+    dest = tmp_path / "br.gif"
+    part_path(dest).write_bytes(flag_body("br", SIZE)[:1000])
+    stream_download(f"{server.base_url}/br/br.gif", dest, sha256=SHA256)
+    assert dest.read_bytes() == flag_body("br", SIZE)
+    assert server.counters["partial"] == 1
+
+
+def test_stream_download_retries_dropped_connections(tmp_path):
+    """
+    test_stream_download_retries_dropped_connections - Asserts bodies cut off half way are resumed, single and in parallel
+    """
+    with MockFlagServer(size=SIZE, drop_rate=0.5, seed=1) as server:
+        url = f"{server.base_url}/br/br.gif"
+        stream_download(url, tmp_path / "single.gif", sha256=SHA256, retries=20)
+        stream_download(url, tmp_path / "ranges.gif", sha256=SHA256, parts=4, retries=20)
+        assert server.counters["dropped"] > 0
+    with MockFlagServer(size=SIZE, drop_rate=1.0) as server:
+        with pytest.raises(httpx.TransportError):
+            stream_download(f"{server.base_url}/br/br.gif", tmp_path / "fails.gif", retries=1)
+        assert part_path(tmp_path / "fails.gif").stat().st_size == SIZE // 2 + SIZE // 4
+
+
+def test_stream_download_parallel_ranges(server, tmp_path):
+    """
+    test_stream_download_parallel_ranges - Asserts parallel byte ranges assemble the same file
+    """
+    dest = stream_download(f"{server.base_url}/br/br.gif", tmp_path / "br.gif", sha256=SHA256, parts=4)
+    assert dest.read_bytes() == flag_body("br", SIZE)
+    assert server.counters["partial"] == 4
+
+
+def test_stream_download_checksum_mismatch(server, tmp_path):
+    """
+    test_stream_download_checksum_mismatch - Asserts a wrong checksum raises and discards the .part file
+    """
+    dest = tmp_path / "br.gif"
+    with pytest.raises(ChecksumMismatch):
+        stream_download(f"{server.base_url}/br/br.gif", dest, sha256="0" * 64)
+    assert not dest.exists() and not part_path(dest).exists()
+
+
+def test_stream_download_memory_is_constant(tmp_path):
+    """
+    test_stream_download_memory_is_constant - Asserts peak memory does not grow with the body size
+    """
+    with MockFlagServer(size=8 * 1024 * 1024) as server:
+        url = f"{server.base_url}/br/br.gif"
+        httpx.head(url)
+        stream_download(url, tmp_path / "warm.gif")
+        tracemalloc.start()
+        try:
+            stream_download(url, tmp_path / "br.gif")
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    assert peak < 1024 * 1024
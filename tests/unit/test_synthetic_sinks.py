@@ -0,0 +1,114 @@
+"""
+Unit tests for the `synthetic_sinks` module in the `perceive_py` package.
+"""
+
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from perceive_py.create_synthetic_data import generate_combined_data_chunked, generate_synthetic_data, generate_to
+from perceive_py.synthetic_sinks import CsvSink, DataFrameSink, NpzSink, ParquetSink, SqliteSink
+
+SCHEMA = {
+    "fields": [
+        {"name": "id", "type": "integer", "distribution": "sequential"},
+        {"name": "name", "type": "string", "nullable": 0.1},
+        {"name": "value", "type": "float"},
+        {"name": "score", "type": "integer", "nullable": 0.2},
+        {"name": "flag", "type": "boolean"},
+        {"name": "day", "type": "date"},
+    ]
+}
+
+
+@pytest.fixture
+def expected():
+    return generate_to(DataFrameSink(), SCHEMA, 250, chunk_rows=100, seed=3)
+
+
+def test_dataframe_sink(expected):
+    """
+    test_dataframe_sink - Asserts chunks are joined into one typed frame that does not depend on
+    how the chunks were produced
+    """
+    assert len(expected) == 250 and expected["id"].tolist() == list(range(250))
+    assert expected["score"].dtype == "Int64" and expected["name"].isna().any()
+    schemas = {"table": {"schema": SCHEMA, "seed": 3}}
+    chunked = generate_combined_data_chunked(schemas, 250, block_rows=100, num_workers=1)["table"]["table"]
+    assert chunked.equals(expected)
+    assert generate_synthetic_data(SCHEMA, 250, seed=3).equals(generate_to(DataFrameSink(), SCHEMA, 250, seed=3))
+
+
+def test_empty_table():
+    """
+    test_empty_table - Asserts an empty table still has its columns
+    """
+    assert list(generate_to(DataFrameSink(), SCHEMA, 0)) == [field["name"] for field in SCHEMA["fields"]]
+
+
+def test_csv_sink(expected, tmp_path):
+    """
+    test_csv_sink - Asserts the CSV holds the rows, with empty fields for nulls
+    """
+    output_file = tmp_path / "table.csv"
+    assert generate_to(CsvSink(output_file), SCHEMA, 250, chunk_rows=100, seed=3) == output_file.stat().st_size
+    df = pd.read_csv(
+        output_file, float_precision="round_trip", parse_dates=["day"], dtype={"score": "Int64", "name": expected["name"].dtype}
+    )
+    assert df.drop(columns="day").equals(expected.drop(columns="day"))
+    assert (df["day"] == expected["day"]).all()
+
+
+def test_parquet_sink(expected, tmp_path):
+    """
+    test_parquet_sink - Asserts every chunk becomes a row group and nulls survive
+    """
+    pq = pytest.importorskip("pyarrow.parquet")
+    output_file = tmp_path / "table.parquet"
+    generate_to(ParquetSink(output_file), SCHEMA, 250, chunk_rows=100, seed=3)
+    assert pq.ParquetFile(output_file).num_row_groups == 3
+    table = pq.read_table(output_file)
+    assert table.column("score").null_count == expected["score"].isna().sum()
+    assert table.column("name").to_pylist() == [None if pd.isna(v) else v for v in expected["name"]]
+
+
+def test_npz_sink(expected, tmp_path):
+    """
+    test_npz_sink - Asserts chunks are stored as values plus masks for nullable chunks
+    """
+    output_file = tmp_path / "table.npz"
+    generate_to(NpzSink(output_file), SCHEMA, 250, chunk_rows=100, seed=3)
+    with np.load(output_file) as archive:
+        ids = np.concatenate([archive[f"chunk_{i:05d}/id"] for i in range(3)])
+        masks = np.concatenate([archive[f"chunk_{i:05d}/score.mask"] for i in range(3)])
+        assert "chunk_00000/id.mask" not in archive.files
+    assert ids.tolist() == list(range(250))
+    assert (masks == expected["score"].isna().to_numpy()).all()
+
+
+def test_sqlite_sink(expected, tmp_path):
+    """
+    test_sqlite_sink - Asserts the table is created with matching column types and holds the rows
+    """
+    output_file = tmp_path / "table.db"
+    generate_to(SqliteSink(output_file, "events"), SCHEMA, 250, chunk_rows=100, seed=3)
+    with sqlite3.connect(output_file) as connection:
+        types = [row[2] for row in connection.execute('PRAGMA table_info("events")')]
+        rows = connection.execute('SELECT id, score, flag, day FROM "events" ORDER BY rowid').fetchall()
+    assert types == ["INTEGER", "TEXT", "REAL", "INTEGER", "INTEGER", "TEXT"]
+    assert len(rows) == 250
+    assert [row[1] for row in rows] == [None if pd.isna(v) else v for v in expected["score"]]
+    assert rows[7][2] == int(expected["flag"][7]) and rows[7][3] == str(expected["day"][7].date())
+
+
+def test_sqlite_sink_replaces_file(tmp_path):
+    """
+    test_sqlite_sink_replaces_file - Asserts a second export replaces the rows of the first and reports its own size
+    """
+    output_file = tmp_path / "table.db"
+    sizes = [generate_to(SqliteSink(output_file), SCHEMA, 5, seed=seed) for seed in (3, 4)]
+    with sqlite3.connect(output_file) as connection:
+        assert connection.execute('SELECT COUNT(*) FROM "data"').fetchone()[0] == 5
+    assert sizes[1] == output_file.stat().st_size
@@ -0,0 +1,207 @@
+"""
+Unit tests for the `utils` module in the `perceive_py` package.
+"""
+
+import asyncio
+import sys
+import time
+import types
+
+import pytest
+
+from perceive_py.utils import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ControlledException,
+    RetryBudget,
+    backoff_delay,
+    lazy_import,
+    load_lazy_modules,
+    with_retry,
+)
+
+
+def flaky(failures, exc=ControlledException):
+    calls = []
+
+    def func():
+        calls.append(time.monotonic())
+        if len(calls) <= failures:
+            raise exc(len(calls))
+        return len(calls)
+
+    return func, calls
+
+
+def test_with_retry_limit_zero_makes_one_attempt():
+    """
+    test_with_retry_limit_zero_makes_one_attempt - Asserts limit=0 makes a single attempt and re-raises its exception
+    """
+    func, calls = flaky(1)
+    with pytest.raises(ControlledException):
+        with_retry(limit=0, base_delay=0)(func)()
+    assert len(calls) == 1
+
+
+def test_with_retry_backoff_and_stats():
+    """
+    test_with_retry_backoff_and_stats - Asserts retries until success and counts attempts and sleep time
+    """
+    func, calls = flaky(2)
+    wrapped = with_retry(limit=3, base_delay=0.01)(func)
+    assert wrapped() == 3
+    stats = wrapped.stats.as_dict()
+    assert stats["attempts"] == 3 and stats["retries"] == 2 and stats["give_ups"] == 0
+    assert 0 <= stats["sleep_seconds"] <= 0.03
+    func, calls = flaky(5)
+    with pytest.raises(ControlledException):
+        with_retry(limit=3, base_delay=0, stats=wrapped.stats)(func)()
+    assert len(calls) == 3 and wrapped.stats.give_ups == 1
+    func, calls = flaky(5, ValueError)
+    with pytest.raises(ValueError):
+        with_retry(limit=3, base_delay=0)(func)()
+    assert len(calls) == 1
+
+
+def test_backoff_delay_full_jitter():
+    """
+    test_backoff_delay_full_jitter - Asserts delays are uniform up to the exponential bound and capped
+    """
+    delays = [backoff_delay(3, base_delay=1, max_delay=5) for _ in range(1000)]
+    assert 0 <= min(delays) < 0.5 and 4.5 < max(delays) <= 5
+    assert all(0 <= backoff_delay(2, base_delay=0.1) <= 0.4 for _ in range(100))
+
+
+def test_with_retry_deadline():
+    """
+    test_with_retry_deadline - Asserts no attempt starts after the deadline
+    """
+    func, calls = flaky(100)
+    tic = time.monotonic()
+    with pytest.raises(ControlledException):
+        with_retry(limit=100, base_delay=0.02, max_delay=0.02, deadline=0.1)(func)()
+    assert time.monotonic() - tic < 0.15
+    assert all(call - calls[0] <= 0.1 for call in calls)
+
+
+def test_with_retry_shared_budget():
+    """
+    test_with_retry_shared_budget - Asserts a budget shared by two functions caps their retries together
+    """
+    budget = RetryBudget(ratio=0, initial=2)
+    first, first_calls = flaky(100)
+    second, second_calls = flaky(100)
+    for func in (first, second):
+        with pytest.raises(ControlledException):
+            with_retry(limit=10, base_delay=0, budget=budget)(func)()
+    assert len(first_calls) + len(second_calls) == 4
+    assert budget.tokens == 0
+
+
+def test_with_retry_circuit_breaker():
+    """
+    test_with_retry_circuit_breaker - Asserts circuits open per target, reject calls and close after a trial
+    """
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    healthy = {"b": True}
+
+    @with_retry(limit=1, circuit_breaker=breaker, target=lambda host: host)
+    def fetch(host):
+        if not healthy.get(host):
+            raise ControlledException(host)
+        return host
+
+    for _ in range(2):
+        with pytest.raises(ControlledException):
+            fetch("a")
+    with pytest.raises(CircuitOpenError):
+        fetch("a")
+    assert fetch("b") == "b" and breaker.state("b") == "closed"
+    assert fetch.stats.rejected == 1
+    time.sleep(0.06)
+    assert breaker.state("a") == "half-open"
+    healthy["a"] = True
+    assert fetch("a") == "a" and breaker.state("a") == "closed"
+
+
+@pytest.mark.parametrize("exc", [ValueError, KeyboardInterrupt])
+def test_with_retry_circuit_breaker_releases_trial(exc):
+    """
+    test_with_retry_circuit_breaker_releases_trial - Asserts a half-open trial raising an uncounted exception
+    lets the next call be the trial
+    """
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    outcomes = [ControlledException, exc, None]
+
+    @with_retry(limit=1, circuit_breaker=breaker)
+    def fetch():
+        outcome = outcomes.pop(0)
+        if outcome is not None:
+            raise outcome()
+        return "ok"
+
+    with pytest.raises(ControlledException):
+        fetch()
+    time.sleep(0.02)
+    with pytest.raises(exc):
+        fetch()
+    assert breaker.state(fetch.__qualname__) == "half-open"
+    assert fetch() == "ok" and breaker.state(fetch.__qualname__) == "closed"
+
+
+def test_with_retry_async_cancelled_trial():
+    """
+    test_with_retry_async_cancelled_trial - Asserts a cancelled half-open trial does not keep the circuit rejecting
+    """
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    healthy = {"ok": False}
+
+    @with_retry(limit=1, circuit_breaker=breaker)
+    async def fetch(delay=0):
+        await asyncio.sleep(delay)
+        if not healthy["ok"]:
+            raise ControlledException()
+        return "ok"
+
+    async def scenario():
+        with pytest.raises(ControlledException):
+            await fetch()
+        await asyncio.sleep(0.02)
+        trial = asyncio.create_task(fetch(1))
+        await asyncio.sleep(0)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        healthy["ok"] = True
+        return await fetch()
+
+    assert asyncio.run(scenario()) == "ok"
+
+
+def test_with_retry_async():
+    """
+    test_with_retry_async - Asserts coroutine functions are retried and awaited
+    """
+    attempts = []
+
+    @with_retry(limit=3, base_delay=0.01)
+    async def fetch():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ControlledException()
+        return "ok"
+
+    assert asyncio.run(fetch()) == "ok"
+    assert fetch.stats.attempts == 3 and fetch.stats.retries == 2
+
+
+def test_load_lazy_modules(monkeypatch):
+    """
+    test_load_lazy_modules - Asserts a lazily imported module is fully loaded by `load_lazy_modules`
+    """
+    monkeypatch.delitem(sys.modules, "wave", raising=False)
+    wave = lazy_import("wave")
+    assert type(wave) is not types.ModuleType
+    load_lazy_modules()
+    assert type(wave) is types.ModuleType
+    assert "open" in vars(wave)